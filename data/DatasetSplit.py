@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：DatasetSplit.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/22 09:40
+'''
+
+# data/DatasetSplit.py
+
+import numpy as np
+
+# 默认的验证集比例与随机种子
+DEFAULT_VAL_RATIO = 0.2
+DEFAULT_SPLIT_SEED = 0
+
+# 参与划分的状态（未标注的文件不进入训练集 / 验证集）
+SPLIT_SOURCE_STATES = ("已标注", "训练集", "验证集")
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 的混合函数：把 uint64 打散为均匀分布的伪随机数。"""
+    values = values.copy()
+    values ^= values >> np.uint64(30)
+    values *= _MIX_1
+    values ^= values >> np.uint64(27)
+    values *= _MIX_2
+    values ^= values >> np.uint64(31)
+    return values
+
+
+def stratified_split(ids: np.ndarray, strata: np.ndarray, val_ratio: float, seed: int = DEFAULT_SPLIT_SEED) -> np.ndarray:
+    """
+    分层随机划分，返回与 ids 一一对应的布尔数组（True 为验证集）。
+    - 每个层（strata 中相同的编码）内各自取 round(层大小 × val_ratio) 个进入验证集，各类别的比例都接近 val_ratio；
+    - 随机性来自 (文件 id, 种子) 的哈希而不是随机数序列：同一种子下每个文件的结果与行顺序、
+      其他文件无关，同样的文件集合总是得到同样的划分；
+    - 全部为数组运算，只有一次 argsort。
+    """
+    count = len(ids)
+    if not count:
+        return np.zeros(0, dtype=bool)
+    salt = _mix(np.array([seed], dtype=np.uint64) + _GOLDEN)[0]
+    keys = _mix(ids.astype(np.uint64) ^ salt)
+    # 层编码放在高 16 位：排序后同一层连续，层内按哈希值随机排列
+    strata = strata.astype(np.uint64)
+    order = np.argsort((strata << np.uint64(48)) | (keys >> np.uint64(16)), kind="stable")
+
+    sizes = np.bincount(strata.astype(np.int64))
+    starts = np.cumsum(sizes) - sizes
+    val_sizes = np.floor(sizes * val_ratio + 0.5).astype(np.int64)
+    sorted_strata = strata[order].astype(np.int64)
+    positions = np.arange(count) - starts[sorted_strata]
+    is_val = np.empty(count, dtype=bool)
+    is_val[order] = positions < val_sizes[sorted_strata]
+    return is_val
@@ -0,0 +1,652 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：FileColumnStore.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/4 10:12
+'''
+
+# data/FileColumnStore.py
+
+import os
+import re
+import itertools
+
+import numpy as np
+from PySide6.QtGui import QColor
+
+from data.TableDataStruct import FileDataStruct, default_color, train_color, val_color, saved_color
+
+# 预置的文件状态表，状态在列中只保存为 uint8 编码
+FILE_STATES = ["未标注", "已标注", "训练集", "验证集"]
+
+# 预置调色板，颜色在列中只保存为 uint8 调色板下标
+DEFAULT_PALETTE = [default_color, train_color, val_color, saved_color]
+
+_INITIAL_CAPACITY = 1024
+
+# 每个 FileColumnStore 实例的唯一标记，用于判断快照是否来自同一份存储
+_store_tokens = itertools.count(1)
+
+
+# 文件 id 的格式：16 位小写十六进制（见 new_file_id），存为 uint64
+_FILE_ID_PATTERN = re.compile(r"[0-9a-f]{16}")
+
+
+class InvalidFileIdError(ValueError):
+    """文件 id 不是 16 位小写十六进制字符串，无法存入 id 列。"""
+
+
+def encode_file_ids(ids: list[str]) -> np.ndarray:
+    """
+    把文件 id 转为 uint64 数组；任何一个 id 格式不符时抛出 InvalidFileIdError（不修改任何数据）。
+    快速路径：全部 id 拼接后一次 bytes.fromhex，只有失败时才逐个检查找出不合法的 id。
+    """
+    ids = list(ids)
+    try:
+        joined = "".join(ids)
+        if joined == joined.lower() and all(len(file_id) == 16 for file_id in ids):
+            values = np.frombuffer(bytes.fromhex(joined), dtype=">u8")
+            # 含空白时 fromhex 会跳过，得到的字节数变少
+            if len(values) == len(ids):
+                return values.astype(np.uint64)
+    except (TypeError, ValueError):
+        pass
+    invalid = next((file_id for file_id in ids
+                    if not (isinstance(file_id, str) and _FILE_ID_PATTERN.fullmatch(file_id))), None)
+    raise InvalidFileIdError(f"文件 id 必须是 16 位小写十六进制字符串（见 new_file_id），收到：{invalid!r}")
+
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    """按倍增策略扩容，返回容量不小于 needed 的数组（原数据保留）。"""
+    if needed <= len(array):
+        return array
+    new_array = np.empty(max(needed, len(array) * 2), dtype=array.dtype)
+    new_array[:len(array)] = array
+    return new_array
+
+
+class FileRowView:
+    """
+    列式存储中某一行的轻量视图，按需从各列读取字段，接口与 FileDataStruct 保持一致。
+    视图只绑定行号：行被增删后应重新获取，不要长期持有。
+    """
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "FileColumnStore", row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self) -> str:
+        return self._store.id_at(self._row)
+
+    @property
+    def file_image_name(self) -> str:
+        return self._store.name_at(self._row)
+
+    @property
+    def file_image_dir(self) -> str:
+        return self._store.dir_at(self._row)
+
+    @property
+    def file_image_path(self) -> str:
+        return self._store.path_at(self._row)
+
+    @property
+    def file_image_state(self) -> str:
+        return self._store.state_at(self._row)
+
+    @file_image_state.setter
+    def file_image_state(self, value: str):
+        self._store.set_state(self._row, value)
+
+    @property
+    def item_color(self) -> QColor:
+        return self._store.color_at(self._row)
+
+    @item_color.setter
+    def item_color(self, value: QColor):
+        self._store.set_color(self._row, value)
+
+    def to_struct(self) -> FileDataStruct:
+        """复制出一个独立的 FileDataStruct。"""
+        return FileDataStruct(self.file_image_name, self.file_image_state, self.item_color, self.id, self.file_image_dir)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class _ColumnReader:
+    """FileColumnStore 与 FileSnapshot 共用的只读操作，依赖 serials / name_bytes / name_offsets / dirs 列和目录表。"""
+
+    def names(self, start: int = 0, stop: int = None) -> list[str]:
+        """一次性解码 [start, stop) 行（默认全部）的文件名。"""
+        offsets = self.name_offsets[start:None if stop is None else stop + 1]
+        if len(offsets) < 2:
+            return []
+        base = int(offsets[0])
+        buffer = self.name_bytes[base:int(offsets[-1])].tobytes()
+        offsets = (offsets - base).tolist()
+        return [buffer[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def names_at(self, rows: np.ndarray) -> list[str]:
+        """解码给定行（行号数组）的文件名。"""
+        if len(rows) * 4 >= len(self.serials):
+            # 行数较多时整体拷贝一次字节缓冲区，比逐行切片更快
+            buffer = self.name_bytes.tobytes()
+        else:
+            buffer = self.name_bytes
+        offsets = self.name_offsets
+        starts, ends = offsets[rows].tolist(), offsets[np.asarray(rows) + 1].tolist()
+        if isinstance(buffer, bytes):
+            return [buffer[a:b].decode("utf-8") for a, b in zip(starts, ends)]
+        return [buffer[a:b].tobytes().decode("utf-8") for a, b in zip(starts, ends)]
+
+    def paths_at(self, rows: np.ndarray) -> list[str]:
+        """给定行（行号数组）的文件路径：目录 + 文件名，没有目录信息的行即为文件名。"""
+        dir_names = self.dir_names
+        return [os.path.join(dir_names[code], name) if code else name
+                for code, name in zip(self.dirs[rows].tolist(), self.names_at(rows))]
+
+    def rows_for_serials(self, serials: np.ndarray) -> np.ndarray:
+        """把插入序号映射为行号（保持原有顺序，升序输入得到升序输出），不存在的序号被丢弃。"""
+        live_serials = self.serials
+        rows = np.searchsorted(live_serials, serials)
+        in_range = rows < len(live_serials)
+        rows, serials = rows[in_range], serials[in_range]
+        return rows[live_serials[rows] == serials]
+
+
+class FileSnapshot(_ColumnReader):
+    """
+    FileColumnStore 在某一版本下的只读快照，供后台线程使用。
+    各列都是存储数组的只读视图，创建快照不拷贝数据：
+    - 追加只写入快照范围之外的位置或新分配的数组；
+    - 删除时，被快照引用的列总是生成新数组（未被引用时才原地前移）；
+    - 状态 / 颜色的原地修改由存储在写入前复制整列（写时复制）。
+    因此快照创建之后，主线程的任何修改都不会影响快照内容。
+    """
+    __slots__ = ("store_token", "version", "ids", "serials", "states", "colors", "label_types",
+                 "widths", "heights", "dirs", "name_offsets", "name_bytes", "state_names", "label_type_names",
+                 "dir_names")
+
+    def __init__(self, store: "FileColumnStore"):
+        self.store_token = store.token
+        self.version = store.version
+        self.ids = _read_only(store.ids)
+        self.serials = _read_only(store.serials)
+        self.states = _read_only(store.states)
+        self.colors = _read_only(store.colors)
+        self.label_types = _read_only(store.label_types)
+        self.widths = _read_only(store.widths)
+        self.heights = _read_only(store.heights)
+        self.dirs = _read_only(store.dirs)
+        self.name_offsets = _read_only(store.name_offsets)
+        self.name_bytes = _read_only(store.name_bytes)
+        # 状态表 / 标签类别表 / 目录表只会追加，已有编码的含义不变
+        self.state_names = store.state_names
+        self.label_type_names = store.label_type_names
+        self.dir_names = store.dir_names
+
+    def __len__(self):
+        return len(self.serials)
+
+
+class FileColumnStore(_ColumnReader):
+    """
+    文件列表的列式存储。
+    - 文件名：所有名称的 UTF-8 字节连续存放在一个 uint8 数组中，另用 int64 偏移数组切分。
+    - 目录：uint32 编码，指向目录表（0 为没有目录信息），与文件名拼接得到读取文件用的路径；
+      同一目录下的大量文件只保存一份目录字符串，文件名列只含名称本身，供显示、搜索和排序使用。
+    - 状态 / 颜色：uint8 编码，分别指向状态表和调色板。
+    - 标签类别：uint16 编码，指向标签类别表，表示文件标注中数量最多的类别（0 为没有标注），用于分层划分数据集。
+    - 图片宽 / 高：uint32 像素数（按 EXIF 方向摆正后），0 表示尚未读取；由后台从文件头或磁盘缓存批量填充。
+    - id：uint64 数组（FileDataStruct.id 为 16 位小写十六进制字符串，其他格式在写入前被拒绝）。
+    - serial：int64 插入序号，严格递增，用于 id -> 行号 索引。
+    - 同时维护各状态的行数（直方图），随增删和状态修改逐行 O(1) 更新。
+    对外实现了 len / 下标 / 迭代等序列协议，下标访问返回 FileRowView。
+    """
+
+    def __init__(self, items=None):
+        self.state_names = list(FILE_STATES)
+        self._state_codes = {name: code for code, name in enumerate(self.state_names)}
+        self.palette = list(DEFAULT_PALETTE)
+        self._palette_codes = {color.rgba(): code for code, color in enumerate(self.palette)}
+        # 状态编码 -> 行数
+        self._state_counts = np.zeros(len(self.state_names), dtype=np.int64)
+        self.label_type_names = [""]
+        self._label_type_codes = {"": 0}
+        self.dir_names = [""]
+        self._dir_codes = {"": 0}
+
+        self._size = 0
+        self._ids = np.empty(_INITIAL_CAPACITY, dtype=np.uint64)
+        self._serials = np.empty(_INITIAL_CAPACITY, dtype=np.int64)
+        self._states = np.empty(_INITIAL_CAPACITY, dtype=np.uint8)
+        self._colors = np.empty(_INITIAL_CAPACITY, dtype=np.uint8)
+        self._label_types = np.empty(_INITIAL_CAPACITY, dtype=np.uint16)
+        self._widths = np.empty(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._heights = np.empty(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._dirs = np.empty(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._name_offsets = np.zeros(_INITIAL_CAPACITY + 1, dtype=np.int64)
+        self._name_bytes = np.empty(_INITIAL_CAPACITY * 16, dtype=np.uint8)
+
+        self._next_serial = 0
+        # id -> 插入序号；为 None 时尚未建立，首次按 id 查找时再建立（从工程文件打开时无需逐行处理）
+        self._id_to_serial = {}
+        # 结构版本：每次增删行时递增，用于判断快照及外部缓存（如共享内存中的文件名）是否过期
+        self.version = 0
+        self.token = next(_store_tokens)
+        # 状态 / 颜色 / 标签类别 / 宽高列是否被快照引用：为 True 时原地写入前需要先复制整列
+        self._flags_shared = False
+        # 其余各列（id、序号、目录、文件名）是否被快照引用：为 True 时删除行生成新数组，否则原地前移
+        self._structure_shared = False
+
+        if items:
+            self.extend(items)
+
+    @classmethod
+    def from_columns(cls, ids: np.ndarray, states: np.ndarray, colors: np.ndarray, name_offsets: np.ndarray,
+                     name_bytes: np.ndarray, state_names: list[str], palette: list[QColor],
+                     label_types: np.ndarray = None, label_type_names: list[str] = None,
+                     widths: np.ndarray = None, heights: np.ndarray = None,
+                     dirs: np.ndarray = None, dir_names: list[str] = None) -> "FileColumnStore":
+        """
+        直接由列数组建立存储（例如工程文件中内存映射的只读数组），不复制、不逐行处理。
+        这些数组只会被读取：追加时扩容生成新数组，修改状态 / 颜色 / 标签类别 / 宽高前按写时复制先复制整列。
+        没有标签类别列时视为全部没有标注，没有宽高列时视为尚未读取，没有目录列时视为没有目录信息。
+        """
+        store = cls()
+        store.state_names = list(state_names)
+        store._state_codes = {name: code for code, name in enumerate(store.state_names)}
+        store.palette = [QColor(color) for color in palette]
+        store._palette_codes = {color.rgba(): code for code, color in enumerate(store.palette)}
+        size = len(ids)
+        store._size = size
+        store._ids = ids
+        store._serials = np.arange(size, dtype=np.int64)
+        store._states = states
+        store._colors = colors
+        store._label_types = label_types if label_types is not None else np.zeros(size, dtype=np.uint16)
+        store._widths = widths if widths is not None else np.zeros(size, dtype=np.uint32)
+        store._heights = heights if heights is not None else np.zeros(size, dtype=np.uint32)
+        store._dirs = dirs if dirs is not None else np.zeros(size, dtype=np.uint32)
+        if dir_names:
+            store.dir_names = list(dir_names)
+            store._dir_codes = {name: code for code, name in enumerate(store.dir_names)}
+        if label_type_names:
+            store.label_type_names = list(label_type_names)
+            store._label_type_codes = {name: code for code, name in enumerate(store.label_type_names)}
+        store._name_offsets = name_offsets
+        store._name_bytes = name_bytes
+        store._next_serial = size
+        store._id_to_serial = None
+        store._state_counts = np.bincount(states, minlength=len(store.state_names)).astype(np.int64)
+        store._flags_shared = True
+        store._structure_shared = True
+        return store
+
+    def _id_index(self) -> dict:
+        if self._id_to_serial is None:
+            self._id_to_serial = dict(zip(self.ids.tolist(), self.serials.tolist()))
+        return self._id_to_serial
+
+    # --- 序列协议 ---
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row: int) -> FileRowView:
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError(row)
+        return FileRowView(self, row)
+
+    def __iter__(self):
+        for row in range(self._size):
+            yield FileRowView(self, row)
+
+    # --- 列访问 ---
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    @property
+    def serials(self) -> np.ndarray:
+        return self._serials[:self._size]
+
+    @property
+    def states(self) -> np.ndarray:
+        return self._states[:self._size]
+
+    @property
+    def colors(self) -> np.ndarray:
+        return self._colors[:self._size]
+
+    @property
+    def label_types(self) -> np.ndarray:
+        return self._label_types[:self._size]
+
+    @property
+    def widths(self) -> np.ndarray:
+        return self._widths[:self._size]
+
+    @property
+    def heights(self) -> np.ndarray:
+        return self._heights[:self._size]
+
+    @property
+    def dirs(self) -> np.ndarray:
+        return self._dirs[:self._size]
+
+    @property
+    def name_offsets(self) -> np.ndarray:
+        return self._name_offsets[:self._size + 1]
+
+    @property
+    def name_bytes(self) -> np.ndarray:
+        return self._name_bytes[:self._name_offsets[self._size]]
+
+    def id_at(self, row: int) -> str:
+        return format(int(self._ids[row]), "016x")
+
+    def ids_at(self, rows: np.ndarray) -> list[str]:
+        return [format(value, "016x") for value in self._ids[rows].tolist()]
+
+    def name_at(self, row: int) -> str:
+        return self._name_bytes[self._name_offsets[row]:self._name_offsets[row + 1]].tobytes().decode("utf-8")
+
+    def dir_at(self, row: int) -> str:
+        return self.dir_names[self._dirs[row]]
+
+    def path_at(self, row: int) -> str:
+        code = int(self._dirs[row])
+        name = self.name_at(row)
+        return os.path.join(self.dir_names[code], name) if code else name
+
+    def state_at(self, row: int) -> str:
+        return self.state_names[self._states[row]]
+
+    def color_at(self, row: int) -> QColor:
+        return self.palette[self._colors[row]]
+
+    def label_type_at(self, row: int) -> str:
+        return self.label_type_names[self._label_types[row]]
+
+    def snapshot(self) -> FileSnapshot:
+        """返回当前版本的只读快照（零拷贝）。"""
+        self._flags_shared = True
+        self._structure_shared = True
+        return FileSnapshot(self)
+
+    def remap_rows(self, rows: np.ndarray, snapshot: FileSnapshot) -> np.ndarray | None:
+        """
+        把在快照上计算出的行号映射为当前行号（保持原有顺序）。
+        快照之后被删除的行会被丢弃；快照不属于本存储（数据已整体替换）时返回 None。
+        """
+        if snapshot.store_token != self.token:
+            return None
+        if snapshot.version == self.version:
+            return rows
+        return self.rows_for_serials(snapshot.serials[rows])
+
+    # --- 编码表 ---
+    def state_code(self, state: str) -> int:
+        """返回状态编码，未知状态自动登记到状态表。"""
+        code = self._state_codes.get(state)
+        if code is None:
+            code = len(self.state_names)
+            self.state_names.append(state)
+            self._state_codes[state] = code
+            self._state_counts = np.append(self._state_counts, 0)
+        return code
+
+    def color_code(self, color: QColor) -> int:
+        """返回颜色在调色板中的下标，新颜色自动登记。"""
+        key = color.rgba()
+        code = self._palette_codes.get(key)
+        if code is None:
+            code = len(self.palette)
+            self.palette.append(QColor(color))
+            self._palette_codes[key] = code
+        return code
+
+    def label_type_code(self, label_type: str) -> int:
+        """返回标签类别编码，新类别自动登记。"""
+        code = self._label_type_codes.get(label_type)
+        if code is None:
+            code = len(self.label_type_names)
+            self.label_type_names.append(label_type)
+            self._label_type_codes[label_type] = code
+        return code
+
+    def dir_code(self, directory: str) -> int:
+        """返回目录编码，新目录自动登记。"""
+        code = self._dir_codes.get(directory)
+        if code is None:
+            code = len(self.dir_names)
+            self.dir_names.append(directory)
+            self._dir_codes[directory] = code
+        return code
+
+    def state_counts(self) -> dict[str, int]:
+        """各状态的行数（按状态表顺序）。"""
+        return dict(zip(self.state_names, self._state_counts.tolist()))
+
+    def rows_in_state(self, state: str) -> np.ndarray:
+        """处于给定状态的全部行号（升序），直接比较状态编码列得到。"""
+        code = self._state_codes.get(state)
+        if code is None or not self._state_counts[code]:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.states == code)
+
+    def set_state(self, row: int, state: str):
+        self._unshare_flags()
+        code = self.state_code(state)
+        self._state_counts[self._states[row]] -= 1
+        self._state_counts[code] += 1
+        self._states[row] = code
+
+    def set_color(self, row: int, color: QColor):
+        self._unshare_flags()
+        self._colors[row] = self.color_code(color)
+
+    def set_rows_state(self, rows: np.ndarray, state: str, color: QColor) -> np.ndarray:
+        """
+        把一批行（升序行号数组）设为同一状态和颜色，返回实际发生变化的行号（升序）。
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.set_rows_codes(rows, np.full(len(rows), self.state_code(state), dtype=np.uint8),
+                                   np.full(len(rows), self.color_code(color), dtype=np.uint8))
+
+    def set_rows_codes(self, rows: np.ndarray, state_codes: np.ndarray, color_codes: np.ndarray) -> np.ndarray:
+        """按行写入状态编码和颜色编码（与 rows 一一对应），返回实际发生变化的行号（保持 rows 的顺序）。"""
+        rows = np.asarray(rows, dtype=np.int64)
+        differs = (self._states[rows] != state_codes) | (self._colors[rows] != color_codes)
+        changed = rows[differs]
+        if len(changed):
+            state_codes = state_codes[differs]
+            self._unshare_flags()
+            self._state_counts -= np.bincount(self._states[changed], minlength=len(self._state_counts))
+            self._state_counts += np.bincount(state_codes, minlength=len(self._state_counts))
+            self._states[changed] = state_codes
+            self._colors[changed] = color_codes[differs]
+        return changed
+
+    def set_rows_label_type(self, rows: np.ndarray, label_types: list[str]):
+        """按行写入标签类别（与 rows 一一对应，空字符串表示没有标注）。"""
+        codes = np.fromiter((self.label_type_code(name) for name in label_types), dtype=np.uint16, count=len(rows))
+        self._unshare_flags()
+        self._label_types[np.asarray(rows, dtype=np.int64)] = codes
+
+    def set_rows_image_size(self, rows: np.ndarray, widths: np.ndarray, heights: np.ndarray):
+        """按行写入图片宽高（与 rows 一一对应）。"""
+        self._unshare_flags()
+        rows = np.asarray(rows, dtype=np.int64)
+        self._widths[rows] = widths
+        self._heights[rows] = heights
+
+    def _unshare_flags(self):
+        """写时复制：状态 / 颜色 / 标签类别 / 宽高列仍被快照引用时，先复制再原地修改。"""
+        if self._flags_shared:
+            self._states = self._states.copy()
+            self._colors = self._colors.copy()
+            self._label_types = self._label_types.copy()
+            self._widths = self._widths.copy()
+            self._heights = self._heights.copy()
+            self._flags_shared = False
+
+    # --- 写入 ---
+    def append(self, item):
+        self.extend([item])
+
+    def extend(self, items):
+        """追加一批 FileDataStruct（或任何具有相同字段的对象）；id 格式不符时抛出 InvalidFileIdError，不追加任何行。"""
+        items = list(items)
+        if not items:
+            return
+        ids = encode_file_ids([item.id for item in items])
+        self.append_columns(
+            [item.file_image_name for item in items],
+            np.fromiter((self.state_code(item.file_image_state) for item in items), dtype=np.uint8, count=len(items)),
+            np.fromiter((self.color_code(item.item_color) for item in items), dtype=np.uint8, count=len(items)),
+            ids,
+            np.fromiter((self.dir_code(item.file_image_dir) for item in items), dtype=np.uint32, count=len(items)),
+        )
+
+    def append_columns(self, names: list[str], state_codes: np.ndarray, color_codes: np.ndarray, ids: np.ndarray,
+                       dir_codes: np.ndarray = None):
+        """按列追加数据，是所有写入路径的最终实现。dir_codes 省略时这些行没有目录信息。"""
+        count = len(names)
+        encoded = [name.encode("utf-8") for name in names]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=count)
+
+        start, end = self._size, self._size + count
+        self._ids = _grow(self._ids, end)
+        self._serials = _grow(self._serials, end)
+        self._states = _grow(self._states, end)
+        self._colors = _grow(self._colors, end)
+        self._label_types = _grow(self._label_types, end)
+        self._widths = _grow(self._widths, end)
+        self._heights = _grow(self._heights, end)
+        self._dirs = _grow(self._dirs, end)
+        self._name_offsets = _grow(self._name_offsets, end + 1)
+
+        byte_start = int(self._name_offsets[start])
+        byte_end = byte_start + int(lengths.sum())
+        self._name_bytes = _grow(self._name_bytes, byte_end)
+        self._name_bytes[byte_start:byte_end] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        np.cumsum(lengths, out=self._name_offsets[start + 1:end + 1])
+        self._name_offsets[start + 1:end + 1] += byte_start
+
+        serials = np.arange(self._next_serial, self._next_serial + count, dtype=np.int64)
+        self._next_serial += count
+        self._ids[start:end] = ids
+        self._serials[start:end] = serials
+        self._states[start:end] = state_codes
+        self._colors[start:end] = color_codes
+        self._label_types[start:end] = 0
+        self._widths[start:end] = 0
+        self._heights[start:end] = 0
+        self._dirs[start:end] = 0 if dir_codes is None else dir_codes
+        self._state_counts += np.bincount(self._states[start:end], minlength=len(self._state_counts))
+        if self._id_to_serial is not None:
+            self._id_to_serial.update(zip(self._ids[start:end].tolist(), serials.tolist()))
+        self._size = end
+        self.version += 1
+
+    def detach(self, rows) -> list[FileDataStruct]:
+        """把给定行复制为独立的 FileDataStruct 列表，删除之后仍然可用。"""
+        return [FileRowView(self, row).to_struct() for row in rows]
+
+    def delete_range(self, first: int, last: int):
+        """
+        删除 [first, last] 闭区间内的行，只搬移区间之后的数据，不做整表的掩码压缩。
+        各列被快照引用时拼接出新数组（快照内容不变），否则在原数组中把后面的行前移；
+        一次 remove_rows 中的多个区间，最多只有第一个区间需要复制。
+        """
+        count = last - first + 1
+        if count <= 0:
+            return
+        size = self._size
+        self._forget_ids(self.ids[first:last + 1], self.serials[first:last + 1])
+        self._state_counts -= np.bincount(self.states[first:last + 1], minlength=len(self._state_counts))
+
+        byte_first, byte_last = int(self._name_offsets[first]), int(self._name_offsets[last + 1])
+        byte_end = int(self._name_offsets[size])
+        removed_bytes = byte_last - byte_first
+        columns = ("_ids", "_serials", "_states", "_colors", "_label_types", "_widths", "_heights", "_dirs")
+        if self._structure_shared:
+            for name in columns:
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate((column[:first], column[last + 1:size])))
+            self._name_offsets = np.concatenate((self._name_offsets[:first + 1],
+                                                 self._name_offsets[last + 2:size + 1] - removed_bytes))
+            self._name_bytes = np.concatenate((self._name_bytes[:byte_first], self._name_bytes[byte_last:byte_end]))
+            self._structure_shared = False
+            self._flags_shared = False
+        else:
+            self._unshare_flags()
+            for name in columns:
+                column = getattr(self, name)
+                column[first:size - count] = column[last + 1:size]
+            self._name_offsets[first + 1:size - count + 1] = self._name_offsets[last + 2:size + 1] - removed_bytes
+            self._name_bytes[byte_first:byte_end - removed_bytes] = self._name_bytes[byte_last:byte_end]
+        self._size = size - count
+        self.version += 1
+
+    def compact(self, rows):
+        """一次线性遍历，剔除给定的行。"""
+        keep = np.ones(self._size, dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        self._forget_ids(self.ids[~keep], self.serials[~keep])
+        self._state_counts -= np.bincount(self.states[~keep], minlength=len(self._state_counts))
+
+        lengths = np.diff(self.name_offsets)
+        new_bytes = self.name_bytes[np.repeat(keep, lengths)]
+        new_offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+        np.cumsum(lengths[keep], out=new_offsets[1:])
+
+        self._ids = self.ids[keep]
+        self._serials = self.serials[keep]
+        self._states = self.states[keep]
+        self._colors = self.colors[keep]
+        self._label_types = self.label_types[keep]
+        self._widths = self.widths[keep]
+        self._heights = self.heights[keep]
+        self._dirs = self.dirs[keep]
+        self._name_bytes = new_bytes
+        self._name_offsets = new_offsets
+        self._size = len(self._ids)
+        self._flags_shared = False
+        self._structure_shared = False
+        self.version += 1
+
+    # --- id 索引 ---
+    def _forget_ids(self, ids: np.ndarray, serials: np.ndarray):
+        """从 id 索引中移除即将被删除的行；只移除确实指向该行的条目，避免误删重复 id 的其他行。"""
+        if self._id_to_serial is None:
+            return
+        for item_id, serial in zip(ids.tolist(), serials.tolist()):
+            if self._id_to_serial.get(item_id) == serial:
+                del self._id_to_serial[item_id]
+
+    def find_row_by_id(self, item_id: str) -> int:
+        try:
+            serial = self._id_index().get(int(item_id, 16))
+        except (TypeError, ValueError):
+            return -1
+        if serial is None:
+            return -1
+        serials = self.serials
+        # 快速路径：没有产生过空洞时，序号与行号只差一个固定偏移
+        if int(serials[-1]) - int(serials[0]) == self._size - 1:
+            return serial - int(serials[0])
+        row = int(np.searchsorted(serials, serial))
+        return row if row < self._size and serials[row] == serial else -1
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：FileQuery.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/12 15:03
+'''
+
+# data/FileQuery.py
+
+import re
+import fnmatch
+from functools import lru_cache
+
+import numpy as np
+
+# 文件列表搜索栏的查询语言。各条件以空格分隔，全部满足才算命中：
+# - 普通文本                 文件名包含该文本（大小写不敏感）
+# - name:文本                同上
+# - name:*.jpg / name:cam0?  含 * ? [ 时按通配符匹配整个文件名
+# - name:~正则 / ~正则        文件名匹配正则（re.search，大小写不敏感）
+# - state:训练集              状态等于给定值
+# - 在条件前加 - 表示取反，例如 -state:未标注
+# - 值中含空格时用双引号括起来，例如 name:~"cam0[1-3]_.*"
+
+# 编译结果缓存的条目数
+_PLAN_CACHE_SIZE = 256
+
+_TOKEN = re.compile(r'(-)?(?:(name|state):)?(~)?("(?:[^"\\]|\\.)*"|\S+)', re.IGNORECASE)
+
+
+class QuerySyntaxError(ValueError):
+    """查询语句无法解析（例如正则表达式写错）。"""
+
+
+class _StateClause:
+    """state:值 —— 直接比较状态编码列，完全向量化。"""
+    cost = 0
+    field = "state"
+
+    def __init__(self, state: str, negated: bool):
+        self.state = state
+        self.negated = negated
+
+    def match(self, reader, rows: np.ndarray) -> np.ndarray:
+        try:
+            code = reader.state_names.index(self.state)
+        except ValueError:
+            return np.zeros(len(rows), dtype=bool)
+        return reader.states[rows] == code
+
+
+def _joined_names(reader, rows: np.ndarray) -> tuple[str, np.ndarray]:
+    """
+    把给定行的文件名以换行符拼接为一个字符串，返回 (文本, 各行起始位置)，起始位置末尾带一个哨兵。
+    只解码一次，之后的子串 / 正则查找都在整段文本上由 C 代码完成。
+    """
+    offsets = reader.name_offsets
+    rows = np.asarray(rows, dtype=np.int64)
+    lengths = offsets[rows + 1] - offsets[rows]
+    if len(rows) * 8 < len(offsets):
+        # 候选行很少：逐行切片拼接
+        buffer = reader.name_bytes
+        raw = b"\n".join([buffer[a:b].tobytes() for a, b in zip(offsets[rows].tolist(), offsets[rows + 1].tolist())])
+    else:
+        # 候选行较多：用掩码一次取出所选行的字节，再在行边界处整体插入换行符
+        selected = np.zeros(len(offsets) - 1, dtype=bool)
+        selected[rows] = True
+        data = reader.name_bytes[np.repeat(selected, np.diff(offsets))]
+        raw = np.insert(data, np.cumsum(lengths)[:-1], 10).tobytes()
+    text = raw.decode("utf-8")
+    if not text.isascii():
+        # 含非 ASCII 字符时字节长度与字符长度不同，按字符重新计算
+        lengths = np.fromiter((len(name) for name in text.split("\n")), dtype=np.int64, count=len(rows))
+    row_starts = np.concatenate(([0], np.cumsum(lengths + 1)))
+    return text, row_starts
+
+
+class _NameClause:
+    """
+    文件名条件：子串 / 通配符 / 正则。
+    所有候选名称拼接为一段文本后整体查找，每找到一处命中就跳到下一行的开头继续，
+    Python 层的循环次数只与命中行数成正比。
+    """
+    field = "name"
+
+    def __init__(self, kind: str, text: str, negated: bool):
+        self.kind = kind
+        self.text = text
+        self.negated = negated
+        # 任何命中名称都必然包含的子串，可交给三元组索引预先筛选候选行
+        self.literal = text
+        if kind == "contains":
+            self.cost = 1
+            self._needle = text.lower()
+            self.engine_clause = ("name_contains", text, negated)
+            return
+        self.cost = 2 if kind == "glob" else 3
+        if kind == "glob":
+            self.literal = max(re.split(r"[*?]|\[[^\]]*\]", text), key=len) or None
+            # fnmatch 生成 (?s:...)\Z，整段查找时改为不跨行的 ^...$ 形式
+            translated = fnmatch.translate(text)
+            pattern = "^(?:" + translated[len("(?s:"):-len(")\\Z")] + ")$"
+            # 多进程引擎逐个名称 re.search，加 \A 即为整名匹配
+            self.engine_clause = ("name_regex", "\\A" + translated, negated)
+        else:
+            self.literal = None
+            pattern = text
+            self.engine_clause = ("name_regex", text, negated)
+        try:
+            self._pattern = re.compile(pattern, re.IGNORECASE)
+            self._scan_pattern = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+        except re.error as e:
+            raise QuerySyntaxError(f"正则表达式无效: {text} ({e})") from e
+        # \A / \Z 只能匹配整段文本的首尾，这类表达式只能逐个名称求值
+        self._per_name = "\\A" in text or "\\Z" in text
+
+    def implies(self, other: "_NameClause") -> bool:
+        """满足本条件的名称是否必然满足 other（如“包含 img_1”蕴含“包含 img”）。"""
+        if self.kind == other.kind == "contains" and self.negated == other.negated:
+            if self.negated:
+                return self._needle in other._needle
+            return other._needle in self._needle
+        return (self.kind, self.text, self.negated) == (other.kind, other.text, other.negated)
+
+    def match(self, reader, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(rows), dtype=bool)
+        if not len(rows):
+            return mask
+        if self.kind != "contains" and self._per_name:
+            search = self._pattern.search
+            mask[:] = [bool(search(name)) for name in reader.names_at(rows)]
+            return mask
+
+        text, row_starts = _joined_names(reader, rows)
+        if self.kind == "contains":
+            lowered = text.lower()
+            if len(lowered) != len(text):
+                # 极少数字符转小写后长度会变化，此时逐个名称比较
+                needle = self._needle
+                mask[:] = [needle in name.lower() for name in reader.names_at(rows)]
+                return mask
+            # 查询串不含换行符，命中不可能跨行，无需复核
+            find, verify = (lambda pos: lowered.find(self._needle, pos)), None
+        else:
+            scan = self._scan_pattern.search
+            find = lambda pos: (found.start() if (found := scan(text, pos)) else -1)
+            # 整段查找时 [^x] 之类的表达式可能跨越换行符，命中行需用单个名称复核
+            verify = self._pattern.search
+
+        pos = find(0)
+        while pos >= 0:
+            row = int(row_starts.searchsorted(pos, side="right")) - 1
+            next_start = int(row_starts[row + 1])
+            if verify is None or verify(text[int(row_starts[row]):next_start - 1]):
+                mask[row] = True
+            if next_start >= len(text):
+                break
+            pos = find(next_start)
+        return mask
+
+
+class QueryPlan:
+    """
+    编译后的查询计划，不可变，可在多个线程间共享。
+    - clauses: 按代价从低到高排列的条件，先用便宜的条件缩小候选行，再对剩余行求值昂贵的条件。
+    - fields: 计划依赖的字段，代理模型据此判断数据变化后是否需要重新求值。
+    - simple_text: 查询只是单个“文件名包含”时为该文本，可以直接走三元组索引 / 多进程等快速路径。
+    - index_text: 肯定条件中必然出现的最长子串，可先用三元组索引取候选行。
+    - engine_clauses / column_plan: 文件名条件转换成的多进程引擎条件，以及由其余条件组成的计划；
+      多进程执行时先由引擎求值文件名条件，再在本进程内对命中行求值其余条件。
+    - refines: 判断本计划的结果是否必然是另一计划结果的子集，用于只复查上一次的结果。
+    """
+    # 结果按行号升序显示，可由代理模型增量维护
+    ranked = False
+
+    def __init__(self, text: str, clauses: list):
+        self.text = text
+        self.clauses = tuple(sorted(clauses, key=lambda clause: clause.cost))
+        self.fields = frozenset(clause.field for clause in self.clauses)
+        literals = [clause.literal for clause in self.clauses
+                    if isinstance(clause, _NameClause) and clause.literal and not clause.negated]
+        self.index_text = max(literals, key=len) if literals else None
+        only = self.clauses[0] if len(self.clauses) == 1 else None
+        self.simple_text = only.text if isinstance(only, _NameClause) and only.kind == "contains" and not only.negated else None
+        self.engine_clauses = tuple(clause.engine_clause for clause in self.clauses if isinstance(clause, _NameClause))
+        column_clauses = [clause for clause in self.clauses if not isinstance(clause, _NameClause)]
+        self.column_plan = QueryPlan(text, column_clauses) if len(column_clauses) < len(self.clauses) else self
+
+    def refines(self, previous: "QueryPlan") -> bool:
+        """
+        本计划的命中行是否必然包含于 previous 的命中行之中：previous 的每个条件都被本计划的某个条件蕴含。
+        只考虑 previous 全部是文件名条件的情形——文件名不会改变，而状态可能在两次查询之间被修改。
+        """
+        if not previous.fields <= {"name"}:
+            return False
+        return all(any(isinstance(clause, _NameClause) and clause.implies(earlier) for clause in self.clauses)
+                   for earlier in previous.clauses)
+
+    def filter(self, reader, rows: np.ndarray = None, should_stop=None) -> np.ndarray | None:
+        """返回给定行（默认全部行）中满足全部条件的行号，升序；被中止时返回 None。"""
+        if rows is None:
+            rows = np.arange(len(reader.serials), dtype=np.int64)
+        for clause in self.clauses:
+            if not len(rows):
+                break
+            if should_stop is not None and should_stop():
+                return None
+            rows = rows[clause.match(reader, rows) != clause.negated]
+        return rows
+
+    def evaluate(self, reader, start: int, stop: int) -> np.ndarray:
+        """对 [start, stop) 行求值，返回布尔数组（代理模型增量维护结果时使用）。"""
+        mask = np.zeros(stop - start, dtype=bool)
+        mask[self.filter(reader, np.arange(start, stop, dtype=np.int64)) - start] = True
+        return mask
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+@lru_cache(maxsize=_PLAN_CACHE_SIZE)
+def compile_query(text: str) -> QueryPlan:
+    """把查询语句编译为 QueryPlan，相同的语句直接返回缓存的计划。语法错误时抛出 QuerySyntaxError。"""
+    clauses = []
+    for match in _TOKEN.finditer(text):
+        negated, field, is_regex, value = match.groups()
+        negated = negated is not None
+        field = (field or "name").lower()
+        value = _unquote(value)
+        if not value:
+            raise QuerySyntaxError(f"条件缺少取值: {match.group(0)}")
+        if field == "state":
+            clauses.append(_StateClause(value, negated))
+        elif is_regex:
+            clauses.append(_NameClause("regex", value, negated))
+        elif field == "name" and match.group(2) and any(ch in value for ch in "*?["):
+            clauses.append(_NameClause("glob", value, negated))
+        else:
+            clauses.append(_NameClause("contains", value, negated))
+    return QueryPlan(text, clauses)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：FuzzySearch.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/14 10:47
+'''
+
+# data/FuzzySearch.py
+
+import heapq
+
+import numpy as np
+
+# 默认只返回得分最高的前 k 个结果
+FUZZY_TOP_K = 200
+
+# 每批打分的行数，限制临时矩阵的内存
+_SCORE_BLOCK = 65536
+
+# 位运算打分的文件名最大字节数（每行的命中位置用一个 64 位掩码表示），更长的名称（如带目录的路径）逐行打分
+_MAX_WIDTH = 64
+
+_ONE = np.uint64(1)
+_ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# 单词边界：这些字符之后的位置命中时加分
+_BOUNDARY = np.zeros(256, dtype=bool)
+_BOUNDARY[list(b"_-. /\\")] = True
+
+# ASCII 大写字母转小写的查找表
+_LOWER = np.arange(256, dtype=np.uint8)
+_LOWER[65:91] += 32
+
+# 打分权重
+_SCORE_MATCH = 1.0
+_SCORE_CONSECUTIVE = 2.0
+_SCORE_BOUNDARY = 1.5
+_PENALTY_GAP = 0.1
+_PENALTY_LEADING = 0.05
+_PENALTY_LENGTH = 0.01
+
+
+class FuzzyQuery:
+    """
+    模糊搜索：查询串的各字符按顺序出现在文件名中（子序列）即算命中，按匹配质量打分，只保留得分最高的 k 个。
+    - 打分：每个命中字符得分，与前一个命中字符相邻、位于单词边界时额外加分；
+      命中跨度中的空隙、首个命中位置靠后以及名称过长都会扣分。
+    - 计算：文件名按块摊开为 (行, 字节) 矩阵，每个查询字符在每行中的出现位置压缩为 64 位掩码，
+      正向 / 反向查找命中位置都是整块上的位运算；超过 64 字节的名称逐行用同样的规则打分。
+      各块先按第 k 高的得分预选候选（同分保留行号小的），再进入大小为 k 的最小堆。
+    比较以字节为单位，只对 ASCII 字符做大小写折叠。
+    """
+    # 模糊搜索结果按得分排序显示，不能按行号增量维护
+    ranked = True
+
+    def __init__(self, text: str, k: int = FUZZY_TOP_K):
+        self.text = text
+        self.k = k
+        self._pattern = np.frombuffer(text.lower().encode("utf-8"), dtype=np.uint8)
+
+    def top_k(self, reader, should_stop=None) -> np.ndarray | None:
+        """返回得分最高的至多 k 行的行号，按得分从高到低（同分按行号升序）；被中止时返回 None。"""
+        row_count = len(reader.serials)
+        heap = []
+        if not len(self._pattern) or not self.k:
+            return np.empty(0, dtype=np.int64)
+        for block_start in range(0, row_count, _SCORE_BLOCK):
+            if should_stop is not None and should_stop():
+                return None
+            block_stop = min(block_start + _SCORE_BLOCK, row_count)
+            scores = self._score_block(reader, block_start, block_stop)
+            candidates = np.flatnonzero(scores > -np.inf)
+            if len(candidates) > self.k:
+                # 高于第 k 高得分的行全部保留，与之同分的行按行号补足 k 个，保证同分时结果确定
+                candidate_scores = scores[candidates]
+                threshold = np.partition(candidate_scores, -self.k)[-self.k]
+                above = candidates[candidate_scores > threshold]
+                tied = candidates[candidate_scores == threshold][:self.k - len(above)]
+                candidates = np.concatenate((above, tied))
+            for local, score in zip(candidates.tolist(), scores[candidates].tolist()):
+                # 堆元素为 (得分, -行号)：同分时行号小的更“大”，最终排在前面
+                entry = (score, -(block_start + local))
+                if len(heap) < self.k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+        heap.sort(reverse=True)
+        return np.fromiter((-row for _, row in heap), dtype=np.int64, count=len(heap))
+
+    def _score_block(self, reader, start: int, stop: int) -> np.ndarray:
+        """对 [start, stop) 行打分，未命中的行得分为 -inf。"""
+        offsets = reader.name_offsets
+        lengths = offsets[start + 1:stop + 1] - offsets[start:stop]
+        scores = self._score_short(reader, start, stop, lengths)
+        for local in np.flatnonzero(lengths > _MAX_WIDTH).tolist():
+            row = start + local
+            scores[local] = self._score_name(_LOWER[reader.name_bytes[offsets[row]:offsets[row + 1]]].tobytes())
+        return scores
+
+    def _score_name(self, name: bytes) -> float:
+        """逐行打分（name 已转小写），规则与 _score_short 完全相同，用于超过 64 字节的名称。"""
+        pattern = self._pattern.tobytes()
+        position = -1
+        for byte in pattern:
+            position = name.find(byte, position + 1)
+            if position < 0:
+                return -np.inf
+        positions = [position]
+        for byte in pattern[-2::-1]:
+            positions.insert(0, name.rfind(byte, 0, positions[0]))
+
+        total = _SCORE_MATCH * len(pattern)
+        for j, position in enumerate(positions):
+            if j:
+                total += _SCORE_CONSECUTIVE * (position == positions[j - 1] + 1)
+            total += _SCORE_BOUNDARY * (position == 0 or bool(_BOUNDARY[name[position - 1]]))
+        first, last = positions[0], positions[-1]
+        gaps = last - first + 1 - len(pattern)
+        return total - (_PENALTY_GAP * gaps + _PENALTY_LEADING * first + _PENALTY_LENGTH * (len(name) - len(pattern)))
+
+    def _score_short(self, reader, start: int, stop: int, lengths: np.ndarray) -> np.ndarray:
+        """用位运算对 [start, stop) 中不超过 64 字节的名称打分，其余行得分为 -inf。"""
+        offsets = reader.name_offsets
+        name_bytes = reader.name_bytes
+        starts = offsets[start:stop]
+        scores = np.full(stop - start, -np.inf, dtype=np.float64)
+        short = lengths <= _MAX_WIDTH
+        width = int(lengths[short].max()) if short.any() else 0
+        pattern = self._pattern
+        if width < len(pattern):
+            return scores
+
+        # 本块名称的字节（ASCII 大写转小写）以及每个字节所属的行
+        base = int(starts[0])
+        block_bytes = _LOWER[name_bytes[base:int(offsets[stop])]]
+        relative_starts = starts - base
+        byte_rows = np.repeat(np.arange(stop - start, dtype=np.int32), lengths)
+
+        def position_masks(hit: np.ndarray) -> np.ndarray:
+            """把按字节的命中标记压缩为每行一个 64 位掩码，第 i 位表示行内第 i 个字节命中。"""
+            where = np.flatnonzero(hit)
+            hit_rows = byte_rows[where]
+            bits = where - relative_starts[hit_rows]
+            keep = bits < _MAX_WIDTH
+            hit_rows, values = hit_rows[keep], _ONE << bits[keep].astype(np.uint64)
+            result = np.zeros(stop - start, dtype=np.uint64)
+            if len(hit_rows):
+                # 命中按行有序：每行的各个位在 reduceat 中一次合并
+                firsts = np.flatnonzero(np.concatenate(([True], hit_rows[1:] != hit_rows[:-1])))
+                result[hit_rows[firsts]] = np.bitwise_or.reduceat(values, firsts)
+            return result
+
+        # 之后“某位置之后的下一次出现”“某位置之前的上一次出现”都是 O(行数) 的位运算
+        masks = {byte: position_masks(block_bytes == byte) for byte in set(pattern.tolist())}
+        rows = np.flatnonzero(short)
+
+        # 正向：每个字符取上一个命中位置之后的第一次出现，找不到的行随即剔除
+        after = np.full(len(rows), _ALL, dtype=np.uint64)
+        for byte in pattern.tolist():
+            candidates = masks[byte][rows] & after
+            alive = candidates != 0
+            if not alive.all():
+                rows, candidates = rows[alive], candidates[alive]
+                if not len(rows):
+                    return scores
+            lowest = candidates & (~candidates + _ONE)
+            # lowest 只有一位为 1：之后的位全部置 1，即得到“该位置之后”的掩码
+            after = ~((lowest << _ONE) - _ONE)
+            end = lowest
+
+        # 反向：从最后一个命中位置往回，为每个字符取尽量靠后的出现，得到以该位置结尾的最紧凑匹配
+        matched = [end]
+        for byte in pattern[-2::-1].tolist():
+            candidates = masks[byte][rows] & (matched[0] - _ONE)
+            matched.insert(0, _highest_bit(candidates))
+
+        positions = [_bit_index(bit) for bit in matched]
+        # 命中位置前一个字节是边界字符（或命中在开头）时加分
+        boundary_before = (position_masks(_BOUNDARY[block_bytes])[rows] << _ONE) | _ONE
+        total = np.full(len(rows), _SCORE_MATCH * len(pattern))
+        for j, bit in enumerate(matched):
+            if j:
+                total += _SCORE_CONSECUTIVE * (bit == (matched[j - 1] << _ONE))
+            total += _SCORE_BOUNDARY * ((boundary_before & bit) != 0)
+        first, last = positions[0], positions[-1]
+        gaps = last - first + 1 - len(pattern)
+        total -= _PENALTY_GAP * gaps + _PENALTY_LEADING * first + _PENALTY_LENGTH * (lengths[rows] - len(pattern))
+        scores[rows] = total
+        return scores
+
+
+def _highest_bit(values: np.ndarray) -> np.ndarray:
+    """保留每个数的最高位。"""
+    for shift in (1, 2, 4, 8, 16, 32):
+        values = values | (values >> np.uint64(shift))
+    return values ^ (values >> _ONE)
+
+
+def _bit_index(bits: np.ndarray) -> np.ndarray:
+    """只有一位为 1 的数 -> 该位的下标（2 的幂可以精确转换为浮点数）。"""
+    return np.log2(bits.astype(np.float64)).astype(np.int64)
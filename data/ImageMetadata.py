@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：ImageMetadata.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/25 09:20
+'''
+
+# data/ImageMetadata.py
+
+import os
+import sqlite3
+
+from PIL import Image
+from PySide6.QtCore import QStandardPaths
+
+# EXIF 中“方向”标签的编号；取值 5 ~ 8 表示图片需要旋转 90°，显示时宽高互换
+_EXIF_ORIENTATION = 0x0112
+_TRANSPOSED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+
+# 每条 SQL 语句中的参数个数上限（SQLite 默认上限为 999 或 32766，取保守值）
+_SQL_BATCH = 900
+
+_CACHE_FILE_NAME = "image_metadata.sqlite"
+
+
+class ImageMetadata:
+    """图片文件头中的信息：像素宽高、格式、文件大小（字节）、EXIF 方向（1 为正常）。"""
+    __slots__ = ("width", "height", "format", "file_size", "orientation")
+
+    def __init__(self, width: int, height: int, format: str, file_size: int, orientation: int = 1):
+        self.width = width
+        self.height = height
+        self.format = format
+        self.file_size = file_size
+        self.orientation = orientation
+
+    @property
+    def resolution(self) -> str:
+        """按 EXIF 方向摆正后的分辨率，例如 "1920x1080"。"""
+        if self.orientation in _TRANSPOSED_ORIENTATIONS:
+            return f"{self.height}x{self.width}"
+        return f"{self.width}x{self.height}"
+
+    @property
+    def display_size(self) -> tuple[int, int]:
+        if self.orientation in _TRANSPOSED_ORIENTATIONS:
+            return self.height, self.width
+        return self.width, self.height
+
+
+def read_image_metadata(path: str, stat: os.stat_result = None) -> ImageMetadata:
+    """
+    只读取文件头得到图片信息：Image.open 是惰性的，只解析到尺寸和格式为止，getexif 也只读取 EXIF 段，都不解码像素。
+    文件不存在或不是图片时抛出 OSError。
+    """
+    stat = stat or os.stat(path)
+    with Image.open(path) as image:
+        try:
+            orientation = int(image.getexif().get(_EXIF_ORIENTATION, 1))
+        except (ValueError, SyntaxError):
+            # EXIF 段损坏时按正常方向处理
+            orientation = 1
+        return ImageMetadata(image.width, image.height, image.format or "", stat.st_size, orientation)
+
+
+def default_cache_path() -> str:
+    """缓存文件的默认位置；目录在打开缓存时（后台线程中）才创建。"""
+    directory = QStandardPaths.writableLocation(QStandardPaths.CacheLocation) or os.path.expanduser("~/.cache")
+    return os.path.join(directory, _CACHE_FILE_NAME)
+
+
+class MetadataCache:
+    """
+    图片信息的磁盘缓存（SQLite），以 (路径, 修改时间) 为键：文件被修改后修改时间变化，旧记录自动失效。
+    每个线程应使用各自的 MetadataCache 实例；数据库使用 WAL 模式，读写可以并发。
+    数据库无法打开或读写（被锁定、已损坏、目录只读等）时抛出 sqlite3.Error 或 OSError，由调用方退回不使用缓存。
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or default_cache_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, "
+                "width INTEGER, height INTEGER, format TEXT, file_size INTEGER, orientation INTEGER)")
+        except sqlite3.Error:
+            self._connection.close()
+            raise
+
+    def lookup(self, paths: list[str], mtimes: list[int]) -> dict[str, ImageMetadata]:
+        """批量查询，返回修改时间仍然一致的记录：{路径: ImageMetadata}。"""
+        expected = dict(zip(paths, mtimes))
+        found = {}
+        for start in range(0, len(paths), _SQL_BATCH):
+            batch = paths[start:start + _SQL_BATCH]
+            rows = self._connection.execute(
+                f"SELECT path, mtime_ns, width, height, format, file_size, orientation FROM metadata "
+                f"WHERE path IN ({','.join('?' * len(batch))})", batch)
+            for path, mtime_ns, width, height, image_format, file_size, orientation in rows:
+                if expected.get(path) == mtime_ns:
+                    found[path] = ImageMetadata(width, height, image_format, file_size, orientation)
+        return found
+
+    def store(self, entries: list[tuple[str, int, ImageMetadata]]):
+        """写入 (路径, 修改时间, ImageMetadata) 列表，一个事务提交。"""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, mtime_ns, meta.width, meta.height, meta.format, meta.file_size, meta.orientation)
+                 for path, mtime_ns, meta in entries])
+
+    def get(self, path: str) -> ImageMetadata | None:
+        """单个文件：命中缓存直接返回，否则读取文件头并写入缓存；不是可读取的图片时返回 None。"""
+        try:
+            stat = os.stat(path)
+            cached = self.lookup([path], [stat.st_mtime_ns]).get(path)
+            if cached is not None:
+                return cached
+            meta = read_image_metadata(path, stat)
+        except OSError:
+            return None
+        self.store([(path, stat.st_mtime_ns, meta)])
+        return meta
+
+    def close(self):
+        self._connection.close()
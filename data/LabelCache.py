@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：LabelCache.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/26 09:15
+'''
+
+# data/LabelCache.py
+
+import threading
+from collections import OrderedDict
+
+from data.TableDataStruct import LabelInfoDataStruct
+
+# 缓存的文件数上限
+LABEL_CACHE_SIZE = 512
+
+# 失效记录超过缓存容量的该倍数时整体清理
+_INVALIDATION_HISTORY = 16
+
+
+class LabelCache:
+    """
+    已解析标签列表的 LRU 缓存，以文件 id 为键，主线程与预取线程共用（加锁）。
+    失效与加载的竞争：加载前取 token()，写入时带上该值；加载期间该文件被置为失效（删除、重新标注）的，
+    写入被拒绝，不会把旧内容放回缓存。
+    """
+
+    def __init__(self, capacity: int = LABEL_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 失效计数，以及 文件 id -> 最近一次失效时的计数
+        self._counter = 0
+        self._invalidated = {}
+        # 失效记录被清理时的计数：早于它的 token 一律视为过期
+        self._floor = 0
+
+    def __contains__(self, file_id: str) -> bool:
+        with self._lock:
+            return file_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, file_id: str) -> list[LabelInfoDataStruct] | None:
+        with self._lock:
+            labels = self._entries.get(file_id)
+            if labels is not None:
+                self._entries.move_to_end(file_id)
+            return labels
+
+    def token(self) -> int:
+        with self._lock:
+            return self._counter
+
+    def put(self, file_id: str, labels: list[LabelInfoDataStruct], token: int = None) -> bool:
+        """写入缓存，超出容量时淘汰最久未使用的文件；token 已过期时不写入并返回 False。"""
+        with self._lock:
+            if token is not None and (token < self._floor or self._invalidated.get(file_id, -1) > token):
+                return False
+            self._entries[file_id] = labels
+            self._entries.move_to_end(file_id)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, file_ids: list[str]):
+        with self._lock:
+            self._counter += 1
+            if len(self._invalidated) + len(file_ids) > self.capacity * _INVALIDATION_HISTORY:
+                self._invalidated.clear()
+                self._floor = self._counter
+            for file_id in file_ids:
+                self._entries.pop(file_id, None)
+                self._invalidated[file_id] = self._counter
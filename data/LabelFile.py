@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：LabelFile.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/21 09:30
+'''
+
+# data/LabelFile.py
+
+import os
+import json
+import math
+
+from data.TableDataStruct import LabelInfoDataStruct
+
+# 标注文件与图片同目录、同主文件名，格式与 labelme 的 JSON 兼容：
+# {"shapes": [{"label": 类别, "points": [[x, y], ...], "shape_type": "polygon" | "rectangle", ...}],
+#  "imageWidth": 宽, "imageHeight": 高, ...}
+LABEL_FILE_EXTENSION = ".json"
+
+
+def label_file_path(image_path: str) -> str:
+    return os.path.splitext(image_path)[0] + LABEL_FILE_EXTENSION
+
+
+def read_labels(image_path: str) -> tuple[list[LabelInfoDataStruct], tuple[int, int] | None]:
+    """
+    读取图片对应的标注文件，返回 (标签列表, (宽, 高))；标注文件中没有图片尺寸时尺寸为 None。
+    没有标注文件时返回空列表；标注文件损坏（不是 JSON，或结构、类型不符）时抛出 ValueError。
+    """
+    try:
+        with open(label_file_path(image_path), "rb") as f:
+            content = json.load(f)
+    except FileNotFoundError:
+        return [], None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"标注文件格式错误：{e}") from e
+
+    if not isinstance(content, dict):
+        raise ValueError("标注文件格式错误：顶层不是对象")
+    shapes = content.get("shapes", [])
+    if not isinstance(shapes, list):
+        raise ValueError("标注文件格式错误：shapes 不是列表")
+    labels = []
+    for i, shape in enumerate(shapes):
+        if not isinstance(shape, dict):
+            raise ValueError(f"标注文件格式错误：第 {i + 1} 个标注不是对象")
+        points = shape.get("points", [])
+        if not isinstance(points, list) or not all(_is_point(point) for point in points):
+            raise ValueError(f"标注文件格式错误：第 {i + 1} 个标注的 points 不是 [[x, y], ...]")
+        label_type = str(shape.get("label", ""))
+        labels.append(LabelInfoDataStruct(str(shape.get("description") or f"{label_type}_{i + 1}"), label_type,
+                                          points=[(float(x), float(y)) for x, y in points]))
+    width, height = content.get("imageWidth"), content.get("imageHeight")
+    if not all(value is None or _is_number(value) for value in (width, height)):
+        raise ValueError("标注文件格式错误：imageWidth / imageHeight 不是数字")
+    return labels, (int(width), int(height)) if width and height else None
+
+
+def _is_number(value) -> bool:
+    # bool 是 int 的子类，但不是合法的坐标或尺寸
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and (isinstance(value, int) or math.isfinite(value)))
+
+
+def _is_point(point) -> bool:
+    return isinstance(point, list) and len(point) == 2 and all(_is_number(value) for value in point)
+
+
+def write_labels(image_path: str, labels: list[LabelInfoDataStruct], image_size: tuple[int, int] | None):
+    """把标签写入图片对应的标注文件（覆盖已有内容）。先写临时文件再替换，写到一半不会留下损坏的标注文件。"""
+    width, height = image_size if image_size is not None else (None, None)
+    content = {
+        "version": "5.0.1",
+        "flags": {},
+        "shapes": [{"label": label.label_type, "description": label.label_name,
+                    "points": [[x, y] for x, y in label.points],
+                    "shape_type": "rectangle" if len(label.points) == 2 else "polygon",
+                    "group_id": None, "flags": {}} for label in labels],
+        "imagePath": os.path.basename(image_path),
+        "imageData": None,
+        "imageHeight": height,
+        "imageWidth": width,
+    }
+    path = label_file_path(image_path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(content, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def primary_label_type(labels: list[LabelInfoDataStruct]) -> str:
+    """标签中数量最多的类别（数量相同时取先出现的），没有标签时为空字符串。"""
+    counts = {}
+    for label in labels:
+        counts[label.label_type] = counts.get(label.label_type, 0) + 1
+    return max(counts, key=counts.get) if counts else ""
+
+
+def annotation_category(labels: list[LabelInfoDataStruct]) -> str:
+    """由标注形状推断项目类别：有多边形为实例分割，只有矩形框为目标检测。"""
+    if any(len(label.points) >= 3 for label in labels):
+        return "实例分割"
+    return "目标检测" if labels else "未标注"
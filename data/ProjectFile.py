@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：ProjectFile.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/20 10:05
+'''
+
+# data/ProjectFile.py
+
+import os
+import json
+import mmap
+import struct
+import zlib
+
+import numpy as np
+from PySide6.QtGui import QColor
+
+from data.FileColumnStore import FileColumnStore
+
+# 工程文件（列式二进制）布局：
+# - [0, 4096) 与 [4096, 8192) 为两个文件头槽位，序号为 n 的文件头写在第 n % 2 个槽位，读取时取校验通过且序号最大的一个；
+#   文件头：魔数、格式版本、序号、行数、段数，以及每段的 (名称, 偏移, 长度)，末尾为 CRC32。
+# - 之后是按页对齐的各段：ids(uint64)、states(uint8)、colors(uint8)、offsets(int64, 行数 + 1)、
+#   names(文件名 UTF-8 字节，即字符串表)、statetab(状态表 JSON)、palette(颜色 RGBA, uint32)、
+#   ltypes(标签类别编码, uint16)、ltypetab(标签类别表 JSON)、widths / heights(图片宽高, uint32)、
+#   dirs(目录编码, uint32)、dirtab(目录表 JSON)；
+#   较早的文件没有最后几段，打开时视为没有标注、宽高尚未读取、没有目录信息。
+# 保存时内容未变的段原样保留，变化的段追加写到文件末尾，最后写入另一个文件头槽位切换到新版本：
+# 正在被内存映射读取的区域不会被覆盖，写到一半崩溃时旧文件头仍然有效。
+
+PROJECT_EXTENSION = ".tvproj"
+
+_MAGIC = b"TVPROJ\x00\x01"
+_FORMAT_VERSION = 1
+_PAGE = 4096
+_HEADER_SLOTS = 2
+_DATA_START = _PAGE * _HEADER_SLOTS
+_HEADER = struct.Struct("<8sIQQI")
+_SECTION = struct.Struct("<8sQQ")
+_CRC = struct.Struct("<I")
+
+# 废弃区域超过有效数据的该倍数时，保存改为整体重写（写入临时文件后替换）
+_GARBAGE_RATIO = 1.0
+
+
+class ProjectFormatError(ValueError):
+    """文件不是有效的工程文件（魔数 / 版本 / 校验不符）。"""
+
+
+class SaveStats:
+    """一次保存的统计：写入的段名、写入字节数、是否整体重写。"""
+
+    def __init__(self, written: list[str], bytes_written: int, rewritten: bool):
+        self.written = written
+        self.bytes_written = bytes_written
+        self.rewritten = rewritten
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _PAGE) * _PAGE
+
+
+def _read_header(buffer) -> tuple[int, int, dict]:
+    """返回有效文件头中 (序号, 行数, {段名: (偏移, 长度)})；没有有效文件头时抛出 ProjectFormatError。"""
+    best = None
+    for slot in range(_HEADER_SLOTS):
+        base = slot * _PAGE
+        if len(buffer) < base + _PAGE:
+            break
+        magic, version, sequence, row_count, section_count = _HEADER.unpack_from(buffer, base)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            continue
+        end = base + _HEADER.size + section_count * _SECTION.size
+        if end + _CRC.size > base + _PAGE:
+            continue
+        (crc,) = _CRC.unpack_from(buffer, end)
+        if crc != zlib.crc32(bytes(buffer[base:end])):
+            continue
+        if best is None or sequence > best[0]:
+            sections = {}
+            for i in range(section_count):
+                name, offset, length = _SECTION.unpack_from(buffer, base + _HEADER.size + i * _SECTION.size)
+                sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+            best = (sequence, row_count, sections)
+    if best is None:
+        raise ProjectFormatError("不是有效的工程文件")
+    return best
+
+
+def _pack_header(sequence: int, row_count: int, sections: dict) -> bytes:
+    header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, sequence, row_count, len(sections))
+    header += b"".join(_SECTION.pack(name.encode("ascii"), offset, length) for name, (offset, length) in sections.items())
+    return header + _CRC.pack(zlib.crc32(header))
+
+
+def _payloads(store: FileColumnStore) -> dict[str, np.ndarray]:
+    """各段要写入的内容（uint8 视图，尽量不复制）。"""
+    palette = np.array([color.rgba() for color in store.palette], dtype="<u4")
+    columns = {
+        "ids": store.ids.astype("<u8", copy=False),
+        "states": store.states,
+        "colors": store.colors,
+        "offsets": store.name_offsets.astype("<i8", copy=False),
+        "names": store.name_bytes,
+        "statetab": np.frombuffer(json.dumps(store.state_names, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+        "palette": palette,
+        "ltypes": store.label_types.astype("<u2", copy=False),
+        "ltypetab": np.frombuffer(json.dumps(store.label_type_names, ensure_ascii=False).encode("utf-8"),
+                                  dtype=np.uint8),
+        "widths": store.widths.astype("<u4", copy=False),
+        "heights": store.heights.astype("<u4", copy=False),
+        "dirs": store.dirs.astype("<u4", copy=False),
+        "dirtab": np.frombuffer(json.dumps(store.dir_names, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+    }
+    return {name: np.ascontiguousarray(array).view(np.uint8).reshape(-1) for name, array in columns.items()}
+
+
+def load_project(path: str) -> FileColumnStore:
+    """
+    以内存映射方式打开工程文件，返回以映射数组为列的 FileColumnStore。
+    打开只解析文件头，不逐行处理；文件名等到 data() 访问时才解码。
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _DATA_START:
+            raise ProjectFormatError("不是有效的工程文件")
+        # 映射在关闭文件后仍然有效，由引用它的数组保持存活
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _, row_count, sections = _read_header(mapping)
+
+    def column(name: str, dtype, count: int = None) -> np.ndarray:
+        offset, length = sections[name]
+        dtype = np.dtype(dtype)
+        count = length // dtype.itemsize if count is None else count
+        if count * dtype.itemsize > length or offset + length > len(mapping):
+            raise ProjectFormatError(f"工程文件已损坏（{name} 段）")
+        return np.frombuffer(mapping, dtype=dtype, count=count, offset=offset)
+
+    offsets = column("offsets", "<i8", row_count + 1)
+    state_names = json.loads(column("statetab", np.uint8).tobytes().decode("utf-8"))
+    palette = [QColor.fromRgba(int(value)) for value in column("palette", "<u4")]
+    has_label_types = "ltypes" in sections and "ltypetab" in sections
+    has_dirs = "dirs" in sections and "dirtab" in sections
+    return FileColumnStore.from_columns(
+        ids=column("ids", "<u8", row_count),
+        states=column("states", np.uint8, row_count),
+        colors=column("colors", np.uint8, row_count),
+        name_offsets=offsets,
+        name_bytes=column("names", np.uint8, int(offsets[-1]) if row_count else 0),
+        state_names=state_names,
+        palette=palette,
+        label_types=column("ltypes", "<u2", row_count) if has_label_types else None,
+        label_type_names=json.loads(column("ltypetab", np.uint8).tobytes().decode("utf-8")) if has_label_types else None,
+        widths=column("widths", "<u4", row_count) if "widths" in sections else None,
+        heights=column("heights", "<u4", row_count) if "heights" in sections else None,
+        dirs=column("dirs", "<u4", row_count) if has_dirs else None,
+        dir_names=json.loads(column("dirtab", np.uint8).tobytes().decode("utf-8")) if has_dirs else None,
+    )
+
+
+def save_project(store: FileColumnStore, path: str) -> SaveStats:
+    """
+    保存为工程文件。目标是已有的工程文件时增量保存：内容未变的段原样保留，只在文件末尾追加变化的段，
+    再写入另一个文件头槽位；废弃区域过多或目标不是有效的工程文件时整体重写。
+    """
+    payloads = _payloads(store)
+    row_count = len(store)
+    try:
+        return _save_incremental(path, payloads, row_count)
+    except (FileNotFoundError, ProjectFormatError):
+        return _save_full(path, payloads, row_count)
+
+
+def _save_incremental(path: str, payloads: dict, row_count: int) -> SaveStats:
+    with open(path, "r+b") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _DATA_START:
+            raise ProjectFormatError("不是有效的工程文件")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            sequence, _, old_sections = _read_header(mapping)
+            sections, pending = {}, []
+            for name, payload in payloads.items():
+                old = old_sections.get(name)
+                if old is not None and old[1] == len(payload) and (
+                        not len(payload) or np.array_equal(np.frombuffer(mapping, np.uint8, old[1], old[0]), payload)):
+                    sections[name] = old
+                else:
+                    pending.append(name)
+        finally:
+            mapping.close()
+
+        # 各段按页对齐，对齐产生的空隙不算废弃区域
+        live = sum(_align(len(payload)) for payload in payloads.values())
+        appended = sum(_align(len(payloads[name])) for name in pending)
+        if size + appended - _DATA_START - live > _GARBAGE_RATIO * max(live, _PAGE):
+            raise ProjectFormatError("废弃区域过多，需要整体重写")
+
+        # 先写数据段并落盘，再写文件头：任何时刻崩溃，旧文件头指向的数据都完好无损
+        end = _align(size)
+        for name in pending:
+            f.seek(end)
+            f.write(payloads[name])
+            sections[name] = (end, len(payloads[name]))
+            end = _align(end + len(payloads[name]))
+        if not pending:
+            return SaveStats([], 0, False)
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(((sequence + 1) % _HEADER_SLOTS) * _PAGE)
+        f.write(_pack_header(sequence + 1, row_count, sections))
+        f.flush()
+        os.fsync(f.fileno())
+    return SaveStats(pending, sum(len(payloads[name]) for name in pending), False)
+
+
+def _save_full(path: str, payloads: dict, row_count: int) -> SaveStats:
+    """写入临时文件后原子替换；已打开的旧文件仍由其映射持有，不受影响。"""
+    temp_path = path + ".tmp"
+    sections = {}
+    with open(temp_path, "wb") as f:
+        end = _DATA_START
+        for name, payload in payloads.items():
+            f.seek(end)
+            f.write(payload)
+            sections[name] = (end, len(payload))
+            end = _align(end + len(payload))
+        f.truncate(end)
+        f.seek(0)
+        f.write(_pack_header(0, row_count, sections))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return SaveStats(list(payloads), sum(len(payload) for payload in payloads.values()), True)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：SortIndex.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/16 09:52
+'''
+
+# data/SortIndex.py
+
+import numpy as np
+
+# 生成排序键时每批处理的行数，限制临时数组的内存
+_KEY_BLOCK = 65536
+
+# 数字段在排序键中写为 标记字节 + 去掉前导零的数字，标记字节 = 该值 + 有效位数，
+# 位数多的数字标记更大，于是先比位数、再逐位比较即得到数值顺序
+_DIGIT_MARK = 0x30
+_MAX_DIGITS = 0x2F
+
+# 状态排序键 = (状态编码 << 40) | 插入序号，同一状态内按插入顺序排列
+_STATE_SHIFT = 40
+
+# ASCII 大写字母转小写的查找表
+_LOWER = np.arange(256, dtype=np.uint8)
+_LOWER[65:91] += 32
+
+
+def natural_keys(name_bytes: np.ndarray, name_offsets: np.ndarray, start: int = 0, stop: int = None) -> np.ndarray:
+    """
+    为 [start, stop) 行的文件名生成自然排序键（定长字节串数组，宽度为 8 的倍数）。
+    直接比较排序键即得到自然顺序：大小写不敏感，数字段按数值比较（image_2 < image_10），
+    数值相同时位数相同的前导零被忽略（img_0001 与 img_1 的键相同）。
+    全部为字节数组上的向量化运算，不为每个名称回调 Python。
+    """
+    stop = len(name_offsets) - 1 if stop is None else stop
+    blocks = [_block_keys(name_bytes, name_offsets, a, min(a + _KEY_BLOCK, stop))
+              for a in range(start, stop, _KEY_BLOCK)]
+    if not blocks:
+        return np.empty(0, dtype="S8")
+    width = max(block.dtype.itemsize for block in blocks)
+    return np.concatenate([block.astype(f"S{width}") for block in blocks])
+
+
+def _block_keys(name_bytes: np.ndarray, name_offsets: np.ndarray, start: int, stop: int) -> np.ndarray:
+    offsets = name_offsets[start:stop + 1] - name_offsets[start]
+    data = _LOWER[name_bytes[int(name_offsets[start]):int(name_offsets[stop])]]
+    count, total = stop - start, len(data)
+    lengths = np.diff(offsets)
+
+    # 数字段的首尾位置，数字段不能跨越两个名称
+    digit = (data >= 0x30) & (data <= 0x39)
+    boundary = np.zeros(total + 1, dtype=bool)
+    boundary[offsets] = True
+    run_start = digit.copy()
+    run_start[1:] &= ~digit[:-1] | boundary[1:total]
+    run_end = digit.copy()
+    run_end[:-1] &= ~digit[1:] | boundary[1:total]
+    starts, ends = np.flatnonzero(run_start), np.flatnonzero(run_end)
+
+    # 每段的前导零个数（至少保留最后一位），按位推进，循环次数只与最长的前导零个数有关
+    zeros = np.zeros(len(starts), dtype=np.int64)
+    active = np.flatnonzero(data[starts] == 0x30) if len(starts) else starts
+    while len(active):
+        zeros[active] += 1
+        position = starts[active] + zeros[active]
+        active = active[(position < ends[active]) & (data[np.minimum(position, total - 1)] == 0x30)]
+    active = np.flatnonzero(zeros == ends - starts + 1)
+    zeros[active] -= 1
+    marks = (_DIGIT_MARK + np.minimum(ends - starts + 1 - zeros, _MAX_DIGITS)).astype(np.uint8)
+
+    # 在每段开头插入标记字节，再去掉前导零
+    keep = np.ones(total, dtype=bool)
+    keep[np.repeat(starts - np.cumsum(zeros) + zeros, zeros) + np.arange(int(zeros.sum()))] = False
+    out = np.insert(data, starts, marks)[np.insert(keep, starts, True)]
+    run_rows = np.searchsorted(offsets, starts, side="right") - 1
+    lengths = lengths + np.bincount(run_rows, weights=1 - zeros, minlength=count).astype(np.int64)
+
+    # 按行写入定长数组，不足的部分补 0（比任何字符都小，短名称排在前面）
+    width = max(8, -(-int(lengths.max()) // 8) * 8) if count else 8
+    keys = np.zeros(count * width, dtype=np.uint8)
+    out_starts = np.cumsum(lengths) - lengths
+    keys[np.arange(len(out)) + np.repeat(np.arange(0, count * width, width) - out_starts, lengths)] = out
+    return keys.view(f"S{width}")
+
+
+def argsort_keys(keys: np.ndarray) -> np.ndarray:
+    """对定长字节串排序键做稳定的间接排序：按 8 字节一组视为大端整数，用 lexsort 逐组比较。"""
+    if not len(keys):
+        return np.empty(0, dtype=np.int64)
+    words = np.ascontiguousarray(keys).view(">u8").reshape(len(keys), -1).astype(np.uint64)
+    return np.lexsort(words.T[::-1]).astype(np.int64)
+
+
+def state_keys(states: np.ndarray, serials: np.ndarray) -> np.ndarray:
+    return (states.astype(np.int64) << _STATE_SHIFT) | serials
+
+
+class SortedColumn:
+    """
+    一列的排序结果：keys 为升序排列的排序键，order 为对应的行号（即排序置换）。
+    插入 / 删除行时增量维护：新键二分查找插入位置，删除行按掩码剔除后平移行号，不需要重新排序。
+    键相同的行保持行号顺序（新插入的行排在相同键的已有行之后）。
+    """
+
+    def __init__(self, keys: np.ndarray, order: np.ndarray):
+        self.keys = keys
+        self.order = order
+
+    @classmethod
+    def from_row_keys(cls, keys: np.ndarray) -> "SortedColumn":
+        """由按行号排列的排序键建立。"""
+        if keys.dtype.kind == "S":
+            order = argsort_keys(keys)
+        else:
+            order = np.argsort(keys, kind="stable")
+        return cls(keys[order], order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def insert(self, rows: np.ndarray, keys: np.ndarray):
+        """按新键加入给定行（rows 与 keys 一一对应），这些行此前不应在排序结果中。"""
+        if not len(rows):
+            return
+        if keys.dtype.kind == "S" and keys.dtype.itemsize > self.keys.dtype.itemsize:
+            self.keys = self.keys.astype(keys.dtype)
+        elif keys.dtype.kind == "S":
+            keys = keys.astype(self.keys.dtype)
+        local = np.argsort(keys, kind="stable")
+        keys, rows = keys[local], rows[local]
+        positions = np.searchsorted(self.keys, keys, side="right")
+        self.keys = np.insert(self.keys, positions, keys)
+        self.order = np.insert(self.order, positions, rows)
+
+    def append(self, start: int, keys: np.ndarray):
+        """新行追加在末尾：行号为 start, start + 1, ..."""
+        self.insert(np.arange(start, start + len(keys), dtype=np.int64), keys)
+
+    def remove(self, removed: np.ndarray):
+        """删除行：removed 为按旧行号排列的布尔掩码，其余行的行号相应前移。"""
+        keep = ~removed[self.order]
+        shift = np.cumsum(removed)
+        order = self.order[keep]
+        self.order = order - shift[order]
+        self.keys = self.keys[keep]
+
+    def discard(self, rows: np.ndarray, row_count: int):
+        """只从排序结果中移除给定行（行号不变），之后通常会用新键重新 insert（例如修改了状态）。"""
+        mask = np.zeros(row_count, dtype=bool)
+        mask[rows] = True
+        keep = ~mask[self.order]
+        self.order = self.order[keep]
+        self.keys = self.keys[keep]
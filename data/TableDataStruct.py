@@ -10,7 +10,9 @@
 
 # data/TableDataStruct.py
 
+import os
 import uuid
+import secrets
 from PySide6.QtGui import QColor
 
 # --- 通用颜色定义 ---
@@ -21,30 +23,50 @@ saved_color = QColor("#9b59b6")  # 紫色
 
 # --- 数据结构定义 ---
 
+def new_file_id() -> str:
+    """生成文件 id：64 位随机数的 16 位十六进制字符串，可直接存入 uint64 列。"""
+    return secrets.token_hex(8)
+
 class FileDataStruct:
-    """文件信息的数据结构。这是一个纯粹的数据容器。"""
-    def __init__(self, file_image_name: str, file_image_state: str, color: QColor = default_color, file_id: str = None):
-        self.id = file_id if file_id is not None else str(uuid.uuid4())
+    """
+    文件信息的数据结构。这是一个纯粹的数据容器。
+    file_image_name 为显示、搜索和排序使用的文件名，file_image_dir 为所在目录（空字符串表示没有目录信息）。
+    """
+    def __init__(self, file_image_name: str, file_image_state: str, color: QColor = default_color, file_id: str = None,
+                 file_image_dir: str = ""):
+        self.id = file_id if file_id is not None else new_file_id()
         self.file_image_name = file_image_name
         self.file_image_state = file_image_state
         self.item_color = color
+        self.file_image_dir = file_image_dir
+
+    @property
+    def file_image_path(self) -> str:
+        """读取文件时使用的路径：目录 + 文件名。"""
+        return os.path.join(self.file_image_dir, self.file_image_name) if self.file_image_dir else self.file_image_name
 
 class ImageInfoDataStruct:
-    """图片详细信息的数据结构。"""
-    def __init__(self, file_image_name: str, project_category: str, file_image_resolution: str, color: QColor = default_color):
+    """图片详细信息的数据结构。file_size 为字节数，orientation 为 EXIF 方向（1 为正常）。"""
+    def __init__(self, file_image_name: str, project_category: str, file_image_resolution: str, color: QColor = default_color,
+                 image_format: str = "", file_size: int = 0, orientation: int = 1):
         self.file_image_name = file_image_name
         self.project_category = project_category
         self.file_image_resolution = file_image_resolution
         self.item_color = color
+        self.image_format = image_format
+        self.file_size = file_size
+        self.orientation = orientation
 
 class LabelInfoDataStruct:
-    """单个标签信息的数据结构。"""
-    def __init__(self, label_name: str, label_type: str, color: QColor = default_color, label_id: str = None):
+    """单个标签信息的数据结构。points 为标注的像素坐标 [(x, y), ...]：两个点表示矩形框，三个及以上为多边形。"""
+    def __init__(self, label_name: str, label_type: str, color: QColor = default_color, label_id: str = None,
+                 points: list[tuple[float, float]] = None):
         self.id = label_id if label_id is not None else str(uuid.uuid4())
         self.label_name = label_name
         self.label_type = label_type
         self.item_color = color
         self.is_visible = True
+        self.points = points if points is not None else []
 
 class LabelTypeDataStruct:
     """标签类别信息的数据结构。"""
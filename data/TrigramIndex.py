@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：TrigramIndex.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/5 14:36
+'''
+
+# data/TrigramIndex.py
+
+import threading
+
+import numpy as np
+
+# 段数超过该值时，应在后台把所有段合并为一个
+MAX_SEGMENTS = 8
+
+# 校验候选时每批处理的行数，限制临时矩阵的内存
+_VERIFY_BLOCK = 65536
+
+_SEPARATOR = 0
+
+
+def _encode_lowered(names: list[str]) -> bytes:
+    """把名称转小写后以 \\0 分隔拼接为 UTF-8 字节串。"""
+    joined = "\0".join(names)
+    lowered = joined.lower()
+    if len(lowered) != len(joined):
+        # 极少数字符转小写后长度会变化，此时逐个转换以保证分隔符位置正确
+        lowered = "\0".join(name.lower() for name in names)
+    return lowered.encode("utf-8")
+
+
+def _trigram_codes(buffer: np.ndarray) -> np.ndarray:
+    """把连续三个字节编码为一个 24 位整数。"""
+    b = buffer.astype(np.uint32)
+    return (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+
+
+class _Segment:
+    """
+    索引的一个不可变段。
+    - serials: 段内各行的插入序号（升序）
+    - buffer / starts: 小写名称以 \\0 分隔连续存放，starts[i] 为第 i 个名称的起始字节
+    - codes / pointers / postings: CSR 格式的倒排表，codes[k] 对应 postings[pointers[k]:pointers[k+1]]，
+      postings 中保存段内行下标（升序）。
+    """
+    __slots__ = ("serials", "buffer", "starts", "codes", "pointers", "postings")
+
+    def __init__(self, serials: np.ndarray, buffer: np.ndarray):
+        self.serials = np.asarray(serials, dtype=np.int64)
+        self.buffer = buffer
+        separators = np.flatnonzero(buffer == _SEPARATOR)
+        self.starts = np.concatenate(([0], separators + 1)).astype(np.int64)
+        # 末尾追加一个哨兵，便于用 starts[i + 1] - 1 计算第 i 个名称的结束位置
+        self.starts = np.append(self.starts, len(buffer) + 1)
+
+        if len(buffer) >= 3:
+            valid = (buffer[:-2] != _SEPARATOR) & (buffer[1:-1] != _SEPARATOR) & (buffer[2:] != _SEPARATOR)
+            positions = np.flatnonzero(valid)
+            rows = np.searchsorted(self.starts, positions, side="right") - 1
+            # (三元组, 行) 组合为一个 64 位键，排序后去重即得按三元组分组、组内行号升序的倒排表
+            keys = np.sort((_trigram_codes(buffer)[positions].astype(np.uint64) << np.uint64(32)) | rows.astype(np.uint64))
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            all_codes = (keys >> np.uint64(32)).astype(np.uint32)
+            self.postings = (keys & np.uint64(0xFFFFFFFF)).astype(np.int32)
+            first = np.flatnonzero(np.concatenate(([True], all_codes[1:] != all_codes[:-1])))
+            self.codes = all_codes[first]
+            self.pointers = np.append(first, len(all_codes)).astype(np.int64)
+        else:
+            self.codes = np.empty(0, dtype=np.uint32)
+            self.pointers = np.zeros(1, dtype=np.int64)
+            self.postings = np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def from_names(cls, serials, names: list[str]) -> "_Segment":
+        return cls(serials, np.frombuffer(_encode_lowered(names), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.serials)
+
+    def posting(self, code: int) -> np.ndarray:
+        k = int(np.searchsorted(self.codes, code))
+        if k == len(self.codes) or self.codes[k] != code:
+            return self.postings[:0]
+        return self.postings[self.pointers[k]:self.pointers[k + 1]]
+
+    def search(self, query: bytes, should_stop=None) -> np.ndarray | None:
+        """返回名称包含 query（已转小写）的段内行下标，升序；被中止时返回 None。"""
+        if not query:
+            return np.arange(len(self), dtype=np.int32)
+        if len(query) < 3:
+            return self._scan(query)
+
+        query_codes = set(_trigram_codes(np.frombuffer(query, dtype=np.uint8)).tolist())
+        postings = sorted((self.posting(code) for code in query_codes), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            # 两个升序数组求交集：用二分查找判断成员关系，代价只与较小的一方成正比
+            found = np.searchsorted(posting, candidates)
+            found[found == len(posting)] = 0
+            candidates = candidates[posting[found] == candidates] if len(posting) else posting
+        if len(query) == 3 or not len(candidates):
+            # 单个三元组命中即为精确匹配，无需校验
+            return candidates
+        return self._verify(candidates, query, should_stop)
+
+    def search_within(self, query: bytes, serials: np.ndarray, should_stop=None) -> np.ndarray | None:
+        """只在给定的插入序号（升序）范围内查找，用于在上一次结果的基础上细化查询。"""
+        if not len(self) or not len(serials):
+            return np.empty(0, dtype=np.int32)
+        first = np.searchsorted(serials, self.serials[0], side="left")
+        last = np.searchsorted(serials, self.serials[-1], side="right")
+        part = serials[first:last]
+        local = np.searchsorted(self.serials, part)
+        local = local[self.serials[local] == part].astype(np.int32)
+        if not query or not len(local):
+            return local
+        return self._verify(local, query, should_stop)
+
+    def _scan(self, query: bytes) -> np.ndarray:
+        """查询短于三个字节时，直接在整段缓冲区上做向量化比较。"""
+        pattern = np.frombuffer(query, dtype=np.uint8)
+        size = len(self.buffer) - len(pattern) + 1
+        if size <= 0:
+            return np.empty(0, dtype=np.int32)
+        hit = self.buffer[:size] == pattern[0]
+        for k in range(1, len(pattern)):
+            hit &= self.buffer[k:k + size] == pattern[k]
+        rows = np.searchsorted(self.starts, np.flatnonzero(hit), side="right") - 1
+        # 命中位置按顺序排列，行号因此已升序，只需去掉相邻重复
+        return rows[np.concatenate(([True], rows[1:] != rows[:-1]))].astype(np.int32) if len(rows) else rows.astype(np.int32)
+
+    def _verify(self, candidates: np.ndarray, query: bytes, should_stop=None) -> np.ndarray | None:
+        """逐个候选行确认是否真的包含完整的查询串（按块向量化），每块之间检查是否需要中止。"""
+        pattern = np.frombuffer(query, dtype=np.uint8)
+        accepted = []
+        for block_start in range(0, len(candidates), _VERIFY_BLOCK):
+            if should_stop is not None and should_stop():
+                return None
+            block = candidates[block_start:block_start + _VERIFY_BLOCK]
+            starts = self.starts[block]
+            lengths = self.starts[block + 1] - 1 - starts
+            width = int(lengths.max())
+            if width < len(pattern):
+                continue
+            # 把候选名称按行摊开成矩阵，超出名称长度的位置读到的是分隔符或越界位置（被截断为分隔符）
+            columns = starts[:, None] + np.arange(width)
+            matrix = self.buffer[np.minimum(columns, len(self.buffer) - 1)]
+            matrix[columns >= (starts + lengths)[:, None]] = _SEPARATOR
+            hit = np.zeros(len(block), dtype=bool)
+            for offset in range(width - len(pattern) + 1):
+                window = matrix[:, offset] == pattern[0]
+                for k in range(1, len(pattern)):
+                    window &= matrix[:, offset + k] == pattern[k]
+                hit |= window
+            accepted.append(block[hit])
+        return np.concatenate(accepted) if accepted else candidates[:0]
+
+
+class TrigramIndex:
+    """
+    文件名的三元组（trigram）倒排索引，用于大小写不敏感的子串搜索。
+    - 以行的插入序号(serial)为键，行号变化不影响索引；被删除的行在查询结果映射回行号时自然被过滤掉。
+    - 新增的行以小段的形式追加（主线程，代价与新增行数成正比），段数过多时由后台线程调用 merge() 合并。
+    - 查询时对各查询三元组的倒排表求交集，只校验候选行。
+    段本身不可变，段列表整体替换，因此查询可以在后台线程中与追加并发进行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segments: list[_Segment] = []
+        self._generation = 0
+        # 为 False 时索引不完整（例如整体替换数据之后），需先 rebuild() 才能用于查询
+        self.ready = True
+        # 已删除但仍残留在索引中的行数
+        self._dead_count = 0
+        self._live_count = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def needs_merge(self) -> bool:
+        return len(self._segments) > MAX_SEGMENTS
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return not self.ready or self._dead_count > max(self._live_count, 1024)
+
+    def clear(self, ready: bool = True):
+        with self._lock:
+            self._segments = []
+            self._generation += 1
+            self._dead_count = 0
+            self._live_count = 0
+            self.ready = ready
+
+    def add(self, serials, names: list[str]):
+        """为新追加的行建立索引。"""
+        if not len(names):
+            return
+        segment = _Segment.from_names(serials, names)
+        with self._lock:
+            self._segments = self._segments + [segment]
+            self._live_count += len(names)
+
+    def discard(self, count: int):
+        """记录有行被删除。条目本身惰性保留，查询时被过滤，重建时被清除。"""
+        self._dead_count += count
+        self._live_count -= count
+
+    def rebuild(self, serials: np.ndarray, name_bytes: np.ndarray, name_offsets: np.ndarray, generation: int):
+        """
+        用一份完整的列数据重建索引（可在后台线程调用），同时清除已删除行留下的条目。
+        serials 之后才追加的段会被保留；若期间索引被 clear() 过，则放弃本次结果。
+        """
+        buffer = name_bytes.tobytes()
+        offsets = name_offsets.tolist()
+        names = [buffer[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        segment = _Segment.from_names(serials, names)
+        watermark = int(serials[-1]) if len(serials) else -1
+        with self._lock:
+            if generation != self._generation:
+                return
+            newer = [seg for seg in self._segments if len(seg) and seg.serials[0] > watermark]
+            self._segments = [segment] + newer
+            self._live_count = len(segment) + sum(len(seg) for seg in newer)
+            self._dead_count = 0
+            self.ready = True
+
+    def merge(self):
+        """把当前所有段合并为一个（可在后台线程调用）。"""
+        segments = self._segments
+        generation = self._generation
+        if len(segments) <= 1:
+            return
+        merged = _Segment(
+            np.concatenate([seg.serials for seg in segments]),
+            np.concatenate([part for seg in segments for part in (seg.buffer, np.zeros(1, dtype=np.uint8))][:-1]),
+        )
+        with self._lock:
+            if generation != self._generation or self._segments[:len(segments)] != segments:
+                return
+            self._segments = [merged] + self._segments[len(segments):]
+
+    def search(self, text: str, within: np.ndarray = None, should_stop=None) -> np.ndarray | None:
+        """
+        返回名称包含 text（大小写不敏感）的行的插入序号，升序。
+        - within: 可选的升序插入序号数组，只在其中查找（上一次结果的细化）。
+        - should_stop: 可选的回调，返回 True 时尽快中止并返回 None。
+        """
+        query = text.lower().encode("utf-8")
+        results = [np.empty(0, dtype=np.int64)]
+        for seg in self._segments:
+            if should_stop is not None and should_stop():
+                return None
+            if within is None:
+                local = seg.search(query, should_stop)
+            else:
+                local = seg.search_within(query, within, should_stop)
+            if local is None:
+                return None
+            results.append(seg.serials[local])
+        return np.concatenate(results)
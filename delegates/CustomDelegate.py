@@ -10,71 +10,98 @@
 
 # delegates/CustomDelegate.py
 
-from PySide6.QtWidgets import QStyledItemDelegate
-from PySide6.QtCore import Qt, QRect, QSortFilterProxyModel
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QApplication
+from PySide6.QtCore import Qt, QRect, QSize, QAbstractProxyModel
 from PySide6.QtGui import QIcon, QColor
 
-from models.FileTableModel import COL_OP as FILE_COL_OP
-from models.LabelInfoModel import COL_LBL_OP
-from models.LabelTypeModel import COL_TYP_COLOR, COL_TYP_OP
+from models.FileTableModel import FileTableModel, COL_OP as FILE_COL_OP
+from models.LabelInfoModel import LabelInfoModel, COL_LBL_OP
+from models.LabelTypeModel import LabelTypeModel, COL_TYP_COLOR, COL_TYP_OP
+
+ICON_SIZE = QSize(16, 16)
+
+# (源模型类型, 列) -> 绘制方法名；表中没有的单元格按默认方式绘制
+_PAINTERS = {
+    (FileTableModel, FILE_COL_OP): "_paint_delete",
+    (LabelInfoModel, COL_LBL_OP): "_paint_visibility",
+    (LabelTypeModel, COL_TYP_COLOR): "_paint_color",
+    (LabelTypeModel, COL_TYP_OP): "_paint_delete",
+}
 
 
 class CustomDelegate(QStyledItemDelegate):
+    """
+    操作列 / 颜色列的绘制。
+    - 每个 (模型, 列) 的绘制方法在该模型首次绘制时解析一次并缓存，之后 paint 只做一次字典查询；
+      代理模型更换源模型或模型被销毁时丢弃缓存；
+    - 表中的单元格内容完全由本委托绘制（没有文本），不调用 super().paint（它会逐个角色查询数据），
+      只由样式画出选中 / 悬停背景；
+    - 图标按设备像素比缓存为 QPixmap，高分屏上清晰，且不必每次绘制时重新生成。
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.icons = {
-            "delete": QIcon("icons/delete.png").pixmap(16, 16),
-            "view": QIcon("icons/view.png").pixmap(16, 16),
-            "unview": QIcon("icons/unview.png").pixmap(16, 16)
+            "delete": QIcon("icons/delete.png"),
+            "view": QIcon("icons/view.png"),
+            "unview": QIcon("icons/unview.png")
         }
+        # (图标名, 设备像素比) -> QPixmap
+        self._pixmaps = {}
+        # id(模型) -> {列: 绘制方法或 None}
+        self._strategies = {}
 
     def paint(self, painter, option, index):
-        super().paint(painter, option, index)
-
-        # model_name = index.model().__class__.__name__
-        # --- 关键修正：获取真正的源模型 ---
         model = index.model()
-        source_model = None
-
-        if isinstance(model, QSortFilterProxyModel):
-            # 如果当前模型是代理模型，则获取其源模型
-            source_model = model.sourceModel()
-        else:
-            # 否则，当前模型就是源模型
-            source_model = model
-
-        model_name = source_model.__class__.__name__
-        # --- 修正结束 ---
-
-        column = index.column()
-
-        if model_name == "FileTableModel":
-            if column == FILE_COL_OP:
-                self._draw_icon(painter, option.rect, self.icons["delete"])
-            return
-
-        if model_name == "LabelInfoModel":
-            if column == COL_LBL_OP:
-                is_visible = index.data(Qt.UserRole + 1)
-                icon = self.icons["view"] if is_visible else self.icons["unview"]
-                self._draw_icon(painter, option.rect, icon)
+        columns = self._strategies.get(id(model))
+        if columns is None:
+            columns = self._attach_model(model)
+        strategy = columns.get(index.column())
+        if strategy is None:
+            super().paint(painter, option, index)
             return
-
-        if model_name == "LabelTypeModel":
-            if column == COL_TYP_COLOR:
-                color = index.data(Qt.ForegroundRole)
-                if isinstance(color, QColor):
-                    color_rect = option.rect.adjusted(5, 5, -5, -5)
-                    painter.fillRect(color_rect, color)
-            elif column == COL_TYP_OP:
-                self._draw_icon(painter, option.rect, self.icons["delete"])
-            return
-
-    def _draw_icon(self, painter, cell_rect, icon_pixmap):
-        icon_rect = self._get_centered_rect(cell_rect, icon_pixmap.size())
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+        strategy(painter, option, index)
+
+    def _attach_model(self, model) -> dict:
+        """解析模型（代理模型取其源模型）各列的绘制方法并缓存。"""
+        key = id(model)
+        # 代理模型取真正的源模型
+        source_model = model.sourceModel() if isinstance(model, QAbstractProxyModel) else model
+        columns = {column: getattr(self, name) for (model_type, column), name in _PAINTERS.items()
+                   if isinstance(source_model, model_type)}
+        if key not in self._strategies:
+            model.destroyed.connect(lambda *args: self._strategies.pop(key, None))
+            if isinstance(model, QAbstractProxyModel):
+                model.sourceModelChanged.connect(lambda: self._strategies.pop(key, None))
+        self._strategies[key] = columns
+        return columns
+
+    def _paint_delete(self, painter, option, index):
+        self._draw_icon(painter, option.rect, "delete")
+
+    def _paint_visibility(self, painter, option, index):
+        self._draw_icon(painter, option.rect, "view" if index.data(Qt.UserRole + 1) else "unview")
+
+    def _paint_color(self, painter, option, index):
+        color = index.data(Qt.ForegroundRole)
+        if isinstance(color, QColor):
+            painter.fillRect(option.rect.adjusted(5, 5, -5, -5), color)
+
+    def _pixmap(self, name: str, device_pixel_ratio: float):
+        pixmap = self._pixmaps.get((name, device_pixel_ratio))
+        if pixmap is None:
+            pixmap = self.icons[name].pixmap(ICON_SIZE, device_pixel_ratio)
+            self._pixmaps[(name, device_pixel_ratio)] = pixmap
+        return pixmap
+
+    def _draw_icon(self, painter, cell_rect, icon_name):
+        icon_pixmap = self._pixmap(icon_name, painter.device().devicePixelRatioF())
+        icon_rect = self._get_centered_rect(cell_rect, icon_pixmap.deviceIndependentSize().toSize())
         painter.drawPixmap(icon_rect.topLeft(), icon_pixmap)
 
     def _get_centered_rect(self, cell_rect: QRect, item_size) -> QRect:
         x = cell_rect.x() + (cell_rect.width() - item_size.width()) / 2
         y = cell_rect.y() + (cell_rect.height() - item_size.height()) / 2
-        return QRect(int(x), int(y), item_size.width(), item_size.height())
\ No newline at end of file
+        return QRect(int(x), int(y), item_size.width(), item_size.height())
@@ -11,26 +11,46 @@
 
 # main.py
 import sys
-import random
+import time
 
-from PySide6.QtWidgets import QApplication, QMainWindow, QStatusBar, QDockWidget, QTabWidget, QWidget
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QMainWindow, QStatusBar, QDockWidget, QTabWidget, QWidget, QLabel
+from PySide6.QtCore import Qt, QTimer, QThread, Signal
 
 from managers.FileManager import FileManager
 from managers.ImageInfoManager import ImageInfoManager
-from managers.LabelInfoManager import LabelInfoManager
+from managers.LabelInfoManager import LabelInfoManager, LABEL_PREFETCH_ROWS
 from managers.LabelTypeManager import LabelTypeManager
 
-from data.TableDataStruct import ImageInfoDataStruct, LabelInfoDataStruct
+from data.LabelFile import annotation_category
+from data.ImageMetadata import default_cache_path
+from workers.DetailLoader import DetailLoader
+
+# 选中行停留超过该时间（毫秒）才加载详情：按住方向键连续移动时，中间经过的行不加载
+SELECTION_IDLE_MS = 50
+# 连续移动时详情的最长延迟（毫秒）：从第一次未处理的变化算起，到期即加载当时选中的行
+SELECTION_MAX_DELAY_MS = 250
+
+
+def selection_delay_ms(pending_since: float, now: float) -> int:
+    """距第一次未处理的选中变化（pending_since）已过去 now - pending_since 秒时，本次变化之后还应等待的毫秒数。"""
+    remaining = SELECTION_MAX_DELAY_MS - (now - pending_since) * 1000
+    return max(0, min(SELECTION_IDLE_MS, round(remaining)))
 
 
 class MainWindow(QMainWindow):
+    detail_requested = Signal(int, str, str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("大型工业软件 - 重构模块")
         self.setGeometry(100, 100, 1600, 900)
+        # 详情请求号：每次加载或清空详情时递增，用于取消进行中的加载、丢弃过期结果
+        self._detail_generation = 0
+        # 第一次尚未处理的选中变化的时间（time.monotonic），没有待处理的变化时为 None
+        self._selection_pending_since = None
 
         self.create_managers()
+        self.create_detail_loader()
         self.setup_ui()
         self.connect_signals()
 
@@ -40,6 +60,16 @@ class MainWindow(QMainWindow):
         self.label_info_manager = LabelInfoManager(self)
         self.label_type_manager = LabelTypeManager(self)
 
+    def create_detail_loader(self):
+        """选中文件的详情（标签、图片信息）在后台线程中加载，标签与预取共用同一个缓存。"""
+        self.selection_timer = QTimer(self)
+        self.selection_timer.setSingleShot(True)
+        self.detail_thread = QThread()
+        self.detail_loader = DetailLoader(self.label_info_manager.label_cache, default_cache_path())
+        self.detail_loader.moveToThread(self.detail_thread)
+        self.detail_thread.finished.connect(self.detail_loader.close)
+        self.detail_thread.start()
+
     def setup_ui(self):
         self.setCentralWidget(QWidget())  # 中央控件可以是一个图像查看器等
 
@@ -56,10 +86,17 @@ class MainWindow(QMainWindow):
         self.addDockWidget(Qt.RightDockWidgetArea, right_dock)
 
         self.setStatusBar(QStatusBar(self))
+        # 各状态的文件数常驻显示在状态栏右侧
+        self.state_counts_label = QLabel()
+        self.statusBar().addPermanentWidget(self.state_counts_label)
 
     def connect_signals(self):
         self.file_manager.view.selectionModel().selectionChanged.connect(self.on_file_selection_changed)
+        self.selection_timer.timeout.connect(self.load_selected_details)
+        self.detail_requested.connect(self.detail_loader.load)
+        self.detail_loader.loaded.connect(self.on_details_loaded)
         self.file_manager.deleteFileItemEmit.connect(self.on_file_deleted)
+        self.file_manager.labelsChangedEmit.connect(self.on_labels_changed)
         self.file_manager.topButtonClicked.connect(self.on_main_action)
         self.label_info_manager.visibilityChanged.connect(
             lambda lid, vis: self.statusBar().showMessage(f"标签 {lid[:8]}... 可见性: {vis}", 3000)
@@ -67,36 +104,67 @@ class MainWindow(QMainWindow):
         self.label_type_manager.labelTypeAdded.connect(
             lambda id: self.statusBar().showMessage(f"已添加类别: {id}", 3000)
         )
+        self.file_manager.stateCountsEmit.connect(self.on_state_counts_changed)
+        self.file_manager.statusMessageEmit.connect(lambda message: self.statusBar().showMessage(message, 5000))
+        self.file_manager.update_state_counts()
 
     def on_file_selection_changed(self, selected, deselected):
-        # 获取选中的代理索引
+        """
+        选中行变化只启动（或重启）防抖定时器：停留 SELECTION_IDLE_MS 后才加载详情，
+        连续变化时最迟 SELECTION_MAX_DELAY_MS 加载一次当时选中的行。
+        """
+        now = time.monotonic()
+        if self._selection_pending_since is None:
+            self._selection_pending_since = now
+        self.selection_timer.start(selection_delay_ms(self._selection_pending_since, now))
+
+    def selected_file(self):
+        """当前选中的文件及其在代理模型中的行号；没有选中时返回 (None, -1)。"""
         indexes = self.file_manager.view.selectionModel().selectedRows()
         if not indexes:
+            return None, -1
+        # 选中的是代理模型的索引，映射到源模型后取数据
+        source_index = self.file_manager.proxy_model.mapToSource(indexes[0])
+        return self.file_manager.source_model.data(source_index, Qt.UserRole), indexes[0].row()
+
+    def load_selected_details(self):
+        """为当前选中的文件发起详情加载，进行中或排队中的旧加载被取消。"""
+        self.selection_timer.stop()
+        self._selection_pending_since = None
+        self._detail_generation += 1
+        self.detail_loader.cancel_before(self._detail_generation)
+        file_data, _ = self.selected_file()
+        if file_data is None:
             self.label_info_manager.clear_labels()
             self.image_info_manager.clear_info()
             return
+        self.detail_requested.emit(self._detail_generation, file_data.id, file_data.file_image_path)
 
-        # --- 关键修正 ---
-        # 1. 获取到的是代理模型的索引 (Proxy Index)
-        proxy_index = indexes[0]
-
-        # 2. 将代理索引映射到源模型索引 (Source Index)
-        source_index = self.file_manager.proxy_model.mapToSource(proxy_index)
-
-        # 3. 使用源索引从源模型获取数据
-        file_data = self.file_manager.source_model.data(source_index, Qt.UserRole)
-        # --- 修正结束 ---
-
-        if file_data:
-            # 伪造数据进行演示
-            dummy_labels = [LabelInfoDataStruct(f"label_{i}", random.choice(["person", "car"])) for i in
-                            range(random.randint(1, 5))]
-            dummy_info = ImageInfoDataStruct(file_data.file_image_name, "常规项目", "1920x1080")
-
-            self.label_info_manager.set_labels(dummy_labels)
-            self.image_info_manager.display_info(dummy_info)
+    def on_details_loaded(self, generation: int, file_id: str, labels: list, meta):
+        """只应用最新请求的结果：两个面板各一次模型重置，随后在后台预取相邻文件的标签。"""
+        if generation != self._detail_generation:
+            return
+        file_data, proxy_row = self.selected_file()
+        if file_data is None or file_data.id != file_id:
+            return
+        self.label_info_manager.set_labels(labels)
+        self.image_info_manager.display_info(
+            self.image_info_manager.info_from_metadata(file_data.file_image_name, annotation_category(labels), meta))
+        self.label_info_manager.prefetch(self.file_manager.neighbor_files(proxy_row, LABEL_PREFETCH_ROWS))
+
+    def on_state_counts_changed(self, counts: dict):
+        total = sum(counts.values())
+        self.state_counts_label.setText(" | ".join([f"共 {total} 个文件"] + [f"{state} {count}" for state, count in counts.items()]))
+
+    def on_labels_changed(self, file_ids: list):
+        """文件被重新标注：丢弃缓存，当前选中的文件在其中时刷新标签列表。"""
+        self.label_info_manager.invalidate(file_ids)
+        file_data, _ = self.selected_file()
+        if file_data is not None and file_data.id in set(file_ids):
+            self.load_selected_details()
 
     def on_file_deleted(self, file_ids: list):
+        self.label_info_manager.invalidate(file_ids)
         message = f"文件已删除: {file_ids[0][:8]}..." if len(file_ids) == 1 else f"已删除 {len(file_ids)} 个文件。"
         self.statusBar().showMessage(message, 5000)
         print(message)
@@ -107,6 +175,10 @@ class MainWindow(QMainWindow):
         print(message)
 
     def closeEvent(self, event):
+        self.selection_timer.stop()
+        self.detail_loader.cancel_before(self._detail_generation + 1)
+        self.detail_thread.quit()
+        self.detail_thread.wait()
         for manager_component in [self.file_manager, self.image_info_manager, self.label_info_manager, self.label_type_manager]:
             if manager_component:
                 manager_component.close()
@@ -11,28 +11,70 @@
 # managers/FileManager.py
 
 import random
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QMessageBox, QMenu
+
+import numpy as np
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QMessageBox, QMenu, QComboBox,
+                               QButtonGroup, QFileDialog, QInputDialog)
 from PySide6.QtCore import Signal, QModelIndex, Qt, QTimer, QThread, Slot
 from PySide6.QtGui import QColor, QCursor
 
-from workers.FilterWorker import FilterWorker
+from workers.FilterWorker import FilterWorker, FILTER_MODE_AUTO, FILTER_MODE_THREAD, FILTER_MODE_PROCESS
+from workers.ImportWorker import ImportWorker
+from workers.ExportWorker import ExportWorker, EXPORT_SPLITS, LINK_MODE_LINK
+from workers.AutoLabelWorker import AutoLabelWorker, contour_annotator
+from workers.MetadataWorker import MetadataWorker
+from data.ProjectFile import PROJECT_EXTENSION, ProjectFormatError
 from models.FileFilterProxyModel import FileFilterProxyModel
 from models.FileTableModel import FileTableModel, COL_OP
 from views.BaseTableView import BaseTableView
 from delegates.CustomDelegate import CustomDelegate
 from data.TableDataStruct import FileDataStruct, train_color, val_color
+from data.FileColumnStore import FILE_STATES
+from data.FileQuery import compile_query, QuerySyntaxError
+from data.FuzzySearch import FuzzyQuery
+from data.DatasetSplit import DEFAULT_VAL_RATIO, DEFAULT_SPLIT_SEED
+from data.LabelFile import primary_label_type
+from data.ImageMetadata import default_cache_path
 
 STATE_CONFIG = {
     "训练集": {"text": "转为训练集", "color": train_color},
     "验证集": {"text": "转为验证集", "color": val_color},
 }
 
+FILTER_MODES = [
+    ("自动", FILTER_MODE_AUTO),
+    ("单线程", FILTER_MODE_THREAD),
+    ("多进程", FILTER_MODE_PROCESS),
+]
+
+# 搜索方式
+SEARCH_QUERY = "query"      # 查询语言（子串 / 通配符 / 正则 / 状态）
+SEARCH_FUZZY = "fuzzy"      # 模糊搜索，按得分显示前 k 个结果
+SEARCH_KINDS = [
+    ("查询", SEARCH_QUERY),
+    ("模糊", SEARCH_FUZZY),
+]
+
+# 批量插入时每批的行数
+INSERT_CHUNK_SIZE = 5000
+
 
 class FileManager(QWidget):
     deleteFileItemEmit = Signal(list)
-    updateFileStateEmit = Signal(str, str)
+    updateFileStateEmit = Signal(list, str)
     topButtonClicked = Signal(str)
-    filter_requested = Signal(list, str)
+    filter_requested = Signal(object, object, object, int, int, str)
+    index_rebuild_requested = Signal(object, tuple)
+    index_merge_requested = Signal(object)
+    name_sort_requested = Signal(object)
+    stateCountsEmit = Signal(object)
+    statusMessageEmit = Signal(str)
+    import_requested = Signal(int, str)
+    export_requested = Signal(int, object, str, str)
+    auto_label_requested = Signal(int, object, object, object)
+    metadata_scan_requested = Signal(int, object, str)
+    # 标注内容发生变化的文件 id 列表（预标注写入了新的标注文件）
+    labelsChangedEmit = Signal(list)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -40,6 +82,34 @@ class FileManager(QWidget):
         self.search_timer = QTimer(self)
         self.search_timer.setSingleShot(True)  # 设置为单次触发
         self.search_timer.setInterval(300)  # 设置延迟时间，300ms是一个不错的选择
+        # 状态计数的刷新合并到下一次事件循环，批量增删改只刷新一次界面
+        self.counts_timer = QTimer(self)
+        self.counts_timer.setSingleShot(True)
+        self.counts_timer.setInterval(0)
+        # 过滤请求号：每次发起请求递增，用于丢弃过期结果
+        self._filter_generation = 0
+        # 数据版本：插入或重置时递增，版本不变时后台可以复用上一次结果做增量细化
+        self._data_generation = 0
+        # 最近一次过滤请求的查询计划
+        self._pending_predicate = None
+        # 是否已请求后台建立文件名排序
+        self._name_sort_pending = False
+        # 当前导入任务号（0 表示没有正在进行的导入）及其统计
+        self._import_job = 0
+        self._import_job_counter = 0
+        self._import_added = 0
+        self._import_skipped = 0
+        # 当前生成数据集的任务号（0 表示没有正在进行的导出）
+        self._export_job = 0
+        self._export_job_counter = 0
+        # 当前预标注任务号（0 表示没有正在进行的预标注）
+        self._auto_label_job = 0
+        self._auto_label_job_counter = 0
+        # 当前图片信息预读任务号（0 表示没有正在进行的预读）
+        self._metadata_job = 0
+        self._metadata_job_counter = 0
+        # 最近一次打开或保存的工程文件
+        self._project_path = None
 
         self._init_model_view()
         self._init_background_worker()  # 初始化后台线程
@@ -48,7 +118,7 @@ class FileManager(QWidget):
         self._add_test_data(10000)
 
     def _init_model_view(self):
-        headers = ["序号", "文件名称", "文件类别", "操作"]
+        headers = ["序号", "文件名称", "文件类别", "分辨率", "操作"]
 
         # 1. 创建源模型 (Source Model)
         self.source_model = FileTableModel(headers=headers)
@@ -58,7 +128,8 @@ class FileManager(QWidget):
         self.proxy_model.setSourceModel(self.source_model)
 
         # 3. 视图连接到代理模型
-        self.view = BaseTableView(column_width_ratios=[1, 4, 4, 1])
+        # 点击表头排序：由代理模型按源模型维护的排序置换完成
+        self.view = BaseTableView(column_width_ratios=[1, 4, 3, 2, 1], sortable=True)
         self.view.setModel(self.proxy_model)  # <-- 关键改变
 
         self.delegate = CustomDelegate(self)
@@ -72,6 +143,30 @@ class FileManager(QWidget):
         self.filter_worker.moveToThread(self.filter_thread)
         self.filter_thread.start()
 
+        # 目录导入在独立线程中扫描，不与过滤请求互相阻塞
+        self.import_thread = QThread()
+        self.import_worker = ImportWorker()
+        self.import_worker.moveToThread(self.import_thread)
+        self.import_thread.start()
+
+        # 生成数据集同样在独立线程中进行，线程内再用线程池复制图片
+        self.export_thread = QThread()
+        self.export_worker = ExportWorker()
+        self.export_worker.moveToThread(self.export_thread)
+        self.export_thread.start()
+
+        # 预标注：调度线程负责提交进程任务、写入标注文件，主线程只处理成批的结果
+        self.auto_label_thread = QThread()
+        self.auto_label_worker = AutoLabelWorker()
+        self.auto_label_worker.moveToThread(self.auto_label_thread)
+        self.auto_label_thread.start()
+
+        # 图片信息（宽高）预读：后台线程查询磁盘缓存，未命中时用线程池读取文件头
+        self.metadata_thread = QThread()
+        self.metadata_worker = MetadataWorker()
+        self.metadata_worker.moveToThread(self.metadata_thread)
+        self.metadata_thread.start()
+
     def _init_ui(self):
         main_layout = QVBoxLayout(self)
         top_button_layout = QHBoxLayout()
@@ -96,11 +191,33 @@ class FileManager(QWidget):
         for btn in self.top_buttons: top_button_layout.addWidget(btn)
         main_layout.addLayout(top_button_layout)
 
+        # 状态分面：显示各状态的文件数，点击即按该状态过滤（None 表示全部）
+        facet_layout = QHBoxLayout()
+        self.facet_group = QButtonGroup(self)
+        self.facet_buttons = {}
+        for state in [None] + FILE_STATES:
+            btn = QPushButton()
+            btn.setCheckable(True)
+            self.facet_group.addButton(btn)
+            self.facet_buttons[state] = btn
+            facet_layout.addWidget(btn)
+        facet_layout.addStretch()
+        self.facet_buttons[None].setChecked(True)
+        main_layout.addLayout(facet_layout)
+
         control_layout = QHBoxLayout()
         self.search_bar = QLineEdit()
-        self.search_bar.setPlaceholderText("按文件名查找 (后台筛选)...")
+        self.search_bar.setPlaceholderText('按文件名查找，支持 state:训练集 name:~"cam0[1-3]_.*" -state:未标注 (后台筛选)...')
+        self.search_kind_combo = QComboBox()
+        for text, kind in SEARCH_KINDS:
+            self.search_kind_combo.addItem(text, kind)
+        self.filter_mode_combo = QComboBox()
+        for text, mode in FILTER_MODES:
+            self.filter_mode_combo.addItem(text, mode)
         self.add_10000_button = QPushButton("添加10000个文件 (测试)")
         control_layout.addWidget(self.search_bar)
+        control_layout.addWidget(self.search_kind_combo)
+        control_layout.addWidget(self.filter_mode_combo)
         control_layout.addWidget(self.add_10000_button)
         main_layout.addLayout(control_layout)
         main_layout.addWidget(self.view)
@@ -110,10 +227,33 @@ class FileManager(QWidget):
         # 防抖定时器连接到启动后台任务的槽
         self.search_timer.timeout.connect(self.start_background_filter)
         self.search_bar.textChanged.connect(self.search_timer.start)
+        self.filter_mode_combo.currentIndexChanged.connect(self.search_timer.start)
+        self.search_kind_combo.currentIndexChanged.connect(self.search_timer.start)
+        self.search_bar.textChanged.connect(self._sync_facet_buttons)
+        for state, btn in self.facet_buttons.items():
+            btn.clicked.connect(lambda checked=False, s=state: self.apply_state_facet(s))
+
+        # 状态计数随数据变化刷新
+        self.counts_timer.timeout.connect(self.update_state_counts)
+        for signal in (self.source_model.rowsInserted, self.source_model.rowsRemoved,
+                       self.source_model.modelReset, self.source_model.dataChanged):
+            signal.connect(self.counts_timer.start)
 
         # 连接主线程和后台线程
         self.filter_requested.connect(self.filter_worker.run_filter)
         self.filter_worker.results_ready.connect(self.update_proxy_with_results)
+        self.index_rebuild_requested.connect(self.filter_worker.rebuild_index)
+        self.index_merge_requested.connect(self.filter_worker.merge_index)
+        self.name_sort_requested.connect(self.filter_worker.build_name_sort)
+        self.filter_worker.name_sort_ready.connect(self.install_name_sort)
+        # 数据整体替换或删除之后，按需安排后台维护文件名索引
+        self.source_model.modelReset.connect(self.schedule_index_maintenance)
+        self.source_model.rowsRemoved.connect(self.schedule_index_maintenance)
+        # 删除行不影响以插入序号表示的上一次结果，插入和重置则会使其失效
+        self.source_model.rowsInserted.connect(self._bump_data_generation)
+        self.source_model.modelReset.connect(self._bump_data_generation)
+        self.source_model.modelReset.connect(self._refilter_if_lost)
+        self.source_model.modelReset.connect(self.schedule_name_sort)
 
         self.view.clicked.connect(self.on_view_clicked)
         self.view.customContextMenuRequested.connect(self.show_context_menu)
@@ -121,37 +261,423 @@ class FileManager(QWidget):
             btn.clicked.connect(lambda checked=False, name=btn.objectName(): self.topButtonClicked.emit(name))
         self.add_10000_button.clicked.connect(lambda: self._add_test_data(10000))
 
+        # 导入图片：后台扫描目录，分批插入
+        self.btn_import_img.clicked.connect(self.toggle_import)
+        self.btn_import_dataset.clicked.connect(self.open_project)
+        self.btn_export_dataset.clicked.connect(self.save_project)
+        self.btn_generate_dataset.clicked.connect(self.toggle_export)
+        self.btn_auto_label.clicked.connect(self.toggle_auto_label)
+        self.import_requested.connect(self.import_worker.run_import)
+        self.import_worker.batch_ready.connect(self._on_import_batch)
+        self.import_worker.progress.connect(self._on_import_progress)
+        self.import_worker.finished.connect(self._on_import_finished)
+        self.export_requested.connect(self.export_worker.run_export)
+        self.export_worker.started.connect(self._on_export_started)
+        self.export_worker.progress.connect(self._on_export_progress)
+        self.export_worker.finished.connect(self._on_export_finished)
+        self.export_worker.failed.connect(self._on_export_failed)
+        self.auto_label_requested.connect(self.auto_label_worker.run_job)
+        self.auto_label_worker.batch_ready.connect(self._on_auto_label_batch)
+        self.auto_label_worker.progress.connect(self._on_auto_label_progress)
+        self.auto_label_worker.finished.connect(self._on_auto_label_finished)
+        self.metadata_scan_requested.connect(self.metadata_worker.run_scan)
+        self.metadata_worker.chunk_ready.connect(self._on_metadata_chunk)
+        self.metadata_worker.progress.connect(self._on_metadata_progress)
+        self.metadata_worker.finished.connect(self._on_metadata_finished)
+
     def start_background_filter(self):
         """由防抖定时器触发，准备数据并发起后台过滤请求。"""
         search_text = self.search_bar.text()
 
+        # 新请求取代所有更早的请求：正在执行的扫描会尽快中止，迟到的结果会被丢弃
+        self._filter_generation += 1
+        self.filter_worker.cancel_before(self._filter_generation)
+
         if not search_text:
             # 如果搜索框为空，直接重置过滤器，无需动用后台线程
             self.proxy_model.set_accepted_rows(None)
+            self.search_bar.setStyleSheet("")
+            self.search_bar.setToolTip("")
             return
 
-        # 将整个数据列表和搜索文本通过信号发送给工作者
-        # 注意：这里传递的是数据的引用，因为后台是只读的，这样更高效
-        # 如果后台需要修改数据，必须传递深拷贝！
-        self.filter_requested.emit(self.source_model._data, search_text)
+        # 查询语句只在这里编译一次（相同语句命中缓存），语法错误直接提示，不发起过滤
+        try:
+            if self.search_kind_combo.currentData() == SEARCH_FUZZY:
+                plan = FuzzyQuery(search_text)
+            else:
+                plan = compile_query(search_text)
+        except QuerySyntaxError as e:
+            self.search_bar.setStyleSheet("background-color: #ffebee;")  # 淡红色背景提示
+            self.search_bar.setToolTip(str(e))
+            return
+        self.search_bar.setToolTip("")
+        # 记住本次请求的查询计划，结果到达后交给代理模型用于增量维护
+        self._pending_predicate = plan
+
+        # 将数据快照和查询计划通过信号发送给工作者
+        # 快照是零拷贝的只读视图，主线程之后的增删改都不会影响后台正在读取的数据
+        self.filter_requested.emit(self.source_model.snapshot(), self.source_model.name_index, plan,
+                                   self._filter_generation, self._data_generation,
+                                   self.filter_mode_combo.currentData())
 
         # 可以在这里添加一个"正在搜索..."的UI提示
         self.search_bar.setStyleSheet("background-color: #fffde7;")  # 淡黄色背景提示
 
-    @Slot(set)
-    def update_proxy_with_results(self, accepted_rows: set):
+    @Slot(object, int, object)
+    def update_proxy_with_results(self, accepted_rows: np.ndarray, generation: int, snapshot):
         """接收后台线程的结果，并更新代理模型。"""
-        self.view.setUpdatesEnabled(False)
-        self.proxy_model.set_accepted_rows(accepted_rows)
-        self.view.setUpdatesEnabled(True)
+        if generation != self._filter_generation:
+            # 已被更新的请求取代，丢弃
+            return
+
+        # 结果是在快照上计算的：数据在此期间有增删时，需要把行号映射到当前数据
+        rows = self.source_model.remap_rows(accepted_rows, snapshot)
+        if rows is None:
+            # 数据已被整体替换，结果无法映射，重新发起过滤
+            self.start_background_filter()
+            return
+        predicate = self._pending_predicate
+        if predicate.ranked:
+            # 模糊搜索结果按得分顺序显示，不做增量维护
+            self.proxy_model.set_accepted_rows(rows, ordered=True)
+            # 按得分显示时代理模型已取消表头排序，同步清除排序指示
+            self.view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            self.search_bar.setStyleSheet("")
+            return
+        # 快照之后才追加的行不在结果中，只对这些行补充求值
+        tail = self.source_model.first_row_after(snapshot)
+        row_count = self.source_model.rowCount()
+        if tail < row_count:
+            extra = np.flatnonzero(self.source_model.evaluate_rows(predicate, tail, row_count)) + tail
+            rows = np.concatenate((rows, extra))
+        # 升序行号数组直接作为代理模型的映射，此后由代理模型按判定条件增量维护
+        self.proxy_model.set_accepted_rows(rows, predicate)
 
         # 恢复UI提示
         self.search_bar.setStyleSheet("")
 
+    def apply_state_facet(self, state: str | None):
+        """
+        点击状态分面：直接由状态编码列取出该状态的全部行作为过滤结果，不经过后台文本过滤。
+        搜索栏同步显示等价的查询 state:状态，结果之后同样由代理模型增量维护。
+        """
+        self.search_timer.stop()
+        self._filter_generation += 1
+        self.filter_worker.cancel_before(self._filter_generation)
+        text = f"state:{state}" if state is not None else ""
+        for widget, setter, value in ((self.search_bar, self.search_bar.setText, text),
+                                      (self.search_kind_combo, self.search_kind_combo.setCurrentIndex,
+                                       self.search_kind_combo.findData(SEARCH_QUERY))):
+            widget.blockSignals(True)
+            setter(value)
+            widget.blockSignals(False)
+        self.search_bar.setStyleSheet("")
+        self.search_bar.setToolTip("")
+        self._sync_facet_buttons()
+        if state is None:
+            self.proxy_model.set_accepted_rows(None)
+            return
+        plan = compile_query(text)
+        self._pending_predicate = plan
+        self.proxy_model.set_accepted_rows(self.source_model.rows_in_state(state), plan)
+
+    def _sync_facet_buttons(self, *args):
+        """搜索栏内容恰好是某个状态分面（或为空）时选中对应按钮，否则全部取消选中。"""
+        text = self.search_bar.text().strip()
+        if not text:
+            target = self.facet_buttons[None]
+        else:
+            target = self.facet_buttons.get(text[len("state:"):]) if text.startswith("state:") else None
+        self.facet_group.setExclusive(False)
+        for btn in self.facet_buttons.values():
+            btn.setChecked(btn is target)
+        self.facet_group.setExclusive(True)
+
+    def update_state_counts(self):
+        """刷新分面按钮上的计数，并通知外部（如主窗口状态栏）。"""
+        counts = self.source_model.state_counts()
+        self.facet_buttons[None].setText(f"全部 {self.source_model.rowCount()}")
+        for state in FILE_STATES:
+            self.facet_buttons[state].setText(f"{state} {counts.get(state, 0)}")
+        self.stateCountsEmit.emit(counts)
+
+    def _bump_data_generation(self, *args):
+        self._data_generation += 1
+
+    def _refilter_if_lost(self):
+        """数据被整体替换后代理模型无法保留过滤结果，此时按当前搜索条件重新过滤。"""
+        if self.search_bar.text() and self.proxy_model.accepted_rows is None:
+            self.start_background_filter()
+
+    def schedule_index_maintenance(self, *args):
+        """在后台线程中合并索引段或重建索引，不阻塞界面。"""
+        name_index = self.source_model.name_index
+        if name_index.needs_rebuild:
+            self.index_rebuild_requested.emit(name_index, self.source_model.name_index_source())
+        elif name_index.needs_merge:
+            self.index_merge_requested.emit(name_index)
+
+    def schedule_name_sort(self, *args):
+        """文件名排序尚未建立时，在后台线程中预先建立，之后点击表头无需等待。"""
+        if self._name_sort_pending or self.source_model.has_name_sort() or not self.source_model.rowCount():
+            return
+        self._name_sort_pending = True
+        self.name_sort_requested.emit(self.source_model.snapshot())
+
+    @Slot(object, object, object)
+    def install_name_sort(self, snapshot, keys: np.ndarray, order: np.ndarray):
+        self._name_sort_pending = False
+        self.source_model.install_name_sort(snapshot, keys, order)
+        # 数据在此期间被整体替换时结果被丢弃，按新数据重新安排
+        self.schedule_name_sort()
+
+    # --- 工程文件 ---
+    def open_project(self):
+        path, _ = QFileDialog.getOpenFileName(self, "导入数据集", "", f"工程文件 (*{PROJECT_EXTENSION})")
+        if path:
+            self.load_project(path)
+
+    def load_project(self, path: str):
+        try:
+            self.source_model.load_project(path)
+        except (OSError, ProjectFormatError) as e:
+            QMessageBox.warning(self, "导入数据集", f"无法打开工程文件：{e}")
+            return
+        self._project_path = path
+        self.statusMessageEmit.emit(f"已打开 {path}，共 {self.source_model.rowCount()} 个文件")
+        self.start_metadata_scan()
+
+    def save_project(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出数据集", self._project_path or "",
+                                              f"工程文件 (*{PROJECT_EXTENSION})")
+        if not path:
+            return
+        if not path.endswith(PROJECT_EXTENSION):
+            path += PROJECT_EXTENSION
+        try:
+            stats = self.source_model.save_project(path)
+        except OSError as e:
+            QMessageBox.warning(self, "导出数据集", f"保存失败：{e}")
+            return
+        self._project_path = path
+        written = "、".join(stats.written) if stats.written else "无变化"
+        self.statusMessageEmit.emit(f"已保存 {path}（{'整体重写' if stats.rewritten else '增量写入'}：{written}，"
+                                    f"{stats.bytes_written / 1e6:.1f} MB）")
+
+    # --- 目录导入 ---
+    def toggle_import(self):
+        """没有正在进行的导入时选择目录并开始导入，否则取消当前导入。"""
+        if self._import_job:
+            self.import_worker.cancel(self._import_job)
+            return
+        root = QFileDialog.getExistingDirectory(self, "选择图片目录")
+        if root:
+            self.start_import(root)
+
+    def start_import(self, root: str):
+        self._import_job_counter += 1
+        self._import_job = self._import_job_counter
+        self._import_added = self._import_skipped = 0
+        self.btn_import_img.setText("取消导入")
+        self.import_requested.emit(self._import_job, root)
+
+    @Slot(int, object)
+    def _on_import_batch(self, job: int, items: list):
+        """主线程中每批只做一次去重和一次批量插入，工作量以批大小为上限。"""
+        try:
+            if job != self._import_job:
+                return
+            find_row = self.source_model.find_row_by_id
+            new_items = [item for item in items if find_row(item.id) < 0]
+            self._import_skipped += len(items) - len(new_items)
+            if new_items:
+                self._import_added += self.source_model.add_items(new_items)
+        finally:
+            # 无论是否采用都归还额度，后台才能继续扫描
+            self.import_worker.batch_done()
+
+    @Slot(int, int, int, float)
+    def _on_import_progress(self, job: int, dir_count: int, found: int, rate: float):
+        if job == self._import_job:
+            self.statusMessageEmit.emit(f"正在导入：已扫描 {dir_count} 个目录，找到 {found} 个文件（{rate:.0f} 个/秒）")
+
+    @Slot(int, int, int, float, bool)
+    def _on_import_finished(self, job: int, found: int, error_count: int, elapsed: float, cancelled: bool):
+        if job != self._import_job:
+            return
+        self._import_job = 0
+        self.btn_import_img.setText("导入图片")
+        self.schedule_index_maintenance()
+        self.schedule_name_sort()
+        self.start_metadata_scan()
+        message = (f"{'导入已取消' if cancelled else '导入完成'}：新增 {self._import_added} 个文件，"
+                   f"跳过 {self._import_skipped} 个重复文件，用时 {elapsed:.1f} 秒（{found / max(elapsed, 1e-6):.0f} 个/秒）")
+        if error_count:
+            message += f"，{error_count} 个目录或文件无法读取"
+        self.statusMessageEmit.emit(message)
+
+    # --- 生成数据集 ---
+    def toggle_export(self):
+        """没有正在进行的导出时选择输出目录并开始导出，否则取消（断点保留，再次导出到同一目录时继续）。"""
+        if self._export_job:
+            self.export_worker.cancel(self._export_job)
+            return
+        counts = self.source_model.state_counts()
+        if not sum(counts.get(state, 0) for state in EXPORT_SPLITS):
+            QMessageBox.information(self, "生成数据集", "没有划分为训练集或验证集的文件。")
+            return
+        output_dir = QFileDialog.getExistingDirectory(self, "选择数据集输出目录")
+        if output_dir:
+            self.start_export(output_dir)
+
+    def start_export(self, output_dir: str, link_mode: str = LINK_MODE_LINK):
+        self._export_job_counter += 1
+        self._export_job = self._export_job_counter
+        self.btn_generate_dataset.setText("取消生成")
+        self.export_requested.emit(self._export_job, self.source_model.snapshot(), output_dir, link_mode)
+
+    @Slot(int, int, int)
+    def _on_export_started(self, job: int, done: int, total: int):
+        if job == self._export_job and done:
+            self.statusMessageEmit.emit(f"从断点继续生成数据集：已完成 {done} / {total} 个文件")
+
+    @Slot(int, int, int, float)
+    def _on_export_progress(self, job: int, done: int, total: int, rate: float):
+        if job == self._export_job:
+            self.statusMessageEmit.emit(f"正在生成数据集：{done} / {total} 个文件（{rate:.0f} 个/秒）")
+
+    @Slot(int, int, int, int, float, bool)
+    def _on_export_finished(self, job: int, exported: int, missing: int, errors: int, elapsed: float, cancelled: bool):
+        if job != self._export_job:
+            return
+        self._export_job = 0
+        self.btn_generate_dataset.setText("生成数据集")
+        message = (f"{'生成数据集已取消，再次导出到同一目录时从断点继续' if cancelled else '生成数据集完成'}："
+                   f"导出 {exported} 个文件，用时 {elapsed:.1f} 秒")
+        if missing:
+            message += f"，{missing} 个文件不存在或无法读取"
+        if errors:
+            message += f"，{errors} 个文件处理失败（标注或图片内容有误）"
+        self.statusMessageEmit.emit(message)
+
+    @Slot(int, str)
+    def _on_export_failed(self, job: int, error: str):
+        if job != self._export_job:
+            return
+        self._export_job = 0
+        self.btn_generate_dataset.setText("生成数据集")
+        QMessageBox.warning(self, "生成数据集", f"生成数据集失败：{error}")
+
+    # --- 预标注 ---
+    def toggle_auto_label(self):
+        """没有正在进行的预标注时对选中的文件开始预标注，否则取消当前任务。"""
+        if self._auto_label_job:
+            self.auto_label_worker.cancel(self._auto_label_job)
+            return
+        rows = self._selected_source_rows()
+        if not len(rows):
+            QMessageBox.information(self, "预标注", "请先选择要预标注的文件。")
+            return
+        self.start_auto_label(rows)
+
+    def start_auto_label(self, rows: np.ndarray, annotator=contour_annotator):
+        self._auto_label_job_counter += 1
+        self._auto_label_job = self._auto_label_job_counter
+        self.btn_auto_label.setText("取消预标注")
+        self.auto_label_requested.emit(self._auto_label_job, self.source_model.ids_at(rows),
+                                       self.source_model.paths_at(rows), annotator)
+
+    @Slot(int, object, object)
+    def _on_auto_label_batch(self, job: int, file_ids: list, label_lists: list):
+        """每批结果只做一次状态批量更新。"""
+        try:
+            if job != self._auto_label_job:
+                return
+            find_row = self.source_model.find_row_by_id
+            rows, label_types, present_ids = [], [], []
+            for file_id, labels in zip(file_ids, label_lists):
+                row = find_row(file_id)
+                # 处理期间被删除的文件直接跳过
+                if row >= 0:
+                    rows.append(row)
+                    label_types.append(primary_label_type(labels))
+                    present_ids.append(file_id)
+            if rows:
+                self.source_model.mark_annotated(np.array(rows, dtype=np.int64), label_types)
+                self.labelsChangedEmit.emit(present_ids)
+        finally:
+            self.auto_label_worker.batch_done()
+
+    @Slot(int, int, int, float)
+    def _on_auto_label_progress(self, job: int, done: int, total: int, rate: float):
+        if job == self._auto_label_job:
+            self.statusMessageEmit.emit(f"正在预标注：{done} / {total} 个文件（{rate:.1f} 个/秒）")
+
+    @Slot(int, object)
+    def _on_auto_label_finished(self, job: int, stats):
+        if job != self._auto_label_job:
+            return
+        self._auto_label_job = 0
+        self.btn_auto_label.setText("预标注")
+        processed = stats.annotated + stats.failed
+        message = (f"{'预标注已取消' if stats.cancelled else '预标注完成'}：{stats.annotated} / {stats.total} 个文件，"
+                   f"共 {stats.shapes} 个标注，用时 {stats.elapsed:.1f} 秒（{stats.files_per_second:.1f} 个/秒，"
+                   f"单个文件平均 {stats.annotate_seconds / max(processed, 1) * 1000:.0f} ms，"
+                   f"最长 {stats.slowest * 1000:.0f} ms）")
+        if stats.failed:
+            message += f"，{stats.failed} 个文件失败"
+        self.statusMessageEmit.emit(message)
+
+    # --- 图片信息预读 ---
+    def start_metadata_scan(self):
+        """为宽高尚未填充的文件预读图片信息；已有任务在进行时先取消。"""
+        if self._metadata_job:
+            self.metadata_worker.cancel(self._metadata_job)
+        self._metadata_job_counter += 1
+        self._metadata_job = self._metadata_job_counter
+        self.metadata_scan_requested.emit(self._metadata_job, self.source_model.snapshot(), default_cache_path())
+
+    @Slot(int, object, object, object, object)
+    def _on_metadata_chunk(self, job: int, snapshot, rows: np.ndarray, widths: np.ndarray, heights: np.ndarray):
+        if job == self._metadata_job:
+            self.source_model.set_image_sizes(snapshot, rows, widths, heights)
+
+    @Slot(int, int, int, float)
+    def _on_metadata_progress(self, job: int, done: int, total: int, rate: float):
+        if job == self._metadata_job:
+            self.statusMessageEmit.emit(f"正在读取图片信息：{done} / {total} 个文件（{rate:.0f} 个/秒）")
+
+    @Slot(int, int, int, int, int, float, bool, str)
+    def _on_metadata_finished(self, job: int, total: int, hits: int, reads: int, missing: int, elapsed: float,
+                              cancelled: bool, cache_error: str):
+        if job != self._metadata_job:
+            return
+        self._metadata_job = 0
+        if total and not cancelled:
+            message = (f"图片信息读取完成：缓存命中 {hits} 个，读取文件头 {reads} 个，"
+                       f"{missing} 个无法读取，用时 {elapsed:.1f} 秒")
+            if cache_error:
+                message += f"（缓存不可用，未使用缓存：{cache_error}）"
+            self.statusMessageEmit.emit(message)
+
     def closeEvent(self, event):
         """确保在关闭窗口时，后台线程能被安全地停止。"""
+        self.import_worker.cancel(self._import_job_counter)
+        self.import_thread.quit()
+        self.import_thread.wait()
+        self.export_worker.cancel(self._export_job_counter)
+        self.export_thread.quit()
+        self.export_thread.wait()
+        self.auto_label_worker.cancel(self._auto_label_job_counter)
+        self.auto_label_thread.quit()
+        self.auto_label_thread.wait()
+        self.auto_label_worker.shutdown()
+        self.metadata_worker.cancel(self._metadata_job_counter)
+        self.metadata_thread.quit()
+        self.metadata_thread.wait()
         self.filter_thread.quit()
         self.filter_thread.wait()
+        self.filter_worker.parallel_engine.shutdown()
         super().closeEvent(event)
 
     # --- 新增的槽函数 ---
@@ -159,12 +685,19 @@ class FileManager(QWidget):
         # 注意：现在数据被添加到源模型中
         print(f"Adding {count} items to FileManager...")
         states = ["未标注", "已标注", "训练集", "验证集"]
-        for i in range(count):
-            file_name = f"image_{self.source_model.rowCount() + 1:04d}.jpg"
-            state = random.choice(states)
-            color = train_color if state == "训练集" else val_color if state == "验证集" else QColor("black")
-            # 添加到源模型
-            self.source_model.add_item(FileDataStruct(file_name, state, color))
+        start = self.source_model.rowCount()
+
+        def generate_items():
+            for i in range(count):
+                file_name = f"image_{start + i + 1:04d}.jpg"
+                state = random.choice(states)
+                color = train_color if state == "训练集" else val_color if state == "验证集" else QColor("black")
+                yield FileDataStruct(file_name, state, color)
+
+        # 分批插入源模型，每批只触发一次插入信号，并在批次之间让出事件循环
+        self.source_model.add_items(generate_items(), chunk_size=INSERT_CHUNK_SIZE, yield_events=True)
+        self.schedule_index_maintenance()
+        self.schedule_name_sort()
         print("Done.")
 
     # --- 新增的槽函数 ---
@@ -179,43 +712,69 @@ class FileManager(QWidget):
 
     def show_context_menu(self, position):
         # 不需要修改，因为后续的操作会基于 selectionModel
-        if not self.view.selectionModel().hasSelection(): return
         menu = QMenu(self.view)
-        for state_name, config in STATE_CONFIG.items():
-            action = menu.addAction(config["text"])
-            action.triggered.connect(
-                lambda c=False, s=state_name, cl=config["color"]: self.change_selected_files_state(s, cl))
-        menu.addSeparator()
-        delete_action = menu.addAction("删除")
-        delete_action.triggered.connect(self.delete_selected_files)
+        if self.view.selectionModel().hasSelection():
+            for state_name, config in STATE_CONFIG.items():
+                action = menu.addAction(config["text"])
+                action.triggered.connect(
+                    lambda c=False, s=state_name, cl=config["color"]: self.change_selected_files_state(s, cl))
+            menu.addSeparator()
+            delete_action = menu.addAction("删除")
+            delete_action.triggered.connect(self.delete_selected_files)
+            menu.addSeparator()
+        # 自动划分作用于全部已标注的文件，与选中行无关
+        split_action = menu.addAction("自动划分训练集 / 验证集...")
+        split_action.triggered.connect(self.request_dataset_split)
         menu.exec(QCursor.pos())
 
+    def request_dataset_split(self):
+        val_ratio, ok = QInputDialog.getDouble(self, "自动划分", "验证集比例：", DEFAULT_VAL_RATIO, 0.0, 1.0, 2)
+        if ok:
+            self.split_dataset(val_ratio)
+
+    def split_dataset(self, val_ratio: float, seed: int = DEFAULT_SPLIT_SEED):
+        """按标签类别分层，把已标注的文件随机划分为训练集和验证集（同一种子结果相同）。"""
+        train_count, val_count = self.source_model.split_train_val(val_ratio, seed)
+        self.statusMessageEmit.emit(f"已划分：训练集 {train_count} 个，验证集 {val_count} 个（种子 {seed}）")
+
     def change_selected_files_state(self, new_state: str, new_color: QColor):
-        selected_indexes = self.view.selectionModel().selectedRows()
-        for proxy_index in selected_indexes:
-            # 将代理索引映射回源索引
-            source_index = self.proxy_model.mapToSource(proxy_index)
-            # 对源模型进行操作
-            self.source_model.update_item_state(source_index.row(), new_state, new_color)
-            file_data = self.source_model.get_item_by_row(source_index.row())
-            if file_data:
-                self.updateFileStateEmit.emit(file_data.id, new_state)
+        # 选中行一次性映射回源行号，批量修改：连续行只发射一次 dataChanged，变化的 id 一次性通知
+        source_rows = self._selected_source_rows()
+        changed_ids = self.source_model.update_rows_state(source_rows, new_state, new_color)
+        if changed_ids:
+            self.updateFileStateEmit.emit(changed_ids, new_state)
+
+    def neighbor_files(self, proxy_row: int, count: int) -> list[tuple[str, str]]:
+        """代理模型中给定行前后各 count 行的 (文件 id, 文件路径)，由近到远、同距离时先下后上。"""
+        row_count = self.proxy_model.rowCount()
+        proxy_rows = [row for distance in range(1, count + 1) for row in (proxy_row + distance, proxy_row - distance)
+                      if 0 <= row < row_count]
+        if not proxy_rows:
+            return []
+        source_rows = self.proxy_model.map_rows_to_source(np.array(proxy_rows, dtype=np.int64))
+        return list(zip(self.source_model.ids_at(source_rows), self.source_model.paths_at(source_rows)))
+
+    def _selected_source_rows(self) -> np.ndarray:
+        """当前选中行对应的源行号，按选区范围整体映射，不为每个选中单元格创建索引。"""
+        selection = self.view.selectionModel().selection()
+        if selection.isEmpty():
+            return np.empty(0, dtype=np.int64)
+        proxy_rows = np.concatenate([np.arange(r.top(), r.bottom() + 1, dtype=np.int64) for r in selection])
+        return self.proxy_model.map_rows_to_source(proxy_rows)
 
     def delete_selected_files(self):
-        selected_proxy_indexes = self.view.selectionModel().selectedRows()
-        # 将代理行号列表转换为源行号列表
-        source_rows_to_delete = [self.proxy_model.mapToSource(idx).row() for idx in selected_proxy_indexes]
-        self._confirm_and_delete_files(source_rows_to_delete)
+        # 选区按范围整体映射为源行号（多个选区可能重叠，去重）
+        self._confirm_and_delete_files(np.unique(self._selected_source_rows()))
 
-    def _confirm_and_delete_files(self, source_rows: list):
-        # 这个函数现在接收的是源模型的行号列表，逻辑无需大改
+    def _confirm_and_delete_files(self, source_rows):
+        """source_rows 为源模型行号（列表或 NumPy 数组），确认后批量删除。"""
+        source_rows = np.asarray(source_rows, dtype=np.int64).tolist()
         if not source_rows: return
         message = (f"确定要删除文件 '{self.source_model.get_item_by_row(source_rows[0]).file_image_name}' 吗？" if len(
             source_rows) == 1
                    else f"确定要删除选中的 {len(source_rows)} 个文件吗？")
         if QMessageBox.question(self, "删除确认", message, QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-            ids_to_delete = [self.source_model.get_item_by_row(row).id for row in source_rows]
-            # 对源模型进行删除操作
-            for row in sorted(source_rows, reverse=True):
-                self.source_model.remove_item_by_row(row)
+            # 对源模型进行批量删除：连续行合并为区间，一次性删除
+            removed_items = self.source_model.remove_rows(source_rows)
+            ids_to_delete = [item.id for item in removed_items]
             if ids_to_delete: self.deleteFileItemEmit.emit(ids_to_delete)
\ No newline at end of file
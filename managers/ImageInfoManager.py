@@ -23,9 +23,9 @@ class ImageInfoManager(QWidget):
         self._init_ui()
 
     def _init_model_view(self):
-        headers = ["图片名称", "项目类别", "图片分辨率"]
+        headers = ["图片名称", "项目类别", "图片分辨率", "图片格式", "文件大小", "EXIF 方向"]
         self.model = ImageInfoModel(headers=headers)
-        self.view = BaseTableView(column_width_ratios=[1, 1, 1])
+        self.view = BaseTableView(column_width_ratios=[3, 1, 1, 1, 1, 1])
         self.view.setModel(self.model)
 
     def _init_ui(self):
@@ -33,17 +33,16 @@ class ImageInfoManager(QWidget):
         layout.setContentsMargins(9, 9, 9, 9)
         layout.addWidget(self.view)
 
+    @staticmethod
+    def info_from_metadata(file_image_name: str, project_category: str, meta) -> ImageInfoDataStruct:
+        """由图片文件头（或磁盘缓存）读到的 ImageMetadata 构造图片信息；为 None（文件无法读取）时分辨率显示为“未知”。"""
+        if meta is None:
+            return ImageInfoDataStruct(file_image_name, project_category, "未知")
+        return ImageInfoDataStruct(file_image_name, project_category, meta.resolution, image_format=meta.format,
+                                   file_size=meta.file_size, orientation=meta.orientation)
+
     def display_info(self, info: ImageInfoDataStruct):
-        self.model.clear()
-
-        if info:
-            self.model.add_item(
-                ImageInfoDataStruct(
-                    file_image_name = info.file_image_name,
-                    project_category = "实例分割",
-                    file_image_resolution = "1920x1080"
-                )
-            )
+        self.model.replace_all([info] if info else [], diff=True)
 
     def clear_info(self):
         self.model.clear()
\ No newline at end of file
@@ -11,19 +11,28 @@
 # managers/LabelInfoManager.py
 
 from PySide6.QtWidgets import QWidget, QVBoxLayout
-from PySide6.QtCore import Signal, QModelIndex, Qt
+from PySide6.QtCore import Signal, QModelIndex, Qt, QThread
 from models.LabelInfoModel import LabelInfoModel, COL_LBL_OP
 from views.BaseTableView import BaseTableView
 from delegates.CustomDelegate import CustomDelegate
 from data.TableDataStruct import LabelInfoDataStruct
+from data.LabelCache import LabelCache
+from workers.LabelLoader import LabelLoader
+
+# 选中行变化时，向前、向后各预取的行数（按代理模型中的显示顺序）
+LABEL_PREFETCH_ROWS = 8
 
 
 class LabelInfoManager(QWidget):
     visibilityChanged = Signal(str, bool)
+    prefetch_requested = Signal(int, object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        # 预取请求号，选中行每变化一次递增
+        self._prefetch_generation = 0
         self._init_model_view()
+        self._init_label_loader()
         self._init_ui()
         self._connect_signals()
 
@@ -35,6 +44,14 @@ class LabelInfoManager(QWidget):
         self.view.setModel(self.model)
         self.view.setItemDelegateForColumn(COL_LBL_OP, self.delegate)
 
+    def _init_label_loader(self):
+        """标签缓存由详情加载线程和预取线程共用：前者读取当前文件，后者预取相邻文件。"""
+        self.label_cache = LabelCache()
+        self.loader_thread = QThread()
+        self.label_loader = LabelLoader(self.label_cache)
+        self.label_loader.moveToThread(self.loader_thread)
+        self.loader_thread.start()
+
     def _init_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(9, 9, 9, 9)
@@ -42,6 +59,7 @@ class LabelInfoManager(QWidget):
 
     def _connect_signals(self):
         self.view.clicked.connect(self.on_view_clicked)
+        self.prefetch_requested.connect(self.label_loader.prefetch)
 
     def on_view_clicked(self, index: QModelIndex):
         if index.isValid() and index.column() == COL_LBL_OP:
@@ -51,12 +69,27 @@ class LabelInfoManager(QWidget):
                 if label_data:
                     self.visibilityChanged.emit(label_data.id, new_visibility)
 
+    def prefetch(self, files: list[tuple[str, str]]):
+        """在后台预取给定文件（(文件 id, 路径)，由近到远）的标签，之前尚未完成的预取被取代。"""
+        self._prefetch_generation += 1
+        self.label_loader.cancel_before(self._prefetch_generation)
+        self.prefetch_requested.emit(self._prefetch_generation, files)
+
+    def invalidate(self, file_ids: list[str]):
+        """文件被删除或重新标注后，丢弃其缓存的标签。"""
+        self.label_cache.invalidate(file_ids)
+
     def set_labels(self, labels: list[LabelInfoDataStruct]):
-        self.model.clear()
-        for label in labels:
-            self.model.add_item(label)
+        # 相邻文件的标签大多相同：差异更新，保留滚动位置与选中行
+        self.model.replace_all(labels, diff=True)
 
     def clear_labels(self):
         self.model.clear()
 
+    def closeEvent(self, event):
+        self.label_loader.cancel_before(self._prefetch_generation + 1)
+        self.loader_thread.quit()
+        self.loader_thread.wait()
+        super().closeEvent(event)
+
 
@@ -62,8 +62,7 @@ class LabelTypeManager(QWidget):
 
     def _add_initial_types(self):
         initial = [("person", "#e74c3c"), ("car", "#3498db"), ("tree", "#2ecc71")]
-        for name, color_hex in initial:
-            self.model.add_item(LabelTypeDataStruct(name, QColor(color_hex)))
+        self.model.add_items(LabelTypeDataStruct(name, QColor(color_hex)) for name, color_hex in initial)
 
     # --- 槽函数和交互逻辑 ---
 
@@ -10,17 +10,39 @@
 
 # models/BaseTableModel.py
 
-from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from itertools import islice
+
+from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, QCoreApplication
+
+# 批量删除时，连续区间数超过该值则改为一次模型重置 + 一次线性压缩
+MAX_REMOVE_RANGES = 64
+
+# 差异更新：新旧列表的相似度低于该值，或需要的增删区间数超过 MAX_REMOVE_RANGES 时，改为一次模型重置
+MIN_DIFF_SIMILARITY = 0.5
+
 
 class BaseTableModel(QAbstractTableModel):
     """
     通用的模型基类，封装了数据存储和与视图交互的基础逻辑。
     正确处理begin/end信号，确保视图高效更新。
     """
+    # 存储是否实现了差异更新所需的 _replace_rows / _insert_rows；为 False 时 replace_all(diff=True) 退回一次重置
+    supports_diff = True
+
     def __init__(self, data_list=None, headers=None, parent=None):
         super().__init__(parent)
         self._data = data_list if data_list is not None else []
         self._headers = headers if headers is not None else []
+        # id -> 行号 索引：
+        # 每行在插入时分配一个严格递增的序号(serial)，_serials 与 _data 一一对应且保持升序；
+        # 删除行时只需和 _data 一起压缩 _serials，字典中其余条目无需改动（不做全量重建），
+        # 查询时由 serial 在 _serials 中定位当前行号。
+        self._id_to_serial = {}
+        self._serials = []
+        self._next_serial = 0
+        self._reset_rows(self._data)
 
     def rowCount(self, parent=QModelIndex()):
         return len(self._data)
@@ -46,26 +68,259 @@ class BaseTableModel(QAbstractTableModel):
         return None
 
     def add_item(self, item_data):
+        self._check_rows([item_data])
         self.beginInsertRows(QModelIndex(), self.rowCount(), self.rowCount())
-        self._data.append(item_data)
+        self._append_rows([item_data])
         self.endInsertRows()
 
+    def add_items(self, items, chunk_size: int = 0, yield_events: bool = False) -> int:
+        """
+        批量追加数据项，每一批只发射一对 begin/endInsertRows。
+        - items: 任意可迭代对象，可以是生成器，不会被提前整体展开。
+        - chunk_size: 每批插入的行数；<= 0 表示一次性插入全部数据。
+        - yield_events: 每批插入后是否让出事件循环，保持界面响应。
+        返回实际插入的行数。
+        """
+        iterator = iter(items)
+        total = 0
+        while True:
+            chunk = list(iterator) if chunk_size <= 0 else list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            self._check_rows(chunk)
+            first = self.rowCount()
+            self.beginInsertRows(QModelIndex(), first, first + len(chunk) - 1)
+            self._append_rows(chunk)
+            self.endInsertRows()
+            total += len(chunk)
+            if chunk_size <= 0:
+                break
+            if yield_events:
+                QCoreApplication.processEvents()
+        return total
+
+    # 与 list.extend 保持一致的别名
+    extend = add_items
+
     def remove_item_by_row(self, row):
         if 0 <= row < self.rowCount():
             self.beginRemoveRows(QModelIndex(), row, row)
-            del self._data[row]
+            self._delete_rows_range(row, row)
             self.endRemoveRows()
             return True
         return False
 
+    def remove_rows(self, rows) -> list:
+        """
+        批量删除多行，返回被删除的数据项（按行号升序）。
+        - 行号先被合并为连续区间，每个区间只发射一对 begin/endRemoveRows，
+          并按从后往前的顺序删除，保证前面区间的行号不受影响。
+        - 区间过于零散时，改为一次模型重置，并在一次线性遍历中压缩数据，避免反复搬移列表。
+        """
+        row_count = self.rowCount()
+        sorted_rows = sorted({row for row in rows if 0 <= row < row_count})
+        if not sorted_rows:
+            return []
+
+        removed_items = self._take_rows(sorted_rows)
+        ranges = self._coalesce_ranges(sorted_rows)
+        if len(ranges) > MAX_REMOVE_RANGES:
+            self.beginResetModel()
+            self._compact_rows(sorted_rows)
+            self.endResetModel()
+        else:
+            for first, last in reversed(ranges):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                self._delete_rows_range(first, last)
+                self.endRemoveRows()
+        return removed_items
+
+    @staticmethod
+    def _coalesce_ranges(sorted_rows: list) -> list[tuple[int, int]]:
+        """把升序行号合并为 [(first, last), ...] 形式的连续闭区间。"""
+        ranges = []
+        first = last = sorted_rows[0]
+        for row in sorted_rows[1:]:
+            if row == last + 1:
+                last = row
+                continue
+            ranges.append((first, last))
+            first = last = row
+        ranges.append((first, last))
+        return ranges
+
     def find_row_by_id(self, item_id):
-        for i, item in enumerate(self._data):
-            # 确保item有id属性
-            if hasattr(item, 'id') and item.id == item_id:
-                return i
-        return -1
+        serial = self._id_to_serial.get(item_id)
+        if serial is None:
+            return -1
+        serials = self._serials
+        # 快速路径：没有产生过空洞时，序号与行号只差一个固定偏移
+        if serials[-1] - serials[0] == len(serials) - 1:
+            return serial - serials[0]
+        row = bisect_left(serials, serial)
+        return row if row < len(serials) and serials[row] == serial else -1
 
     def clear(self):
         self.beginResetModel()
-        self._data = []
-        self.endResetModel()
\ No newline at end of file
+        self._reset_rows([])
+        self.endResetModel()
+
+    def replace_all(self, items: list, diff: bool = False):
+        """
+        用新的数据列表整体替换当前数据。
+        - 默认只发射一对 begin/endResetModel（而不是一次重置再加 N 次插入）；
+        - diff=True 时按 _diff_key 对比新旧列表，相同的行原位替换（每段一次 dataChanged），其余按区间增删，
+          视图的滚动位置和选中行得以保留；两者差别过大、或存储不支持差异更新（supports_diff 为 False）时仍退回一次重置。
+        差异更新经由存储钩子 _replace_rows / _insert_rows / _delete_rows_range 完成，id 索引只更新变化的区间。
+        """
+        items = list(items)
+        # 两条路径都先校验：不合法时不发射任何信号，模型保持不变
+        self._check_rows(items)
+        if diff and self.supports_diff and self._data and items:
+            old_keys = [self._diff_key(item) for item in self._data]
+            new_keys = [self._diff_key(item) for item in items]
+            matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+            opcodes = matcher.get_opcodes()
+            if (sum(tag != "equal" for tag, *_ in opcodes) <= MAX_REMOVE_RANGES
+                    and matcher.ratio() >= MIN_DIFF_SIMILARITY):
+                self._apply_diff(opcodes, items)
+                return
+        self.beginResetModel()
+        self._reset_rows(items)
+        self.endResetModel()
+
+    def _diff_key(self, item):
+        """差异更新时判断新旧两行是否对应同一条目的键，默认为 id；没有 id 的数据项按位置一一对应。"""
+        return getattr(item, 'id', None)
+
+    def _apply_diff(self, opcodes: list, items: list):
+        """从后往前应用 SequenceMatcher 的操作码，保证前面区间的行号不受影响。"""
+        last_column = max(self.columnCount() - 1, 0)
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            common = min(i2 - i1, j2 - j1)
+            if common:
+                # 键相同（或成对替换）的行原位换成新数据项，一段只发射一次 dataChanged
+                self._replace_rows(i1, items[j1:j1 + common])
+                self.dataChanged.emit(self.index(i1, 0), self.index(i1 + common - 1, last_column))
+            if i2 - i1 > common:
+                self.beginRemoveRows(QModelIndex(), i1 + common, i2 - 1)
+                self._delete_rows_range(i1 + common, i2 - 1)
+                self.endRemoveRows()
+            elif j2 - j1 > common:
+                self.beginInsertRows(QModelIndex(), i1 + common, i1 + j2 - j1 - 1)
+                self._insert_rows(i1 + common, items[j1 + common:j2])
+                self.endInsertRows()
+
+    # --- 存储钩子 ---
+    # 以下方法只负责修改底层存储和 id 索引，不发射任何信号，由上面的公共API包裹在 begin/end 调用之间。
+    # 使用其他存储结构的子类（如列式存储）只需重写这些方法。
+    def _check_rows(self, items: list):
+        """
+        在 beginInsertRows 之前校验即将追加的数据项，不合法时抛出异常。
+        _append_rows 在 begin/end 之间被调用，在那里抛出异常会让视图停留在插入到一半的状态。
+        """
+
+    def _append_rows(self, items: list):
+        self._data.extend(items)
+        self._index_items(items)
+
+    def _replace_rows(self, first: int, items: list):
+        """把从 first 开始的 len(items) 行原位换成新数据项，各行保留原来的序号。"""
+        last = first + len(items)
+        serials = self._serials[first:last]
+        self._unindex_items(self._data[first:last], serials)
+        self._data[first:last] = items
+        self._register_ids(items, serials)
+
+    def _insert_rows(self, row: int, items: list):
+        """在 row 之前插入数据项：在相邻两行的序号之间分配新序号，空隙不够时只移动较短一侧的序号。"""
+        serials = self._serials
+        count = len(items)
+        if row == len(serials):
+            self._append_rows(items)
+            return
+        if row == 0:
+            first_serial = serials[0] - count
+        else:
+            missing = count - (serials[row] - serials[row - 1] - 1)
+            if missing > 0:
+                if row <= len(serials) - row:
+                    self._shift_serials(row - 1, -1, -missing)
+                else:
+                    self._shift_serials(row, 1, missing)
+            first_serial = serials[row - 1] + 1
+        new_serials = list(range(first_serial, first_serial + count))
+        self._data[row:row] = items
+        serials[row:row] = new_serials
+        self._register_ids(items, new_serials)
+
+    def _take_rows(self, sorted_rows: list) -> list:
+        """返回给定行的数据项，删除之后仍然可用。"""
+        return [self._data[row] for row in sorted_rows]
+
+    def _delete_rows_range(self, first: int, last: int):
+        self._unindex_items(self._data[first:last + 1], self._serials[first:last + 1])
+        del self._data[first:last + 1]
+        del self._serials[first:last + 1]
+
+    def _compact_rows(self, sorted_rows: list):
+        """一次线性遍历，剔除给定的行。"""
+        removed = set(sorted_rows)
+        self._unindex_items([self._data[row] for row in sorted_rows], [self._serials[row] for row in sorted_rows])
+        self._data = [item for i, item in enumerate(self._data) if i not in removed]
+        self._serials = [serial for i, serial in enumerate(self._serials) if i not in removed]
+
+    def _reset_rows(self, items: list):
+        self._data = items
+        self._rebuild_id_index()
+
+    # --- id 索引维护 ---
+    def _rebuild_id_index(self):
+        """仅在构造和整体重置时调用：为当前全部数据重新分配序号。"""
+        self._id_to_serial = {}
+        self._serials = []
+        self._next_serial = 0
+        self._index_items(self._data)
+
+    def _index_items(self, items):
+        """为新追加到末尾的数据项分配序号并登记 id。"""
+        first_serial = self._next_serial
+        self._next_serial += len(items)
+        self._serials.extend(range(first_serial, self._next_serial))
+        self._register_ids(items, range(first_serial, self._next_serial))
+
+    def _register_ids(self, items, serials):
+        for item, serial in zip(items, serials):
+            item_id = getattr(item, 'id', None)
+            if item_id is not None:
+                self._id_to_serial[item_id] = serial
+
+    def _shift_serials(self, row: int, step: int, delta: int):
+        """
+        从 row 开始沿 step 方向（1 向后，-1 向前）把序号移动 delta，为插入腾出空隙；
+        遇到足够大的空隙即停止，只有被移动的行需要更新 id 索引。
+        """
+        serials = self._serials
+        while 0 <= row < len(serials) and delta:
+            old_serial = serials[row]
+            serials[row] = old_serial + delta
+            item_id = getattr(self._data[row], 'id', None)
+            if item_id is not None and self._id_to_serial.get(item_id) == old_serial:
+                self._id_to_serial[item_id] = serials[row]
+            following = row + step
+            if not 0 <= following < len(serials):
+                break
+            # 下一行仍与移动后的序号冲突的部分
+            overlap = (serials[row] - serials[following] + 1) if step > 0 else (serials[following] - serials[row] + 1)
+            delta = max(overlap, 0) * (1 if step > 0 else -1)
+            row = following
+        if serials and serials[-1] >= self._next_serial:
+            self._next_serial = serials[-1] + 1
+
+    def _unindex_items(self, items, serials):
+        """从 id 索引中移除即将被删除的数据项。"""
+        for item, serial in zip(items, serials):
+            item_id = getattr(item, 'id', None)
+            # 只移除确实指向该行的条目，避免误删重复 id 的其他行
+            if item_id is not None and self._id_to_serial.get(item_id) == serial:
+                del self._id_to_serial[item_id]
\ No newline at end of file
@@ -2,41 +2,465 @@
 # -*- coding: UTF-8 -*-
 
 '''
-@Project ：tableview_py_demo 
+@Project ：tableview_py_demo
 @File    ：FileFilterProxyModel.py
 @Author  ：fengzhengxiong
-@Date    ：2025/7/23 16:09 
+@Date    ：2025/7/23 16:09
 '''
 
-# models/FileFilterProxyModel.py (重构后)
+# models/FileFilterProxyModel.py (基于预计算映射的代理模型)
 
-from PySide6.QtCore import QSortFilterProxyModel, QModelIndex
+import numpy as np
+from PySide6.QtCore import QAbstractProxyModel, QModelIndex, Qt
 
-class FileFilterProxyModel(QSortFilterProxyModel):
+# 数据变化导致的增删区间数超过该值时，改为一次代理模型重置
+MAX_INCREMENTAL_RANGES = 64
+
+
+class FileFilterProxyModel(QAbstractProxyModel):
     """
     一个被动接收过滤结果的代理模型。
+    过滤结果（升序的源行号数组）直接作为 代理行 -> 源行 的映射：
+    - mapToSource 是一次数组下标访问，mapFromSource 是一次二分查找；
+    - 应用新的过滤结果只需替换映射数组，不会对每个源行回调 Python 的 filterAcceptsRow；
+    - 源模型的插入 / 删除 / 数据变化按区间增量转换为代理模型的信号，代价与命中行数成正比。
+    设置结果时可同时给出产生该结果的判定条件（如 data/FileQuery.py 中的 QueryPlan），此后过滤结果被增量维护：
+    新插入的行只对新行求值，删除只平移行号，数据变化只重新求值变化的行，任何修改都不会触发全量扫描。
+    结果也可以按给定顺序（例如模糊搜索的得分顺序）显示，此时 mapFromSource 通过按需建立的反向索引查找。
+    表头排序（sort）使用源模型增量维护的排序置换（sort_order）：映射 = 排序置换中被接受的行，
+    一次向量化的掩码运算即可完成，与过滤结果任意组合，不会回调 Python 的 lessThan。
     """
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        # 初始状态下，不过滤任何东西
-        self.accepted_rows = None
+        # None 表示不过滤，代理行与源行一一对应
+        self._rows: np.ndarray | None = None
+        # 产生当前结果的判定条件，为 None 时新插入的行一律不被接受
+        self._predicate = None
+        # 映射是否按源行号升序；为 False 时按给定顺序显示
+        self._ascending = True
+        # 是否不过滤（接受全部源行）；不过滤但排序时，映射为完整的排序置换
+        self._accept_all = True
+        # 结果是否按给定顺序（如模糊搜索得分）显示
+        self._ranked = False
+        # 排序列（-1 表示不排序）和方向，以及映射所依据的源模型排序版本
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._sort_version = 0
+        # 非升序映射的反向索引 (升序的源行号, 对应的代理行号)，映射变化后置空、按需重建
+        self._inverse = None
+        # 源模型重置期间暂存的映射（以插入序号表示），重置完成后映射回新的行号
+        self._pending_serials = None
+
+    @property
+    def accepted_rows(self) -> np.ndarray | None:
+        """当前接受的源行号（按显示顺序），不过滤时为 None。"""
+        return None if self._accept_all else self._rows
+
+    @property
+    def predicate(self):
+        return self._predicate
+
+    @property
+    def ascending(self) -> bool:
+        return self._ascending
 
-    def set_accepted_rows(self, accepted_rows: set):
+    def set_accepted_rows(self, accepted_rows, predicate=None, ordered: bool = False):
         """
-        从外部设置可接受的行号集合。
+        从外部设置可接受的源行号（任意可迭代对象或 NumPy 数组），None 表示显示全部。
+        - predicate: 产生该结果的判定条件，用于之后增量维护结果。
+        - ordered: 为 True 时按给定顺序显示（行号不能重复），同时取消表头排序；否则按源行号升序或当前排序列显示。
         """
-        self.accepted_rows = accepted_rows
-        # 关键：通知视图过滤器已改变，需要刷新
-        self.invalidateFilter()
+        self.beginResetModel()
+        self._predicate = predicate if accepted_rows is not None else None
+        self._accept_all = accepted_rows is None
+        self._ranked = ordered and accepted_rows is not None
+        if self._ranked:
+            self._sort_column = -1
+        self._ascending = not self._ranked and self._sort_column < 0
+        self._inverse = None
+        if accepted_rows is None:
+            self._rows = None
+        else:
+            # 复制一份：插入/删除源行时会原位平移行号，不能改动调用方（如过滤线程）持有的数组
+            rows = np.array(accepted_rows if not isinstance(accepted_rows, (set, frozenset)) else list(accepted_rows),
+                            dtype=np.int64, copy=True)
+            # 结果通常已经有序，此时跳过排序
+            if not ordered and len(rows) > 1 and not (rows[1:] > rows[:-1]).all():
+                rows = np.sort(rows)
+                rows = rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+            self._rows = rows
+        if self._sort_column >= 0:
+            self._sort_version = self.sourceModel().sort_version(self._sort_column)
+            self._rows = self._sorted_rows(self._rows)
+        self.endResetModel()
 
-    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+    # --- 排序 ---
+    def sort(self, column: int, order=Qt.AscendingOrder):
         """
-        核心过滤逻辑变得极其高效。
+        按列排序（由开启了排序的视图在点击表头时调用），column 为 -1 时恢复不排序的顺序。
+        只是按源模型的排序置换重新排列当前映射，行集合不变，以 layoutChanged 通知视图，选区随之移动。
+        """
+        source_model = self.sourceModel()
+        if source_model is None or not hasattr(source_model, "sort_order"):
+            return
+        if column >= 0 and source_model.sort_order(column) is None:
+            return
+        if column == self._sort_column and (column < 0 or order == self._sort_order):
+            return
+        self._sort_column, self._sort_order = column, order
+        if column >= 0:
+            self._sort_version = source_model.sort_version(column)
+            self._reorder(self._sorted_rows(None if self._accept_all else self._rows))
+        elif self._accept_all:
+            self._reorder(None)
+        elif self._ranked:
+            # 得分顺序无法恢复，保持当前顺序
+            return
+        else:
+            self._reorder(np.sort(self._rows))
+
+    def _sorted_rows(self, members: np.ndarray | None) -> np.ndarray:
+        """把给定的源行（None 表示全部源行）按当前排序列排列，返回新数组。"""
+        source_model = self.sourceModel()
+        order = source_model.sort_order(self._sort_column)
+        if self._sort_order == Qt.DescendingOrder:
+            order = order[::-1]
+        if members is None:
+            return order.copy()
+        mask = np.zeros(source_model.rowCount(), dtype=bool)
+        mask[members] = True
+        return order[mask[order]]
+
+    def _reorder(self, rows: np.ndarray | None):
+        """行集合不变、只改变顺序：替换映射并把持久索引（选区、当前项）移到新位置。"""
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        source_rows = self.map_rows_to_source([index.row() for index in old_indexes])
+        self._rows = rows
+        self._ascending = rows is None or (self._sort_column < 0 and not self._ranked)
+        self._inverse = None
+        if rows is None:
+            proxy_rows = source_rows
+        else:
+            positions = np.full(self.sourceModel().rowCount(), -1, dtype=np.int64)
+            positions[rows] = np.arange(len(rows))
+            proxy_rows = positions[source_rows]
+        new_indexes = [self.index(row, index.column()) if row >= 0 else QModelIndex()
+                       for index, row in zip(old_indexes, proxy_rows.tolist())]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def _merge_rows(self, rows: np.ndarray):
         """
-        # 如果没有设置过滤集合（例如，搜索框为空），则显示所有行
-        if self.accepted_rows is None:
-            return True
+        把映射改为 rows：两者共有的行相对顺序不变，只有行的加入 / 离开，
+        转换为逐段的删除 / 插入信号；段数过多时改为一次重置。
+        """
+        count = self.sourceModel().rowCount()
+        in_new = np.zeros(count, dtype=bool)
+        in_new[rows] = True
+        in_old = np.zeros(count, dtype=bool)
+        in_old[self._rows] = True
+        leaving_ranges = self._runs(np.flatnonzero(~in_new[self._rows]))
+        joining_ranges = self._runs(np.flatnonzero(~in_old[rows]))
+        self._inverse = None
+        if len(leaving_ranges) + len(joining_ranges) > MAX_INCREMENTAL_RANGES:
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+            return
+        for a, b in reversed(leaving_ranges):
+            self.beginRemoveRows(QModelIndex(), a, b)
+            self._rows = np.concatenate((self._rows[:a], self._rows[b + 1:]))
+            self.endRemoveRows()
+        # 删除之后的映射就是 rows 去掉新加入的行，按位置升序插入即可
+        for a, b in joining_ranges:
+            self.beginInsertRows(QModelIndex(), a, b)
+            self._rows = np.concatenate((self._rows[:a], rows[a:b + 1], self._rows[a:]))
+            self.endInsertRows()
+
+    def map_rows_to_source(self, proxy_rows: np.ndarray) -> np.ndarray:
+        """批量把代理行号映射为源行号。"""
+        proxy_rows = np.asarray(proxy_rows, dtype=np.int64)
+        if self._rows is None:
+            return proxy_rows
+        return self._rows[proxy_rows]
+
+    # --- 源模型 ---
+    def setSourceModel(self, source_model):
+        old_model = self.sourceModel()
+        if old_model is not None:
+            for signal, slot in self._source_connections(old_model):
+                signal.disconnect(slot)
+        self.beginResetModel()
+        super().setSourceModel(source_model)
+        self._rows = None
+        self._predicate = None
+        self._ascending = True
+        self._accept_all = True
+        self._ranked = False
+        self._sort_column = -1
+        self._inverse = None
+        if source_model is not None:
+            for signal, slot in self._source_connections(source_model):
+                signal.connect(slot)
+        self.endResetModel()
+
+    def _source_connections(self, model):
+        return [
+            (model.rowsAboutToBeInserted, self._on_rows_about_to_be_inserted),
+            (model.rowsInserted, self._on_rows_inserted),
+            (model.rowsAboutToBeRemoved, self._on_rows_about_to_be_removed),
+            (model.rowsRemoved, self._on_rows_removed),
+            (model.dataChanged, self._on_data_changed),
+            (model.headerDataChanged, self.headerDataChanged),
+            (model.modelAboutToBeReset, self._on_model_about_to_be_reset),
+            (model.modelReset, self._on_model_reset),
+            (model.layoutAboutToBeChanged, self._on_model_about_to_be_reset),
+            (model.layoutChanged, self._on_model_reset),
+        ]
+
+    # --- 映射 ---
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        source_model = self.sourceModel()
+        if source_model is None or not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row()
+        if self._rows is not None:
+            row = int(self._rows[row])
+        return source_model.index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self._proxy_row(source_index.row())
+        if row < 0:
+            return QModelIndex()
+        return self.createIndex(row, source_index.column())
+
+    def _proxy_row(self, source_row: int) -> int:
+        """源行号对应的代理行号，未被接受时返回 -1。"""
+        if self._rows is None:
+            return source_row
+        if self._ascending:
+            sorted_rows, positions = self._rows, None
+        else:
+            if self._inverse is None:
+                order = np.argsort(self._rows, kind="stable")
+                self._inverse = (self._rows[order], order)
+            sorted_rows, positions = self._inverse
+        pos = int(np.searchsorted(sorted_rows, source_row))
+        if pos < len(sorted_rows) and sorted_rows[pos] == source_row:
+            return pos if positions is None else int(positions[pos])
+        return -1
+
+    def _proxy_positions(self, first: int, last: int) -> np.ndarray:
+        """非升序映射中，源行落在 [first, last] 内的代理行号（升序）。"""
+        return np.flatnonzero((self._rows >= first) & (self._rows <= last))
+
+    def _proxy_range(self, first: int, last: int) -> tuple[int, int]:
+        """源行闭区间 [first, last] 对应的代理行半开区间 [lo, hi)。"""
+        if self._rows is None:
+            return first, last + 1
+        lo = int(np.searchsorted(self._rows, first, side="left"))
+        hi = int(np.searchsorted(self._rows, last, side="right"))
+        return lo, hi
+
+    # --- QAbstractItemModel 接口 ---
+    def index(self, row: int, column: int, parent=QModelIndex()) -> QModelIndex:
+        if parent.isValid() or not (0 <= row < self.rowCount()) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            # 无参数调用时保持 QObject.parent() 的语义
+            return super().parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        if self._rows is None:
+            return self.sourceModel().rowCount()
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        return self.sourceModel().data(self.mapToSource(index), role)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        return super().headerData(section, orientation, role)
+
+    # --- 源模型信号的增量转换 ---
+    def _on_rows_about_to_be_inserted(self, parent, first, last):
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_rows_inserted(self, parent, first, last):
+        if self._rows is None:
+            self.endInsertRows()
+            return
+        # 先平移插入点之后的源行号，再只对新行求值
+        count = last - first + 1
+        self._rows[self._rows >= first] += count
+        self._inverse = None
+        if self._accept_all:
+            accepted = np.arange(first, last + 1, dtype=np.int64)
+        elif self._predicate is None:
+            return
+        else:
+            accepted = np.flatnonzero(self.sourceModel().evaluate_rows(self._predicate, first, last + 1)) + first
+        if len(accepted) and self._sort_column >= 0:
+            # 排序显示时，新行按源模型的排序置换（已包含新行）落到各自的位置
+            self._merge_rows(self._sorted_rows(np.concatenate((self._rows, accepted))))
+        elif len(accepted) and not self._ascending:
+            # 按给定顺序显示时，新接受的行追加在末尾
+            pos = len(self._rows)
+            self.beginInsertRows(QModelIndex(), pos, pos + len(accepted) - 1)
+            self._rows = np.concatenate((self._rows, accepted))
+            self.endInsertRows()
+        elif len(accepted):
+            # 新行在源模型中连续，被接受的部分在代理中也落在同一个插入点
+            pos = int(np.searchsorted(self._rows, first))
+            self.beginInsertRows(QModelIndex(), pos, pos + len(accepted) - 1)
+            self._rows = np.concatenate((self._rows[:pos], accepted, self._rows[pos:]))
+            self.endInsertRows()
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if self._rows is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            return
+        if not self._ascending:
+            # 被删除的源行在代理中可能分散在多处，逐段删除（从后往前）
+            for a, b in reversed(self._runs(self._proxy_positions(first, last))):
+                self.beginRemoveRows(QModelIndex(), a, b)
+                self._rows = np.concatenate((self._rows[:a], self._rows[b + 1:]))
+                self._inverse = None
+                self.endRemoveRows()
+            return
+        lo, hi = self._proxy_range(first, last)
+        if hi > lo:
+            # 被删除的源行在代理中是连续的一段，源数据尚未变化，这里直接完成代理侧的删除
+            self.beginRemoveRows(QModelIndex(), lo, hi - 1)
+            self._rows = np.concatenate((self._rows[:lo], self._rows[hi:]))
+            self.endRemoveRows()
+
+    def _on_rows_removed(self, parent, first, last):
+        if self._rows is None:
+            self.endRemoveRows()
+            return
+        count = last - first + 1
+        if not self._ascending:
+            self._rows[self._rows > last] -= count
+            self._inverse = None
+            return
+        lo = int(np.searchsorted(self._rows, last, side="right"))
+        self._rows[lo:] -= count
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        first, last = top_left.row(), bottom_right.row()
+        if self._sort_column >= 0:
+            self._resort_rows(first, last)
+        if not self._ascending:
+            positions = self._proxy_positions(first, last)
+            if len(positions):
+                self.dataChanged.emit(self.index(int(positions[0]), top_left.column()),
+                                      self.index(int(positions[-1]), bottom_right.column()), list(roles))
+            return
+        if self._rows is not None and self._predicate is not None and self._predicate.fields - {"name"}:
+            # 文件名不会被修改，只有依赖其他字段的条件才需要对变化的行重新求值
+            self._refresh_rows(first, last)
+        lo, hi = self._proxy_range(first, last)
+        if hi > lo:
+            self.dataChanged.emit(self.index(lo, top_left.column()), self.index(hi - 1, bottom_right.column()), list(roles))
+
+    def _resort_rows(self, first: int, last: int):
+        """排序显示时源行 [first, last] 的数据变化：排序键变化则重新排列，判定结果变化则增删对应的行。"""
+        source_model = self.sourceModel()
+        version = source_model.sort_version(self._sort_column)
+        if version != self._sort_version:
+            self._sort_version = version
+            self._reorder(self._sorted_rows(None if self._accept_all else self._rows))
+        if self._accept_all or self._predicate is None or not (self._predicate.fields - {"name"}):
+            return
+        members = np.zeros(source_model.rowCount(), dtype=bool)
+        members[self._rows] = True
+        old = members[first:last + 1].copy()
+        members[first:last + 1] = source_model.evaluate_rows(self._predicate, first, last + 1)
+        if (old != members[first:last + 1]).any():
+            self._merge_rows(self._sorted_rows(np.flatnonzero(members)))
+
+    def _refresh_rows(self, first: int, last: int):
+        """对源行 [first, last] 重新求值，把离开 / 进入结果的行转换为代理的删除 / 插入信号。"""
+        lo, hi = self._proxy_range(first, last)
+        old = self._rows[lo:hi]
+        new = np.flatnonzero(self.sourceModel().evaluate_rows(self._predicate, first, last + 1)) + first
+        if len(old) == len(new) and (old == new).all():
+            return
+        leaving = lo + np.flatnonzero(~np.isin(old, new, assume_unique=True))
+        joining = new[~np.isin(new, old, assume_unique=True)]
+        leaving_ranges = self._runs(leaving)
+        remaining = np.delete(self._rows, leaving)
+        merged = np.insert(remaining, np.searchsorted(remaining, joining), joining)
+        joining_ranges = self._runs(np.searchsorted(merged, joining))
+        if len(leaving_ranges) + len(joining_ranges) > MAX_INCREMENTAL_RANGES:
+            self.beginResetModel()
+            self._rows = merged
+            self.endResetModel()
+            return
+        for a, b in reversed(leaving_ranges):
+            self.beginRemoveRows(QModelIndex(), a, b)
+            self._rows = np.concatenate((self._rows[:a], self._rows[b + 1:]))
+            self.endRemoveRows()
+        # 按升序插入时，每段在最终数组中的位置也就是插入时的位置
+        for a, b in joining_ranges:
+            self.beginInsertRows(QModelIndex(), a, b)
+            self._rows = np.concatenate((self._rows[:a], merged[a:b + 1], self._rows[a:]))
+            self.endInsertRows()
+
+    @staticmethod
+    def _runs(positions: np.ndarray) -> list[tuple[int, int]]:
+        """把升序位置合并为 [(first, last), ...] 形式的连续闭区间。"""
+        if not len(positions):
+            return []
+        breaks = np.flatnonzero(np.diff(positions) != 1)
+        firsts = positions[np.concatenate(([0], breaks + 1))].tolist()
+        lasts = positions[np.concatenate((breaks, [len(positions) - 1]))].tolist()
+        return list(zip(firsts, lasts))
+
+    def _on_model_about_to_be_reset(self, *args):
+        self.beginResetModel()
+        source_model = self.sourceModel()
+        self._pending_serials = None
+        if self._rows is not None and not self._accept_all and hasattr(source_model, "row_serials"):
+            # 记住当前结果对应的插入序号，重置之后再映射回新的行号
+            self._pending_serials = source_model.row_serials(self._rows)
 
-        # 否则，只检查源行号是否在可接受的集合中
-        return source_row in self.accepted_rows
\ No newline at end of file
+    def _on_model_reset(self, *args):
+        source_model = self.sourceModel()
+        if not self._accept_all:
+            rows = None
+            if self._pending_serials is not None:
+                rows = source_model.rows_for_serials(self._pending_serials)
+            self._rows = rows
+            if rows is None:
+                self._predicate = None
+                self._accept_all = True
+                self._ranked = False
+        if self._sort_column >= 0:
+            # 源模型重置后排序置换可能已重建，按其重新排列
+            self._sort_version = source_model.sort_version(self._sort_column)
+            self._rows = self._sorted_rows(None if self._accept_all else self._rows)
+        elif self._accept_all:
+            self._rows = None
+        self._ascending = self._sort_column < 0 and not self._ranked
+        self._inverse = None
+        self._pending_serials = None
+        self.endResetModel()
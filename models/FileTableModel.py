@@ -10,51 +10,356 @@
 
 # models/FileTableModel.py
 
+import numpy as np
 from PySide6.QtCore import Qt, QModelIndex
 from PySide6.QtGui import QColor
 from .BaseTableModel import BaseTableModel
+from data.FileColumnStore import FileColumnStore, FileSnapshot, encode_file_ids
+from data.TrigramIndex import TrigramIndex
+from data.SortIndex import SortedColumn, natural_keys, state_keys
+from data.ProjectFile import load_project, save_project, SaveStats
+from data.DatasetSplit import stratified_split, SPLIT_SOURCE_STATES
+from data.TableDataStruct import train_color, val_color, default_color
 
-COL_ID, COL_NAME, COL_STATE, COL_OP = range(4)
+COL_ID, COL_NAME, COL_STATE, COL_RESOLUTION, COL_OP = range(5)
+
+# 可排序的列 -> 排序键字段（序号列即行号顺序，分辨率列和操作列不可排序）
+SORT_FIELDS = {COL_NAME: "name", COL_STATE: "state"}
+
+# 批量修改状态时，连续区间数超过该值则只发射一个覆盖首尾的 dataChanged
+MAX_CHANGED_RANGES = 64
 
 class FileTableModel(BaseTableModel):
+    """
+    文件列表模型。
+    底层使用列式存储 FileColumnStore，data() 直接读取列数组；
+    get_item_by_row / Qt.UserRole 返回按需生成的轻量行视图 FileRowView。
+    同时维护文件名的三元组索引 name_index，随增删增量更新。
+    排序：文件名（自然排序）和状态列的排序置换在首次使用时建立（文件名也可由后台线程预先建立），
+    之后随增删改增量维护，代理模型按表头排序时直接使用。
+    列式存储不支持在中间插入或原位替换行，replace_all(diff=True) 退回一次重置。
+    """
+    supports_diff = False
+
+    def __init__(self, data_list=None, headers=None, parent=None):
+        self.name_index = TrigramIndex()
+        # 字段 -> SortedColumn，只保存已经建立过的列
+        self._sorted_columns = {}
+        # 字段 -> 尚未并入排序结果的追加行的起始行号，下次使用排序结果时一次合并
+        self._sort_pending = {}
+        # 字段 -> 排序版本：已有行的相对顺序发生变化（如修改状态）时递增
+        self._sort_versions = {}
+        super().__init__(FileColumnStore(data_list), headers, parent)
+
     def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
         if not index.isValid(): return None
-        row_data = self.get_item_by_row(index.row())
-        if not row_data: return None
+        row = index.row()
+        store = self._data
+        if not 0 <= row < len(store): return None
 
         column = index.column()
 
+        if role == Qt.ToolTipRole and column == COL_NAME: return store.path_at(row)
         if role == Qt.DisplayRole or role == Qt.ToolTipRole:
-            if column == COL_ID: return str(index.row() + 1)
-            if column == COL_NAME: return row_data.file_image_name
-            if column == COL_STATE: return row_data.file_image_state
+            if column == COL_ID: return str(row + 1)
+            if column == COL_NAME: return store.name_at(row)
+            if column == COL_STATE: return store.state_at(row)
+            if column == COL_RESOLUTION:
+                # 宽度为 0 表示尚未读取到图片信息
+                width = int(store.widths[row])
+                return f"{width}x{int(store.heights[row])}" if width else ""
             return ""
-        if role == Qt.ForegroundRole: return row_data.item_color
+        if role == Qt.ForegroundRole: return store.color_at(row)
         if role == Qt.TextAlignmentRole: return Qt.AlignCenter
-        if role == Qt.UserRole: return row_data
+        if role == Qt.UserRole: return store[row]
         return None
 
     def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
         if not index.isValid() or role != Qt.EditRole: return False
-        row_data = self.get_item_by_row(index.row())
-        if not row_data: return False
+        row = index.row()
+        store = self._data
+        if not 0 <= row < len(store): return False
 
         new_state, new_color = value
         changed = False
-        if row_data.file_image_state != new_state:
-            row_data.file_image_state = new_state
+        if store.states[row] != store.state_code(new_state):
+            store.set_state(row, new_state)
+            self._resort_states(np.array([row], dtype=np.int64))
             changed = True
-        if row_data.item_color != new_color:
-            row_data.item_color = new_color
+        if store.colors[row] != store.color_code(new_color):
+            store.set_color(row, new_color)
             changed = True
 
         if changed:
-            start_index = self.index(index.row(), 0)
-            end_index = self.index(index.row(), self.columnCount() - 1)
+            start_index = self.index(row, 0)
+            end_index = self.index(row, self.columnCount() - 1)
             self.dataChanged.emit(start_index, end_index, [Qt.DisplayRole, Qt.ForegroundRole])
         return changed
 
     def update_item_state(self, row: int, new_state: str, new_color: QColor) -> bool:
         if not (0 <= row < self.rowCount()): return False
         index = self.index(row, COL_STATE)
-        return self.setData(index, (new_state, new_color), Qt.EditRole)
\ No newline at end of file
+        return self.setData(index, (new_state, new_color), Qt.EditRole)
+
+    def update_rows_state(self, rows, new_state: str, new_color: QColor) -> list[str]:
+        """
+        批量修改多行的状态和颜色，返回实际发生变化的行的 id。
+        变化的行合并为连续区间，每个区间只发射一次 dataChanged。
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[(rows >= 0) & (rows < self.rowCount())]
+        if len(rows) > 1 and not (rows[1:] > rows[:-1]).all():
+            rows = np.sort(rows)
+            rows = rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+
+        store = self._data
+        changed = store.set_rows_state(rows, new_state, new_color)
+        if not len(changed):
+            return []
+        self._rows_state_changed(changed)
+        return store.ids_at(changed)
+
+    def mark_annotated(self, rows: np.ndarray, label_types: list[str]) -> list[str]:
+        """
+        记录一批文件（rows 与 label_types 一一对应）的标注结果：写入标签类别，
+        其中仍为未标注的文件改为已标注（训练集 / 验证集保持不变），状态修改合并为一次批量更新。
+        返回状态发生变化的行的 id。
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        store = self._data
+        store.set_rows_label_type(rows, label_types)
+        unlabeled = rows[store.states[rows] == store.state_code("未标注")]
+        return self.update_rows_state(unlabeled, "已标注", default_color)
+
+    def set_image_sizes(self, snapshot: FileSnapshot, rows: np.ndarray, widths: np.ndarray, heights: np.ndarray):
+        """
+        写入在快照上读取到的图片宽高：按插入序号映射回当前行，快照之后被删除的行忽略。
+        分辨率列按连续区间发射 dataChanged。
+        """
+        store = self._data
+        if snapshot.store_token != store.token:
+            return
+        if snapshot.version != store.version:
+            serials = snapshot.serials[rows]
+            live = store.serials
+            positions = np.minimum(np.searchsorted(live, serials), len(live) - 1)
+            alive = live[positions] == serials if len(live) else np.zeros(len(rows), dtype=bool)
+            rows, widths, heights = positions[alive], widths[alive], heights[alive]
+        if not len(rows):
+            return
+        store.set_rows_image_size(rows, widths, heights)
+        self._emit_changed_ranges(np.unique(rows), COL_RESOLUTION, COL_RESOLUTION, [Qt.DisplayRole])
+
+    def split_train_val(self, val_ratio: float, seed: int) -> tuple[int, int]:
+        """
+        把已标注 / 训练集 / 验证集的文件按标签类别分层随机划分为训练集和验证集，返回 (训练集数, 验证集数)。
+        同一种子总是得到同样的划分；全部行的状态一次写入，dataChanged 同样按连续区间合并。
+        """
+        store = self._data
+        codes = [store.state_code(state) for state in SPLIT_SOURCE_STATES]
+        rows = np.flatnonzero(np.isin(store.states, codes))
+        is_val = stratified_split(store.ids[rows], store.label_types[rows], val_ratio, seed)
+        train_code, val_code = store.state_code("训练集"), store.state_code("验证集")
+        state_codes = np.where(is_val, val_code, train_code).astype(np.uint8)
+        color_codes = np.where(is_val, store.color_code(val_color), store.color_code(train_color)).astype(np.uint8)
+        changed = store.set_rows_codes(rows, state_codes, color_codes)
+        if len(changed):
+            self._rows_state_changed(changed)
+        val_count = int(is_val.sum())
+        return len(rows) - val_count, val_count
+
+    def _rows_state_changed(self, changed: np.ndarray):
+        """状态已批量修改（changed 为升序行号）：维护状态排序，并按连续区间发射 dataChanged。"""
+        self._resort_states(changed)
+        self._emit_changed_ranges(changed, 0, self.columnCount() - 1, [Qt.DisplayRole, Qt.ForegroundRole])
+
+    def _emit_changed_ranges(self, changed: np.ndarray, first_column: int, last_column: int, roles: list):
+        """changed 为升序行号：每个连续区间发射一次 dataChanged，区间过多时只发射一个覆盖首尾的 dataChanged。"""
+        # 相邻行号之差不为 1 的位置即区间断点
+        breaks = np.flatnonzero(np.diff(changed) != 1)
+        firsts = changed[np.concatenate(([0], breaks + 1))].tolist()
+        lasts = changed[np.concatenate((breaks, [len(changed) - 1]))].tolist()
+        if len(firsts) > MAX_CHANGED_RANGES:
+            firsts, lasts = [firsts[0]], [lasts[-1]]
+        for first, last in zip(firsts, lasts):
+            self.dataChanged.emit(self.index(first, first_column), self.index(last, last_column), roles)
+
+    def find_row_by_id(self, item_id):
+        return self._data.find_row_by_id(item_id)
+
+    def load_project(self, path: str):
+        """打开工程文件替换全部数据：列直接映射自文件，打开耗时与行数基本无关。"""
+        store = load_project(path)
+        self.beginResetModel()
+        self._reset_rows(store)
+        self.endResetModel()
+
+    def save_project(self, path: str) -> SaveStats:
+        """保存为工程文件，目标已是工程文件时只写入变化的列。"""
+        return save_project(self._data, path)
+
+    def state_counts(self) -> dict[str, int]:
+        """各状态的文件数，由存储随增删改增量维护，读取为 O(状态数)。"""
+        return self._data.state_counts()
+
+    def rows_in_state(self, state: str) -> np.ndarray:
+        """处于给定状态的全部行号（升序）。"""
+        return self._data.rows_in_state(state)
+
+    def ids_at(self, rows: np.ndarray) -> list[str]:
+        return self._data.ids_at(rows)
+
+    def names_at(self, rows: np.ndarray) -> list[str]:
+        return self._data.names_at(rows)
+
+    def paths_at(self, rows: np.ndarray) -> list[str]:
+        """读取文件时使用的路径（目录 + 文件名）。"""
+        return self._data.paths_at(rows)
+
+    def snapshot(self) -> FileSnapshot:
+        """当前数据的只读快照，后台线程只应通过快照读取数据。"""
+        return self._data.snapshot()
+
+    def remap_rows(self, rows: np.ndarray, snapshot: FileSnapshot) -> np.ndarray | None:
+        """把在快照上算出的行号映射为当前行号，无法映射时返回 None。"""
+        return self._data.remap_rows(rows, snapshot)
+
+    def first_row_after(self, snapshot: FileSnapshot) -> int:
+        """快照之后才追加的行从该行号开始（新行总是追加在末尾）。"""
+        last_serial = snapshot.serials[-1] if len(snapshot) else -1
+        return int(np.searchsorted(self._data.serials, last_serial, side="right"))
+
+    def evaluate_rows(self, predicate, start: int, stop: int) -> np.ndarray:
+        """在当前数据上对 [start, stop) 行求值过滤条件，返回布尔数组。"""
+        return predicate.evaluate(self._data, start, stop)
+
+    def row_serials(self, rows: np.ndarray) -> tuple:
+        """给定行的插入序号，连同存储标记一起返回，可在增删或重置之后用 rows_for_serials 找回行号。"""
+        store = self._data
+        return store.token, store.serials[rows].copy()
+
+    def rows_for_serials(self, key: tuple) -> np.ndarray | None:
+        """row_serials 的逆操作：返回仍然存在的行号（升序）；数据已整体替换时返回 None。"""
+        token, serials = key
+        store = self._data
+        if token != store.token:
+            return None
+        return store.rows_for_serials(serials)
+
+    # --- 排序 ---
+    def sort_order(self, column: int) -> np.ndarray | None:
+        """
+        按该列升序排列的全部行号（排序置换），该列不可排序时返回 None。
+        返回的数组归模型所有，调用方不应修改，也不应在模型变化后继续持有。
+        """
+        if column == COL_ID:
+            return np.arange(len(self._data), dtype=np.int64)
+        field = SORT_FIELDS.get(column)
+        if field is None:
+            return None
+        return self._sorted_column(field).order
+
+    def sort_version(self, column: int) -> int:
+        """该列排序版本：版本不变时，已有行之间的相对顺序不变。"""
+        return self._sort_versions.get(SORT_FIELDS.get(column), 0)
+
+    def install_name_sort(self, snapshot: FileSnapshot, keys: np.ndarray, order: np.ndarray):
+        """
+        安装后台线程在快照上建立的文件名排序（keys 为升序的排序键，order 为快照中的行号）。
+        快照之后被删除的行被剔除，之后追加的行增量插入；数据已整体替换时丢弃。
+        """
+        store = self._data
+        if "name" in self._sorted_columns or snapshot.store_token != store.token:
+            return
+        serials = snapshot.serials[order]
+        rows = np.searchsorted(store.serials, serials)
+        alive = rows < len(store)
+        alive[alive] = store.serials[rows[alive]] == serials[alive]
+        self._sorted_columns["name"] = SortedColumn(keys[alive], rows[alive])
+        tail = self.first_row_after(snapshot)
+        if tail < len(store):
+            self._sort_pending["name"] = tail
+
+    def has_name_sort(self) -> bool:
+        return "name" in self._sorted_columns
+
+    def _sorted_column(self, field: str, build: bool = True) -> SortedColumn | None:
+        """最新的排序结果：尚未建立时建立（build 为 False 时返回 None），有待合并的追加行时先合并。"""
+        sorted_column = self._sorted_columns.get(field)
+        if sorted_column is None:
+            if not build:
+                return None
+            sorted_column = SortedColumn.from_row_keys(self._sort_keys(field, 0, len(self._data)))
+            self._sorted_columns[field] = sorted_column
+        pending = self._sort_pending.pop(field, None)
+        if pending is not None:
+            sorted_column.append(pending, self._sort_keys(field, pending, len(self._data)))
+        return sorted_column
+
+    def _sort_keys(self, field: str, start: int, stop: int) -> np.ndarray:
+        store = self._data
+        if field == "name":
+            return natural_keys(store.name_bytes, store.name_offsets, start, stop)
+        return state_keys(store.states[start:stop], store.serials[start:stop])
+
+    def _resort_states(self, rows: np.ndarray):
+        """给定行的状态已变化：从状态排序结果中取出后按新键重新插入。"""
+        sorted_column = self._sorted_column("state", build=False)
+        if sorted_column is None:
+            return
+        store = self._data
+        sorted_column.discard(rows, len(store))
+        sorted_column.insert(rows, state_keys(store.states[rows], store.serials[rows]))
+        self._sort_versions["state"] = self._sort_versions.get("state", 0) + 1
+
+    def _remove_sorted_rows(self, removed: np.ndarray):
+        for field in list(self._sorted_columns):
+            self._sorted_column(field).remove(removed)
+
+    def name_index_source(self) -> tuple:
+        """在主线程中取出重建文件名索引所需的列（快照），交给后台线程使用。"""
+        snapshot = self.snapshot()
+        return snapshot.serials, snapshot.name_bytes, snapshot.name_offsets, self.name_index.generation
+
+    # --- 存储钩子：全部委托给列式存储 ---
+    def _check_rows(self, items: list):
+        # id 列只能保存 16 位十六进制 id，格式不符时在发射插入信号之前就抛出 InvalidFileIdError
+        encode_file_ids([item.id for item in items])
+
+    def _append_rows(self, items: list):
+        start = len(self._data)
+        self._data.extend(items)
+        # 序号列删除行时可能原地前移，索引保存一份拷贝
+        self.name_index.add(self._data.serials[start:].copy(), [item.file_image_name for item in items])
+        for field in self._sorted_columns:
+            self._sort_pending.setdefault(field, start)
+        name_column = self._sorted_columns.get("name")
+        if name_column is not None and len(self._data) - self._sort_pending["name"] > len(name_column):
+            # 待合并的行比已排序的还多（如批量导入），丢弃后整体重建（可在后台线程完成）比合并更快
+            del self._sorted_columns["name"], self._sort_pending["name"]
+
+    def _take_rows(self, sorted_rows: list) -> list:
+        return self._data.detach(sorted_rows)
+
+    def _delete_rows_range(self, first: int, last: int):
+        if self._sorted_columns:
+            removed = np.zeros(len(self._data), dtype=bool)
+            removed[first:last + 1] = True
+            self._remove_sorted_rows(removed)
+        self._data.delete_range(first, last)
+        self.name_index.discard(last - first + 1)
+
+    def _compact_rows(self, sorted_rows: list):
+        if self._sorted_columns:
+            removed = np.zeros(len(self._data), dtype=bool)
+            removed[sorted_rows] = True
+            self._remove_sorted_rows(removed)
+        self._data.compact(sorted_rows)
+        self.name_index.discard(len(sorted_rows))
+
+    def _reset_rows(self, items):
+        self._data = items if isinstance(items, FileColumnStore) else FileColumnStore(items)
+        # 整体替换数据后索引需要重建，由外部安排在后台线程完成
+        self.name_index.clear(ready=len(self._data) == 0)
+        self._sorted_columns.clear()
+        self._sort_pending.clear()
@@ -13,7 +13,15 @@
 from PySide6.QtCore import Qt, QModelIndex
 from .BaseTableModel import BaseTableModel
 
-COL_NAME, COL_CATEGORY, COL_RESOLUTION = range(3)
+COL_NAME, COL_CATEGORY, COL_RESOLUTION, COL_FORMAT, COL_FILE_SIZE, COL_ORIENTATION = range(6)
+
+
+def format_file_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
 class ImageInfoModel(BaseTableModel):
     def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
@@ -27,6 +35,9 @@ class ImageInfoModel(BaseTableModel):
             if column == COL_NAME: return row_data.file_image_name
             if column == COL_CATEGORY: return row_data.project_category
             if column == COL_RESOLUTION: return row_data.file_image_resolution
+            if column == COL_FORMAT: return row_data.image_format
+            if column == COL_FILE_SIZE: return format_file_size(row_data.file_size) if row_data.file_size else ""
+            if column == COL_ORIENTATION: return str(row_data.orientation)
         if role == Qt.ForegroundRole: return row_data.item_color
         if role == Qt.TextAlignmentRole: return Qt.AlignCenter
         return None
\ No newline at end of file
@@ -16,6 +16,10 @@ from .BaseTableModel import BaseTableModel
 COL_LBL_ID, COL_LBL_NAME, COL_LBL_TYPE, COL_LBL_OP = range(4)
 
 class LabelInfoModel(BaseTableModel):
+    def _diff_key(self, item):
+        # 每次读取标注文件都会生成新的标签 id，切换文件时按显示内容（名称、类别）对应
+        return item.label_name, item.label_type
+
     def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
         if not index.isValid(): return None
         row_data = self.get_item_by_row(index.row())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：conftest.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 09:30
+'''
+
+# tests/conftest.py
+
+import os
+import sys
+
+# 测试在没有显示器的环境中运行；项目根目录加入导入路径（与 main.py 相同的导入方式）
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from data.FileColumnStore import FileColumnStore
+from data.TableDataStruct import FileDataStruct, default_color, train_color, val_color
+from models.FileTableModel import FileTableModel
+
+# 文件列表的表头（与 FileManager 相同）
+FILE_HEADERS = ["序号", "文件名称", "文件类别", "分辨率", "操作"]
+
+# 状态 -> 颜色（与界面上修改状态时使用的颜色一致）
+STATE_COLORS = {"未标注": default_color, "已标注": default_color, "训练集": train_color, "验证集": val_color}
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+class SignalRecorder:
+    """记录模型发出的结构信号：[(信号名, 参数...), ...]。"""
+
+    SIGNALS = ("modelReset", "rowsInserted", "rowsRemoved", "dataChanged", "layoutChanged")
+
+    def __init__(self, model):
+        self.events = []
+        for name in self.SIGNALS:
+            getattr(model, name).connect(lambda *args, name=name: self.events.append((name,) + self._plain(args)))
+
+    @staticmethod
+    def _plain(args) -> tuple:
+        # QModelIndex 参数转为 (行, 列)，父索引无效时省略
+        plain = []
+        for arg in args:
+            if hasattr(arg, "isValid"):
+                if arg.isValid():
+                    plain.append((arg.row(), arg.column()))
+            elif not isinstance(arg, list):
+                plain.append(arg)
+        return tuple(plain)
+
+    def names(self) -> list[str]:
+        return [event[0] for event in self.events]
+
+    def clear(self):
+        self.events.clear()
+
+
+@pytest.fixture
+def recorder():
+    return SignalRecorder
+
+
+def _per_row(value, i: int):
+    return value(i) if callable(value) else value
+
+
+def make_file_items(names, state="未标注", directory="") -> list[FileDataStruct]:
+    """
+    测试用的文件列表，各测试文件共用。
+    state / directory 可以是固定值，也可以是 行号 -> 值 的函数；颜色由状态决定（见 STATE_COLORS）。
+    """
+    items = []
+    for i, name in enumerate(names):
+        row_state = _per_row(state, i)
+        items.append(FileDataStruct(name, row_state, STATE_COLORS[row_state], file_image_dir=_per_row(directory, i)))
+    return items
+
+
+def make_file_store(names, state="未标注", directory="") -> FileColumnStore:
+    return FileColumnStore(make_file_items(names, state, directory))
+
+
+def make_file_model(names, state="未标注", directory="") -> FileTableModel:
+    model = FileTableModel(headers=FILE_HEADERS)
+    model.add_items(make_file_items(names, state, directory))
+    return model
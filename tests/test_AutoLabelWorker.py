@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_AutoLabelWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 11:15
+'''
+
+# tests/test_AutoLabelWorker.py
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import make_file_model
+from data.LabelFile import read_labels
+from workers.AutoLabelWorker import AutoLabelWorker, contour_annotator, _annotate_task
+
+
+def make_image(path, boxes, size=(200, 120)):
+    """黑底上画白色矩形，boxes 为 [(x0, y0, x1, y1), ...]（含端点）。"""
+    pixels = np.zeros((size[1], size[0]), dtype=np.uint8)
+    for x0, y0, x1, y1 in boxes:
+        pixels[y0:y1 + 1, x0:x1 + 1] = 255
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+def bbox(points):
+    xs, ys = zip(*points)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def test_contour_annotator_finds_rectangles(tmp_path):
+    path = make_image(tmp_path / "图片_1.png", [(20, 30, 79, 89), (120, 10, 179, 49)])
+    shapes, size = contour_annotator(path)
+    assert size == (200, 120)
+    assert [label for label, _ in shapes] == ["object", "object"]
+    # 按面积从大到小，模糊处理后的边界误差在几个像素以内
+    for (_, points), expected in zip(shapes, [(20, 30, 79, 89), (120, 10, 179, 49)]):
+        assert bbox(points) == pytest.approx(expected, abs=3)
+
+
+def test_annotate_task_reports_errors_per_file(tmp_path):
+    good = make_image(tmp_path / "good.png", [(10, 10, 60, 60)])
+    (tmp_path / "bad.png").write_bytes(b"not an image")
+    results = _annotate_task(contour_annotator, [str(tmp_path / "bad.png"), good, str(tmp_path / "missing.png")])
+    assert [error is None for *_, error in results] == [False, True, False]
+    assert results[1][1] == (200, 120) and len(results[1][0]) == 1
+
+
+def test_run_job_writes_labels_and_batches(tmp_path):
+    paths = [make_image(tmp_path / f"img_{i}.png", [(10 + i, 10, 90, 70)]) for i in range(5)]
+    (tmp_path / "broken.png").write_bytes(b"")
+    paths.append(str(tmp_path / "broken.png"))
+    worker = AutoLabelWorker(max_workers=1)
+    batches, finished = [], []
+    worker.batch_ready.connect(lambda job, ids, labels: (batches.append((ids, labels)), worker.batch_done()))
+    worker.finished.connect(lambda job, stats: finished.append(stats))
+    try:
+        worker.run_job(1, [f"id{i}" for i in range(6)], paths, contour_annotator)
+    finally:
+        worker.shutdown()
+
+    stats = finished[0]
+    assert (stats.annotated, stats.failed, stats.shapes, stats.cancelled) == (5, 1, 5, False)
+    assert sorted(file_id for ids, _ in batches for file_id in ids) == [f"id{i}" for i in range(5)]
+    labels, size = read_labels(paths[0])
+    assert size == (200, 120) and [label.label_type for label in labels] == ["object"]
+
+
+def test_mark_annotated_keeps_split_states():
+    model = make_file_model(["a.png", "b.png", "c.png"], state=lambda i: "训练集" if i == 1 else "未标注")
+    changed = model.mark_annotated(np.array([0, 1]), ["object", "car"])
+    assert changed == model.ids_at(np.array([0]))
+    assert [model.get_item_by_row(row).file_image_state for row in range(3)] == ["已标注", "训练集", "未标注"]
+    assert [model.snapshot().label_type_names[code] for code in model.snapshot().label_types] == ["object", "car", ""]
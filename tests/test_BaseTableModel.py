@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_BaseTableModel.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 09:40
+'''
+
+# tests/test_BaseTableModel.py
+
+import random
+
+import numpy as np
+import pytest
+
+from data.TableDataStruct import FileDataStruct, LabelInfoDataStruct
+from models.FileTableModel import FileTableModel
+from models.LabelInfoModel import LabelInfoModel
+
+
+def make_labels(count: int, prefix: str = "obj") -> list[LabelInfoDataStruct]:
+    return [LabelInfoDataStruct(f"{prefix}_{i}", "目标检测") for i in range(count)]
+
+
+def make_model(count: int = 0) -> LabelInfoModel:
+    model = LabelInfoModel(headers=["序号", "标签名称", "标签类别", "操作"])
+    model.add_items(make_labels(count))
+    return model
+
+
+def test_add_items_emits_one_insert_per_chunk(recorder):
+    model = make_model()
+    events = recorder(model)
+    consumed = []
+
+    def generate():
+        for label in make_labels(25):
+            consumed.append(label)
+            yield label
+
+    assert model.add_items(generate(), chunk_size=10) == 25
+    assert events.events == [("rowsInserted", 0, 9), ("rowsInserted", 10, 19), ("rowsInserted", 20, 24)]
+    assert model.rowCount() == 25
+    assert [model.get_item_by_row(row) for row in range(25)] == consumed
+
+
+def test_add_items_without_chunk_size_inserts_once(recorder):
+    model = make_model(3)
+    events = recorder(model)
+    assert model.add_items(iter(make_labels(5, "new"))) == 5
+    assert events.events == [("rowsInserted", 3, 7)]
+    assert model.add_items([]) == 0
+    assert len(events.events) == 1
+
+
+def test_remove_rows_coalesces_ranges(recorder):
+    model = make_model(10)
+    items = [model.get_item_by_row(row) for row in range(10)]
+    events = recorder(model)
+    removed = model.remove_rows([7, 2, 3, 8, 9, 2, 42, -1])
+    assert removed == [items[2], items[3], items[7], items[8], items[9]]
+    # 从后往前，每个连续区间一对信号
+    assert events.events == [("rowsRemoved", 7, 9), ("rowsRemoved", 2, 3)]
+    assert [model.get_item_by_row(row) for row in range(model.rowCount())] == \
+           [items[row] for row in (0, 1, 4, 5, 6)]
+
+
+def test_remove_rows_resets_when_too_fragmented(recorder):
+    from models.BaseTableModel import MAX_REMOVE_RANGES
+    count = (MAX_REMOVE_RANGES + 1) * 2
+    model = make_model(count)
+    items = [model.get_item_by_row(row) for row in range(count)]
+    events = recorder(model)
+    model.remove_rows(range(0, count, 2))
+    assert events.names() == ["modelReset"]
+    assert [model.get_item_by_row(row) for row in range(model.rowCount())] == items[1::2]
+
+
+def test_find_row_by_id_after_removals_and_appends():
+    model = make_model(200)
+    items = [model.get_item_by_row(row) for row in range(200)]
+    model.remove_rows(list(range(10, 20)) + [150])
+    model.remove_item_by_row(0)
+    extra = make_labels(5, "extra")
+    model.add_items(extra)
+    remaining = [item for i, item in enumerate(items) if i not in set(range(10, 20)) | {0, 150}] + extra
+    assert all(model.find_row_by_id(item.id) == row for row, item in enumerate(remaining))
+    assert model.find_row_by_id(items[15].id) == -1 and model.find_row_by_id(items[0].id) == -1
+    assert model.find_row_by_id("no-such-id") == -1
+
+
+def test_find_row_by_id_with_duplicate_ids():
+    model = make_model(3)
+    first = model.get_item_by_row(0)
+    duplicate = LabelInfoDataStruct("copy", "目标检测", label_id=first.id)
+    model.add_item(duplicate)
+    # 重复 id 时索引指向后插入的行；删除较早的同 id 行不影响该条目
+    assert model.find_row_by_id(first.id) == 3
+    model.remove_item_by_row(0)
+    assert model.find_row_by_id(first.id) == 2
+    model.remove_item_by_row(2)
+    assert model.find_row_by_id(first.id) == -1
+
+
+def assert_index_consistent(model: LabelInfoModel, items: list):
+    assert [model.get_item_by_row(row) for row in range(model.rowCount())] == items
+    assert all(model.find_row_by_id(item.id) == row for row, item in enumerate(items))
+    assert all(a < b for a, b in zip(model._serials, model._serials[1:]))
+
+
+def test_replace_all_diff_updates_changed_spans_only(recorder, monkeypatch):
+    model = make_model(10)
+    old = [model.get_item_by_row(row) for row in range(10)]
+    events = recorder(model)
+    # 差异更新不应整体重建 id 索引
+    monkeypatch.setattr(model, "_rebuild_id_index", lambda: pytest.fail("id index rebuilt"))
+
+    # 删除 obj_2、obj_3，在 obj_6 之前插入两行；其余行键相同，换成新的数据项
+    new = [LabelInfoDataStruct(label.label_name, label.label_type) for label in old[:2]]
+    new += [LabelInfoDataStruct(label.label_name, label.label_type) for label in old[4:6]]
+    new += make_labels(2, "new")
+    new += [LabelInfoDataStruct(label.label_name, label.label_type) for label in old[6:]]
+    model.replace_all(new, diff=True)
+
+    assert events.events == [("dataChanged", (6, 0), (9, 3)), ("rowsInserted", 6, 7),
+                             ("dataChanged", (4, 0), (5, 3)), ("rowsRemoved", 2, 3),
+                             ("dataChanged", (0, 0), (1, 3))]
+    assert_index_consistent(model, new)
+    assert all(model.find_row_by_id(label.id) == -1 for label in old)
+
+
+def test_replace_all_diff_matches_new_list(monkeypatch):
+    rng = random.Random(7)
+    model = make_model(60)
+    monkeypatch.setattr(model, "_rebuild_id_index", lambda: pytest.fail("id index rebuilt"))
+    for step in range(40):
+        names = [model.get_item_by_row(row).label_name for row in range(model.rowCount())]
+        for _ in range(rng.randint(1, 6)):
+            position = rng.randrange(len(names) + 1)
+            if rng.random() < 0.5 and position < len(names):
+                del names[position:position + rng.randint(1, 3)]
+            else:
+                names[position:position] = [f"step{step}_{rng.randrange(1000)}" for _ in range(rng.randint(1, 4))]
+        new = [LabelInfoDataStruct(name, "目标检测") for name in names]
+        model.replace_all(new, diff=True)
+        assert_index_consistent(model, new)
+        # 差异更新之后的追加与删除仍然正确
+        extra = make_labels(2, f"extra{step}")
+        model.add_items(extra)
+        model.remove_rows([0])
+        assert_index_consistent(model, new[1:] + extra)
+
+
+def test_replace_all_diff_resets_when_too_different(recorder):
+    model = make_model(10)
+    events = recorder(model)
+    new = make_labels(10, "other")
+    model.replace_all(new, diff=True)
+    assert events.names() == ["modelReset"]
+    assert_index_consistent(model, new)
+
+
+def test_file_table_model_diff_falls_back_to_reset(recorder):
+    model = FileTableModel(headers=["序号", "文件名称", "文件类别", "分辨率", "操作"])
+    model.add_items([FileDataStruct("a.jpg", "未标注"), FileDataStruct("b.jpg", "未标注")])
+    events = recorder(model)
+    new = [FileDataStruct("a.jpg", "未标注"), FileDataStruct("c.jpg", "训练集")]
+    model.replace_all(new, diff=True)
+    assert events.names() == ["modelReset"]
+    assert model.names_at(np.arange(2)) == ["a.jpg", "c.jpg"]
+    assert [model.find_row_by_id(item.id) for item in new] == [0, 1]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_CustomDelegate.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 16:20
+'''
+
+# tests/test_CustomDelegate.py
+
+import os
+
+import pytest
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QStyleOptionViewItem
+
+from conftest import make_file_model
+from data.TableDataStruct import LabelInfoDataStruct
+from delegates.CustomDelegate import CustomDelegate, ICON_SIZE
+from models.FileFilterProxyModel import FileFilterProxyModel
+from models.FileTableModel import COL_NAME, COL_OP
+from models.LabelInfoModel import LabelInfoModel, COL_LBL_OP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def delegate(qapp, monkeypatch):
+    # 图标以相对路径加载
+    monkeypatch.chdir(ROOT)
+    return CustomDelegate()
+
+
+def make_file_proxy() -> FileFilterProxyModel:
+    # 源模型以代理模型为父对象，随代理模型一起存活
+    source = make_file_model(f"img_{i}.jpg" for i in range(3))
+    proxy = FileFilterProxyModel()
+    source.setParent(proxy)
+    proxy.setSourceModel(source)
+    return proxy
+
+
+def paint(delegate: CustomDelegate, index, device_pixel_ratio: float = 1.0) -> QImage:
+    image = QImage(64 * device_pixel_ratio, 32 * device_pixel_ratio, QImage.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(device_pixel_ratio)
+    image.fill(0)
+    option = QStyleOptionViewItem()
+    option.rect = QRect(0, 0, 64, 32)
+    painter = QPainter(image)
+    try:
+        delegate.paint(painter, option, index)
+    finally:
+        painter.end()
+    return image
+
+
+def test_strategy_is_resolved_once_per_model(delegate, monkeypatch):
+    proxy = make_file_proxy()
+    attached = []
+    attach = delegate._attach_model
+    monkeypatch.setattr(delegate, "_attach_model", lambda model: attached.append(model) or attach(model))
+
+    for row in range(3):
+        for column in (COL_NAME, COL_OP):
+            paint(delegate, proxy.index(row, column))
+    assert attached == [proxy]
+    # 代理模型的绘制方法按源模型类型解析：只有操作列由委托绘制
+    assert delegate._strategies[id(proxy)] == {COL_OP: delegate._paint_delete}
+
+
+def test_strategies_are_kept_per_model(delegate):
+    proxy = make_file_proxy()
+    labels = LabelInfoModel(headers=["序号", "标签名称", "标签类别", "操作"])
+    labels.add_item(LabelInfoDataStruct("box", "car"))
+    paint(delegate, proxy.index(0, COL_OP))
+    paint(delegate, labels.index(0, COL_LBL_OP))
+    assert delegate._strategies[id(proxy)] == {COL_OP: delegate._paint_delete}
+    assert delegate._strategies[id(labels)] == {COL_LBL_OP: delegate._paint_visibility}
+
+
+def test_changing_source_model_drops_cached_strategy(delegate):
+    proxy = make_file_proxy()
+    paint(delegate, proxy.index(0, COL_OP))
+    labels = LabelInfoModel(headers=["序号", "标签名称", "标签类别", "操作"])
+    proxy.setSourceModel(labels)
+    assert id(proxy) not in delegate._strategies
+
+
+def test_icon_pixmaps_are_cached_per_device_pixel_ratio(delegate):
+    proxy = make_file_proxy()
+    index = proxy.index(0, COL_OP)
+    first = paint(delegate, index, 1.0)
+    paint(delegate, index, 2.0)
+    cached = dict(delegate._pixmaps)
+    assert sorted(cached) == [("delete", 1.0), ("delete", 2.0)]
+    # 两种像素比下逻辑尺寸相同，高分屏使用更多的物理像素（受图标原图大小限制）
+    assert all(pixmap.deviceIndependentSize().toSize() == ICON_SIZE for pixmap in cached.values())
+    assert cached[("delete", 2.0)].width() > cached[("delete", 1.0)].width()
+
+    # 再次绘制直接使用缓存的 QPixmap
+    assert paint(delegate, index, 1.0) == first
+    assert all(delegate._pixmaps[key] is pixmap for key, pixmap in cached.items())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_DatasetSplit.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 10:30
+'''
+
+# tests/test_DatasetSplit.py
+
+import numpy as np
+
+from conftest import make_file_model
+from data.DatasetSplit import stratified_split
+
+
+def make_ids(count: int, seed: int = 1) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 2 ** 63, count, dtype=np.uint64)
+
+
+def test_split_is_reproducible_and_order_independent():
+    ids = make_ids(1000)
+    strata = np.arange(1000) % 3
+    first = stratified_split(ids, strata, 0.2, seed=7)
+    assert np.array_equal(first, stratified_split(ids, strata, 0.2, seed=7))
+    assert not np.array_equal(first, stratified_split(ids, strata, 0.2, seed=8))
+
+    # 打乱行顺序后每个文件的结果不变
+    order = np.random.default_rng(2).permutation(1000)
+    assert np.array_equal(stratified_split(ids[order], strata[order], 0.2, seed=7), first[order])
+
+
+def test_each_stratum_gets_its_share():
+    sizes = {0: 500, 1: 37, 2: 5, 3: 1}
+    strata = np.concatenate([np.full(size, code) for code, size in sizes.items()])
+    is_val = stratified_split(make_ids(len(strata)), strata, 0.3, seed=0)
+    for code, size in sizes.items():
+        assert int(is_val[strata == code].sum()) == int(np.floor(size * 0.3 + 0.5))
+    assert not stratified_split(make_ids(10), np.zeros(10, dtype=np.int64), 0.0).any()
+    assert stratified_split(make_ids(10), np.zeros(10, dtype=np.int64), 1.0).all()
+
+
+def test_model_split_only_touches_labelled_files(recorder):
+    model = make_file_model(f"img_{i}.jpg" for i in range(100))
+    labelled = np.arange(0, 100, 2)
+    model.mark_annotated(labelled, ["car" if i % 4 else "person" for i in labelled])
+
+    assert model.split_train_val(0.2, seed=3) == (40, 10)
+    states = [model.get_item_by_row(row).file_image_state for row in range(100)]
+    assert all(states[row] == "未标注" for row in range(1, 100, 2))
+    # 同一种子再次划分结果相同，不产生任何变化通知
+    events = recorder(model)
+    assert model.split_train_val(0.2, seed=3) == (40, 10)
+    assert events.events == []
+    assert [model.get_item_by_row(row).file_image_state for row in range(100)] == states
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_DetailLoader.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 14:40
+'''
+
+# tests/test_DetailLoader.py
+
+import pytest
+from PIL import Image
+
+from data.LabelCache import LabelCache
+from data.LabelFile import write_labels
+from data.TableDataStruct import LabelInfoDataStruct
+import workers.DetailLoader as detail_loader
+from workers.DetailLoader import DetailLoader
+from main import selection_delay_ms, SELECTION_IDLE_MS, SELECTION_MAX_DELAY_MS
+
+
+@pytest.fixture
+def image(tmp_path) -> str:
+    path = str(tmp_path / "a.jpg")
+    Image.new("RGB", (40, 30)).save(path, "JPEG")
+    write_labels(path, [LabelInfoDataStruct("box", "car", points=[(0, 0), (4, 4)])], (40, 30))
+    return path
+
+
+def make_loader(tmp_path, cache_path: str = None) -> tuple[DetailLoader, list]:
+    loader = DetailLoader(LabelCache(), cache_path or str(tmp_path / "cache" / "metadata.sqlite"))
+    loaded = []
+    loader.loaded.connect(lambda *args: loaded.append(args))
+    return loader, loaded
+
+
+def test_loads_labels_and_metadata_for_latest_request(tmp_path, image):
+    loader, loaded = make_loader(tmp_path)
+    loader.cancel_before(3)
+    loader.load(3, "a", image)
+    loader.close()
+    (generation, file_id, labels, meta), = loaded
+    assert (generation, file_id, [label.label_name for label in labels]) == (3, "a", ["box"])
+    assert meta.resolution == "40x30"
+    # 标签已放入共享缓存
+    assert loader.cache.get("a") is labels
+
+
+def test_superseded_request_is_skipped(tmp_path, image, monkeypatch):
+    loader, loaded = make_loader(tmp_path)
+    reads = []
+    monkeypatch.setattr(detail_loader, "read_labels", lambda path: reads.append(path) or ([], None))
+    loader.cancel_before(2)
+    loader.load(1, "a", image)
+    assert loaded == [] and reads == []
+
+
+def test_request_cancelled_while_reading_labels_skips_metadata(tmp_path, image, monkeypatch):
+    loader, loaded = make_loader(tmp_path)
+    read_labels = detail_loader.read_labels
+
+    def read_then_move_on(path):
+        # 读取标签期间用户已移动到下一行
+        loader.cancel_before(2)
+        return read_labels(path)
+
+    monkeypatch.setattr(detail_loader, "read_labels", read_then_move_on)
+    monkeypatch.setattr(loader, "_read_metadata", lambda path: pytest.fail("metadata read for a stale request"))
+    loader.cancel_before(1)
+    loader.load(1, "a", image)
+    assert loaded == []
+    # 已读到的标签仍可供之后的请求使用
+    assert "a" in loader.cache
+
+
+def test_unusable_metadata_cache_falls_back_to_reading_headers(tmp_path, image):
+    (tmp_path / "cache_dir").mkdir()
+    loader, loaded = make_loader(tmp_path, str(tmp_path / "cache_dir"))
+    for generation in (1, 2):
+        loader.cancel_before(generation)
+        loader.load(generation, "a", image)
+    loader.close()
+    assert [meta.resolution for *_, meta in loaded] == ["40x30", "40x30"]
+
+
+def test_selection_delay_is_bounded():
+    # 第一次变化以及持续变化的前期：等待完整的空闲时间
+    assert selection_delay_ms(10.0, 10.0) == SELECTION_IDLE_MS
+    # 接近最长延迟时只等待剩余时间，超过之后立即加载
+    assert selection_delay_ms(10.0, 10.0 + (SELECTION_MAX_DELAY_MS - 20) / 1000) == 20
+    assert selection_delay_ms(10.0, 10.0 + SELECTION_MAX_DELAY_MS / 1000 + 1) == 0
+
+
+def test_malformed_label_file_still_emits_loaded(tmp_path, image):
+    (tmp_path / "a.json").write_text('{"shapes": [{"label": "car", "points": [[1, 2, 3]]}]}')
+    loader, loaded = make_loader(tmp_path)
+    loader.cancel_before(1)
+    loader.load(1, "a", image)
+    loader.close()
+    (generation, file_id, labels, meta), = loaded
+    assert (generation, file_id, labels, meta.resolution) == (1, "a", [], "40x30")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_ExportWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 09:40
+'''
+
+# tests/test_ExportWorker.py
+
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import workers.ExportWorker as ExportWorker
+from data.FileColumnStore import FileColumnStore
+from data.LabelFile import write_labels, label_file_path
+from data.TableDataStruct import FileDataStruct, LabelInfoDataStruct, train_color, val_color, default_color
+from workers.ExportWorker import ExportWorker as Worker, LINK_MODE_COPY
+
+STATES = [("训练集", train_color), ("验证集", val_color), ("未标注", default_color)]
+
+
+def make_dataset(root, count: int = 12) -> FileColumnStore:
+    """在 root 下生成 count 张小图片及其标注，返回对应的存储。"""
+    os.makedirs(root)
+    items = []
+    for i in range(count):
+        name = f"img_{i}.png"
+        Image.new("RGB", (40 + i, 30)).save(root / name)
+        labels = [LabelInfoDataStruct(f"box_{i}", "car" if i % 2 else "person", points=[(1, 2), (11, 12)])]
+        if i % 3 == 0:
+            labels.append(LabelInfoDataStruct(f"poly_{i}", "tree", points=[(0, 0), (10, 0), (10, 10)]))
+        write_labels(str(root / name), labels, (40 + i, 30))
+        items.append(FileDataStruct(name, *STATES[i % 3], file_image_dir=str(root)))
+    return FileColumnStore(items)
+
+
+def output_files(directory) -> dict[str, bytes]:
+    result = {}
+    for base, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(base, name)
+            with open(path, "rb") as f:
+                result[os.path.relpath(path, directory)] = f.read()
+    return result
+
+
+@pytest.fixture
+def worker():
+    worker = Worker()
+    worker.finished_jobs = []
+    worker.failed_jobs = []
+    worker.finished.connect(lambda *args: worker.finished_jobs.append(args[:4] + args[5:]))
+    worker.failed.connect(lambda job, error: worker.failed_jobs.append((job, error)))
+    return worker
+
+
+def interrupt_export(worker, snapshot, output_dir, job: int = 2):
+    """导出到第二批落盘后取消，留下断点。"""
+    def save_then_cancel(output_dir, checkpoint):
+        Worker._save_checkpoint(output_dir, checkpoint)
+        if checkpoint["done"] >= 4:
+            worker.cancel(job)
+    worker._save_checkpoint = save_then_cancel
+    worker.run_export(job, snapshot, str(output_dir), LINK_MODE_COPY)
+    del worker._save_checkpoint
+    assert worker.finished_jobs[-1][-1] is True
+    assert os.path.exists(output_dir / ".export_checkpoint.json")
+
+
+def test_resumed_export_matches_uninterrupted_export(tmp_path, worker, monkeypatch):
+    monkeypatch.setattr(ExportWorker, "EXPORT_CHUNK_SIZE", 2)
+    snapshot = make_dataset(tmp_path / "images").snapshot()
+    worker.run_export(1, snapshot, str(tmp_path / "full"), LINK_MODE_COPY)
+    assert worker.finished_jobs == [(1, 8, 0, 0, False)]
+
+    # 第二批落盘后取消，再用新任务导出到同一目录，从断点继续
+    interrupt_export(worker, snapshot, tmp_path / "resumed")
+
+    started = []
+    worker.started.connect(lambda job, done, total: started.append((done, total)))
+    worker.run_export(3, snapshot, str(tmp_path / "resumed"), LINK_MODE_COPY)
+    assert started == [(4, 8)] and worker.finished_jobs[-1] == (3, 8, 0, 0, False)
+    assert output_files(tmp_path / "resumed") == output_files(tmp_path / "full")
+    coco = json.loads((tmp_path / "full" / "annotations" / "instances_train.json").read_text("utf-8"))
+    assert len(coco["images"]) == 4 and {category["name"] for category in coco["categories"]} == {"car", "person", "tree"}
+
+
+@pytest.mark.parametrize("damage", ["missing", "truncated"])
+def test_damaged_part_file_restarts_export(tmp_path, worker, monkeypatch, damage):
+    monkeypatch.setattr(ExportWorker, "EXPORT_CHUNK_SIZE", 2)
+    snapshot = make_dataset(tmp_path / "images").snapshot()
+    worker.run_export(1, snapshot, str(tmp_path / "full"), LINK_MODE_COPY)
+    interrupt_export(worker, snapshot, tmp_path / "resumed")
+
+    part = tmp_path / "resumed" / "annotations" / "instances_train.images.part"
+    if damage == "missing":
+        part.unlink()
+    else:
+        part.write_bytes(part.read_bytes()[:5])
+
+    # 断点作废，从头导出，结果与一次完成的导出相同（不含补入的空字节）
+    started = []
+    worker.started.connect(lambda job, done, total: started.append((done, total)))
+    worker.run_export(3, snapshot, str(tmp_path / "resumed"), LINK_MODE_COPY)
+    assert started == [(0, 8)] and worker.finished_jobs[-1] == (3, 8, 0, 0, False)
+    assert output_files(tmp_path / "resumed") == output_files(tmp_path / "full")
+
+
+def test_bad_files_are_counted_and_skipped(tmp_path, worker):
+    store = make_dataset(tmp_path / "images")
+    # 标注坐标不合法；另一个“图片”根本不是图片且没有标注、也没有预读的尺寸
+    with open(label_file_path(store.path_at(0)), "w", encoding="utf-8") as f:
+        json.dump({"shapes": [{"label": "car", "points": [["x", None]]}]}, f)
+    with open(store.path_at(1), "wb") as f:
+        f.write(b"not an image")
+    os.remove(label_file_path(store.path_at(1)))
+    os.remove(store.path_at(3))
+
+    worker.run_export(1, store.snapshot(), str(tmp_path / "out"), LINK_MODE_COPY)
+    # 8 个待导出文件：1 个标注不合法记为失败，1 个不存在，非图片文件仍然导出（尺寸未知）
+    assert worker.finished_jobs == [(1, 6, 1, 1, False)] and not worker.failed_jobs
+    for split in ("train", "val"):
+        coco = json.loads((tmp_path / "out" / "annotations" / f"instances_{split}.json").read_text("utf-8"))
+        listed = (tmp_path / "out" / f"{split}.txt").read_text("utf-8").split()
+        assert [image["file_name"] for image in coco["images"]] == listed
+
+
+def test_unexpected_error_always_reports_failure(tmp_path, worker):
+    worker.run_export(1, None, str(tmp_path / "out"), LINK_MODE_COPY)
+    assert worker.failed_jobs and worker.failed_jobs[0][0] == 1 and not worker.finished_jobs
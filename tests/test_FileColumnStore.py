@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FileColumnStore.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 10:05
+'''
+
+# tests/test_FileColumnStore.py
+
+import uuid
+
+import numpy as np
+import pytest
+
+from conftest import FILE_HEADERS, make_file_items
+from data.FileColumnStore import FileColumnStore, InvalidFileIdError
+from models.FileTableModel import FileTableModel
+from data.TableDataStruct import FileDataStruct, default_color
+
+STATES = ["未标注", "训练集", "验证集"]
+
+
+def make_items(count: int) -> list[FileDataStruct]:
+    return make_file_items((f"图片_{i}.jpg" for i in range(count)), state=lambda i: STATES[i % 3])
+
+
+def rows_of(store: FileColumnStore) -> list[tuple]:
+    return [(view.id, view.file_image_name, view.file_image_state) for view in store]
+
+
+def expected_rows(items: list[FileDataStruct]) -> list[tuple]:
+    return [(item.id, item.file_image_name, item.file_image_state) for item in items]
+
+
+def test_delete_range_matches_list_deletion():
+    items = make_items(300)
+    store = FileColumnStore(items)
+    expected = list(items)
+    # 与 remove_rows 相同：多个区间从后往前删除
+    for first, last in [(250, 299), (120, 121), (40, 79), (0, 0)]:
+        store.delete_range(first, last)
+        del expected[first:last + 1]
+    assert rows_of(store) == expected_rows(expected)
+    counts = store.state_counts()
+    assert [counts[state] for state in STATES] == [sum(item.file_image_state == state for item in expected)
+                                                   for state in STATES]
+    for row in (0, 57, len(store) - 1):
+        assert store.find_row_by_id(expected[row].id) == row
+    assert store.find_row_by_id(items[100].id) == 100 - 41 and store.find_row_by_id(items[45].id) == -1
+
+
+def test_delete_range_keeps_snapshots_intact():
+    items = make_items(50)
+    store = FileColumnStore(items)
+    snapshot = store.snapshot()
+    store.delete_range(10, 19)
+    store.delete_range(0, 4)
+    assert len(snapshot) == 50
+    assert snapshot.names() == [item.file_image_name for item in items]
+    assert store.names() == [item.file_image_name for item in items[5:10] + items[20:]]
+
+
+def test_delete_range_in_place_after_appends():
+    store = FileColumnStore(make_items(20))
+    store.delete_range(3, 5)
+    store.extend(make_items(4))
+    store.delete_range(0, 1)
+    names = store.names()
+    assert len(names) == 19 and names[0] == "图片_2.jpg" and names[-4:] == [f"图片_{i}.jpg" for i in range(4)]
+    assert np.array_equal(store.serials, np.sort(store.serials))
+
+
+def test_encode_file_ids_round_trip():
+    items = make_items(1000)
+    store = FileColumnStore(items)
+    assert store.ids_at(np.arange(1000)) == [item.id for item in items]
+
+
+@pytest.mark.parametrize("bad_id", [str(uuid.uuid4()), "ABCDEF0123456789", "0x0123456789abcd", "0123 456789abcde",
+                                    "abc", 0x0123456789abcdef])
+def test_invalid_file_id_rejected_before_any_change(bad_id):
+    store = FileColumnStore(make_items(3))
+    items = make_items(2) + [FileDataStruct("坏.jpg", "未标注", default_color, bad_id)]
+    with pytest.raises(InvalidFileIdError):
+        store.extend(items)
+    assert len(store) == 3 and store.version == 1
+
+
+def test_model_rejects_invalid_id_before_inserting(recorder):
+    model = FileTableModel(headers=FILE_HEADERS)
+    events = recorder(model)
+    with pytest.raises(InvalidFileIdError, match="16 位"):
+        model.add_items(make_items(2) + [FileDataStruct("坏.jpg", "未标注", default_color, str(uuid.uuid4()))])
+    assert events.events == [] and model.rowCount() == 0
+    model.add_items(make_items(2))
+    assert model.rowCount() == 2
+
+
+@pytest.mark.parametrize("diff", [False, True])
+def test_replace_all_rejects_invalid_id_before_reset(recorder, diff):
+    model = FileTableModel(headers=FILE_HEADERS)
+    model.add_items(make_items(2))
+    events = recorder(model)
+    model.modelAboutToBeReset.connect(lambda: events.events.append(("modelAboutToBeReset",)))
+    with pytest.raises(InvalidFileIdError):
+        model.replace_all([FileDataStruct("坏.jpg", "未标注", default_color, "not-hex")], diff=diff)
+    assert events.events == [] and model.rowCount() == 2
+
+
+def test_compact_with_duplicate_ids():
+    items = make_items(4)
+    store = FileColumnStore(items + [FileDataStruct("副本.jpg", "未标注", default_color, items[1].id)])
+    assert store.find_row_by_id(items[1].id) == 4
+    store.compact([1, 4])
+    assert store.find_row_by_id(items[1].id) == -1 and len(store) == 3
+    store = FileColumnStore(items + [FileDataStruct("副本.jpg", "未标注", default_color, items[1].id)])
+    store.compact([1])
+    assert store.find_row_by_id(items[1].id) == 3
+
+
+def test_snapshot_isolated_from_later_changes():
+    items = make_items(100)
+    store = FileColumnStore(items)
+    snapshot = store.snapshot()
+    states_before = snapshot.states.copy()
+    store.set_rows_state(np.arange(0, 100, 2), "已标注", default_color)
+    store.set_rows_image_size(np.array([1]), np.array([640]), np.array([480]))
+    store.extend(make_items(10))
+    store.delete_range(50, 59)
+    assert np.array_equal(snapshot.states, states_before)
+    assert len(snapshot) == 100 and snapshot.widths[1] == 0
+    assert snapshot.names() == [item.file_image_name for item in items]
+    assert not snapshot.states.flags.writeable
+
+
+def test_remap_rows_across_versions():
+    items = make_items(100)
+    store = FileColumnStore(items)
+    snapshot = store.snapshot()
+    rows = np.array([5, 55, 70])
+    assert store.remap_rows(rows, snapshot) is rows
+    store.delete_range(50, 59)
+    store.extend(make_items(3))
+    assert store.remap_rows(rows, snapshot).tolist() == [5, 60]
+    assert FileColumnStore(items).remap_rows(rows, snapshot) is None
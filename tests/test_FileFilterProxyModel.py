@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FileFilterProxyModel.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 13:20
+'''
+
+# tests/test_FileFilterProxyModel.py
+
+import numpy as np
+import pytest
+from PySide6.QtCore import Qt
+
+from conftest import make_file_model
+from data.FileQuery import compile_query
+from data.TableDataStruct import FileDataStruct, default_color, train_color
+from models.FileFilterProxyModel import FileFilterProxyModel
+from models.FileTableModel import FileTableModel, COL_NAME
+
+def make_models(count: int = 30):
+    source = make_file_model((f"img_{i}.jpg" for i in range(count)), state=lambda i: "训练集" if i % 4 == 0 else "未标注")
+    proxy = FileFilterProxyModel()
+    proxy.setSourceModel(source)
+    return source, proxy
+
+
+def proxy_names(proxy: FileFilterProxyModel) -> list[str]:
+    return [proxy.data(proxy.index(row, COL_NAME)) for row in range(proxy.rowCount())]
+
+
+def test_accepted_rows_define_the_mapping():
+    source, proxy = make_models()
+    assert proxy.rowCount() == 30
+    proxy.set_accepted_rows(np.array([25, 3, 7, 3]))
+    assert proxy_names(proxy) == ["img_3.jpg", "img_7.jpg", "img_25.jpg"]
+    assert proxy.mapToSource(proxy.index(2, 0)).row() == 25
+    assert proxy.mapFromSource(source.index(7, 1)).row() == 1
+    assert not proxy.mapFromSource(source.index(8, 1)).isValid()
+    proxy.set_accepted_rows(None)
+    assert proxy.rowCount() == 30 and proxy.accepted_rows is None
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_accepted_rows_are_copied(ordered):
+    source, proxy = make_models()
+    accepted = np.array([5, 20, 25])
+    proxy.set_accepted_rows(accepted, ordered=ordered)
+    # 删除未被接受的源行：代理内部原位平移行号，调用方的数组保持不变
+    source.remove_rows([2])
+    assert accepted.tolist() == [5, 20, 25]
+    assert proxy_names(proxy) == ["img_5.jpg", "img_20.jpg", "img_25.jpg"]
+    assert proxy.mapToSource(proxy.index(0, 0)).row() == 4
+
+
+def test_ordered_rows_keep_given_order():
+    source, proxy = make_models()
+    proxy.set_accepted_rows(np.array([9, 2, 20]), ordered=True)
+    assert proxy_names(proxy) == ["img_9.jpg", "img_2.jpg", "img_20.jpg"]
+    assert proxy.mapFromSource(source.index(20, 0)).row() == 2
+
+
+@pytest.mark.parametrize("accepted", [None, np.arange(0, 30, 3)])
+def test_sort_by_name_uses_natural_order(accepted):
+    source, proxy = make_models()
+    proxy.set_accepted_rows(accepted)
+    proxy.sort(COL_NAME, Qt.DescendingOrder)
+    names = proxy_names(proxy)
+    expected = sorted((f"img_{i}.jpg" for i in (range(30) if accepted is None else accepted)),
+                      key=lambda name: int(name[4:-4]), reverse=True)
+    assert names == expected
+    proxy.sort(-1)
+    assert proxy_names(proxy) == sorted(names, key=lambda name: int(name[4:-4]))
+
+
+def brute_force(source: FileTableModel, accept) -> list[int]:
+    return [row for row in range(source.rowCount())
+            if accept(source.data(source.index(row, COL_NAME)), source.data(source.index(row, 2)))]
+
+
+def test_predicate_result_is_maintained_incrementally(recorder):
+    source, proxy = make_models(40)
+    plan = compile_query("img_1 -state:训练集")
+    proxy.set_accepted_rows(plan.filter(source.snapshot()), plan)
+
+    def accept(name, state):
+        return "img_1" in name and state != "训练集"
+
+    events = recorder(proxy)
+    expected_rows = lambda: brute_force(source, accept)
+    assert proxy.accepted_rows.tolist() == expected_rows()
+
+    source.add_items([FileDataStruct("img_100.jpg", "未标注", default_color),
+                      FileDataStruct("cam_1.jpg", "未标注", default_color),
+                      FileDataStruct("img_101.jpg", "训练集", train_color)])
+    assert proxy.accepted_rows.tolist() == expected_rows()
+
+    source.remove_rows([1, 10, 11, 30])
+    assert proxy.accepted_rows.tolist() == expected_rows()
+
+    # 状态变化：命中行改为训练集后移出结果，训练集改回未标注后重新加入
+    row_of = {source.data(source.index(row, COL_NAME)): row for row in range(source.rowCount())}
+    source.update_rows_state([row_of["img_13.jpg"], row_of["img_16.jpg"]], "训练集", train_color)
+    source.update_rows_state([row_of["img_12.jpg"], row_of["img_101.jpg"]], "未标注", default_color)
+    assert proxy.accepted_rows.tolist() == expected_rows()
+    assert "img_101.jpg" in proxy_names(proxy) and "img_13.jpg" not in proxy_names(proxy)
+    assert "modelReset" not in events.names()
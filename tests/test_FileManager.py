@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FileManager.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/30 10:10
+'''
+
+# tests/test_FileManager.py
+
+import numpy as np
+import pytest
+from PySide6.QtCore import Qt, QItemSelection, QItemSelectionModel
+from PySide6.QtWidgets import QMessageBox
+
+from managers.FileManager import FileManager
+from models.FileTableModel import COL_NAME
+
+
+@pytest.fixture
+def manager(qapp):
+    manager = FileManager()
+    yield manager
+    manager.close()
+
+
+def select_proxy_rows(manager: FileManager, ranges: list[tuple[int, int]]):
+    proxy = manager.proxy_model
+    selection = QItemSelection()
+    for top, bottom in ranges:
+        selection.select(proxy.index(top, 0), proxy.index(bottom, proxy.columnCount() - 1))
+    manager.view.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+
+
+def test_delete_selected_files_maps_selection_ranges(manager, monkeypatch):
+    monkeypatch.setattr(QMessageBox, "question", lambda *args: QMessageBox.Yes)
+    # 按文件名降序排列，代理行号与源行号不同
+    manager.proxy_model.sort(COL_NAME, Qt.DescendingOrder)
+    ranges = [(2, 4), (3, 6), (20, 20)]
+    proxy_rows = np.unique(np.concatenate([np.arange(top, bottom + 1) for top, bottom in ranges]))
+    expected = manager.source_model.ids_at(np.sort(manager.proxy_model.map_rows_to_source(proxy_rows)))
+    row_count = manager.source_model.rowCount()
+
+    # 不应逐行创建代理索引并调用 mapToSource
+    monkeypatch.setattr(manager.proxy_model, "mapToSource", lambda index: pytest.fail("mapToSource called"))
+    deleted = []
+    manager.deleteFileItemEmit.connect(deleted.append)
+    select_proxy_rows(manager, ranges)
+    manager.delete_selected_files()
+
+    assert deleted == [expected]
+    assert manager.source_model.rowCount() == row_count - len(expected)
+    assert all(manager.source_model.find_row_by_id(file_id) == -1 for file_id in expected)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FileQuery.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 15:30
+'''
+
+# tests/test_FileQuery.py
+
+import fnmatch
+import re
+
+import pytest
+
+from conftest import make_file_store
+from data.FileColumnStore import FileColumnStore
+from data.FileQuery import compile_query, QuerySyntaxError
+
+# (查询语句, 逐行判定 (名称, 状态) -> 是否命中)
+CASES = [
+    ("IMG_1", lambda name, state: "img_1" in name.lower()),
+    ("name:cam1_* state:训练集", lambda name, state: fnmatch.fnmatch(name.lower(), "cam1_*") and state == "训练集"),
+    ("~_1[0-3]\\.jpg$ -state:训练集", lambda name, state: re.search(r"_1[0-3]\.jpg$", name) and state != "训练集"),
+    ("-img_2 -name:*.png cam", lambda name, state: "img_2" not in name and not name.endswith(".png") and "cam" in name),
+    ('name:~"^cam[0-2]" 样本', lambda name, state: re.match("cam[0-2]", name) and "样本" in name),
+    ("state:不存在", lambda name, state: False),
+]
+
+
+def make_store(count: int = 600) -> FileColumnStore:
+    def name(i):
+        return f"cam{i % 5}_img_{i}" + ("_样本" if i % 11 == 0 else "") + (".png" if i % 4 == 0 else ".jpg")
+    return make_file_store((name(i) for i in range(count)), state=lambda i: "训练集" if i % 3 == 0 else "未标注")
+
+
+@pytest.mark.parametrize("text, accept", CASES)
+def test_plan_matches_brute_force(text, accept):
+    store = make_store()
+    snapshot = store.snapshot()
+    expected = [row for row, name in enumerate(store.names()) if accept(name, store.state_at(row))]
+    plan = compile_query(text)
+    assert plan.filter(snapshot).tolist() == expected
+    assert plan.evaluate(snapshot, 100, 300).nonzero()[0].tolist() == [row - 100 for row in expected if 100 <= row < 300]
+
+
+def test_plan_is_split_for_the_process_engine():
+    plan = compile_query("-img_2 name:*.png state:训练集 ~^cam")
+    assert {clause[0] for clause in plan.engine_clauses} == {"name_contains", "name_regex"}
+    assert ("name_contains", "img_2", True) in plan.engine_clauses
+    assert [clause.field for clause in plan.column_plan.clauses] == ["state"]
+    assert compile_query("state:训练集").engine_clauses == ()
+    assert compile_query("img").simple_text == "img" and compile_query("-img").simple_text is None
+
+
+def test_invalid_regex_raises():
+    with pytest.raises(QuerySyntaxError):
+        compile_query("~cam[")
+
+
+@pytest.mark.parametrize("previous, current, refines", [
+    ("img", "img_1", True),
+    ("IMG", "img_1 state:训练集", True),
+    ("img -cam12", "img -cam1 *.jpg", True),
+    ("name:*.jpg", "name:*.jpg img_1", True),
+    ("img_1", "img", False),
+    ("-cam1", "-cam12", False),
+    ("state:训练集", "state:训练集 img", False),
+    ("~^img", "~^img_", False),
+])
+def test_refines(previous, current, refines):
+    assert compile_query(current).refines(compile_query(previous)) is refines
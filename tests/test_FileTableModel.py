@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FileTableModel.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 14:05
+'''
+
+# tests/test_FileTableModel.py
+
+import numpy as np
+
+from conftest import make_file_model
+from data.FileQuery import compile_query
+from data.TableDataStruct import FileDataStruct, default_color, train_color, val_color
+from models.FileFilterProxyModel import FileFilterProxyModel
+from models.FileTableModel import FileTableModel, COL_STATE, MAX_CHANGED_RANGES
+
+def make_model(count: int = 20) -> FileTableModel:
+    return make_file_model(f"img_{i}.jpg" for i in range(count))
+
+
+def test_update_rows_state_emits_one_change_per_range(recorder):
+    model = make_model()
+    model.update_rows_state([4], "训练集", train_color)
+    events = recorder(model)
+    changed_ids = model.update_rows_state([9, 3, 4, 5, 10, 15, 3], "训练集", train_color)
+
+    # 第 4 行已是训练集，不算变化；其余行合并为 [3]、[5]、[9, 10]、[15] 四个区间
+    assert changed_ids == model.ids_at(np.array([3, 5, 9, 10, 15]))
+    assert events.events == [("dataChanged", (3, 0), (3, 4)), ("dataChanged", (5, 0), (5, 4)),
+                             ("dataChanged", (9, 0), (10, 4)), ("dataChanged", (15, 0), (15, 4))]
+    assert [model.data(model.index(row, COL_STATE)) for row in (3, 4, 5, 6)] == ["训练集"] * 3 + ["未标注"]
+    assert model.state_counts()["训练集"] == 6
+
+
+def test_update_rows_state_collapses_scattered_rows(recorder):
+    model = make_model(4 * MAX_CHANGED_RANGES)
+    events = recorder(model)
+    rows = np.arange(1, 4 * MAX_CHANGED_RANGES, 2)
+    assert len(model.update_rows_state(rows, "验证集", val_color)) == len(rows)
+    assert events.events == [("dataChanged", (1, 0), (int(rows[-1]), 4))]
+
+
+def test_update_rows_state_without_changes_is_silent(recorder):
+    model = make_model()
+    events = recorder(model)
+    assert model.update_rows_state([-1, 2, 40], "未标注", default_color) == []
+    assert events.events == []
+
+
+def brute_force_counts(model: FileTableModel) -> dict[str, int]:
+    states = [model.data(model.index(row, COL_STATE)) for row in range(model.rowCount())]
+    return {state: states.count(state) for state in ("未标注", "训练集", "验证集", "已标注")}
+
+
+def test_state_counts_follow_every_edit():
+    model = make_model(200)
+    model.update_rows_state(range(0, 200, 3), "训练集", train_color)
+    model.update_item_state(1, "验证集", val_color)
+    model.remove_rows([0, 1, 2, 50, 51])
+    model.remove_rows(range(100, 190, 2))
+    model.mark_annotated(np.arange(5, 40), ["person"] * 35)
+    model.add_items(FileDataStruct(f"new_{i}.jpg", "验证集", val_color) for i in range(7))
+    counts = model.state_counts()
+    assert {state: counts.get(state, 0) for state in brute_force_counts(model)} == brute_force_counts(model)
+    assert sum(counts.values()) == model.rowCount()
+    for state in ("训练集", "已标注", "不存在"):
+        assert model.rows_in_state(state).tolist() == [
+            row for row in range(model.rowCount()) if model.data(model.index(row, COL_STATE)) == state]
+
+
+def test_state_facet_stays_in_sync(recorder):
+    model = make_model(60)
+    model.update_rows_state(range(0, 60, 4), "训练集", train_color)
+    proxy = FileFilterProxyModel()
+    proxy.setSourceModel(model)
+    # 与 FileManager.apply_state_facet 相同：结果取自状态列，查询计划用于之后的增量维护
+    proxy.set_accepted_rows(model.rows_in_state("训练集"), compile_query("state:训练集"))
+    events = recorder(proxy)
+    model.update_rows_state([1, 2, 3], "训练集", train_color)
+    model.update_rows_state([0, 8], "验证集", val_color)
+    model.remove_rows([4, 5])
+    assert proxy.accepted_rows.tolist() == model.rows_in_state("训练集").tolist()
+    assert "modelReset" not in events.names()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FilterWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 11:10
+'''
+
+# tests/test_FilterWorker.py
+
+import numpy as np
+import pytest
+
+from conftest import make_file_store
+from data.FileColumnStore import FileColumnStore
+from data.FileQuery import compile_query
+from data.TrigramIndex import TrigramIndex
+from data.TableDataStruct import train_color
+from workers.FilterWorker import FilterWorker, FILTER_MODE_THREAD, FILTER_MODE_PROCESS
+
+
+def make_store(count: int = 2000) -> FileColumnStore:
+    return make_file_store((f"cam{i % 7}_img_{i}.jpg" for i in range(count)),
+                           state=lambda i: "训练集" if i % 3 == 0 else "未标注")
+
+
+def build_index(store: FileColumnStore) -> TrigramIndex:
+    index = TrigramIndex()
+    index.add(store.serials.copy(), store.names())
+    return index
+
+
+def brute_force(store: FileColumnStore, text: str) -> list[int]:
+    return [row for row, name in enumerate(store.names()) if text.lower() in name.lower()]
+
+
+@pytest.fixture
+def worker():
+    worker = FilterWorker()
+    worker.results = []
+    worker.results_ready.connect(lambda rows, generation, snapshot: worker.results.append((rows.tolist(), generation)))
+    yield worker
+    worker.parallel_engine.shutdown()
+
+
+def test_stale_generation_is_dropped(worker):
+    store = make_store()
+    snapshot, index = store.snapshot(), build_index(store)
+    worker.cancel_before(2)
+    worker.run_filter(snapshot, index, compile_query("img_1"), 1, 0, FILTER_MODE_THREAD)
+    assert worker.results == []
+    worker.run_filter(snapshot, index, compile_query("img_1"), 2, 0, FILTER_MODE_THREAD)
+    assert worker.results == [(brute_force(store, "img_1"), 2)]
+
+
+def test_refinement_reuses_previous_result(worker):
+    store = make_store()
+    snapshot, index = store.snapshot(), build_index(store)
+    for generation, text in enumerate(["cam", "cam1", "cam1_img_1", "CAM1_IMG_10", "img_2"], 1):
+        worker.cancel_before(generation)
+        worker.run_filter(snapshot, index, compile_query(text), generation, 7, FILTER_MODE_THREAD)
+        assert worker.results[-1] == (brute_force(store, text), generation)
+    # 数据版本变化后不能复用上一次结果
+    store.delete_range(0, 99)
+    index.discard(100)
+    worker.cancel_before(10)
+    worker.run_filter(store.snapshot(), index, compile_query("img_2"), 10, 8, FILTER_MODE_THREAD)
+    assert worker.results[-1] == (brute_force(store, "img_2"), 10)
+
+
+def test_superseded_request_stops_early(worker):
+    # 线性扫描每 _CANCEL_CHECK_INTERVAL 行检查一次，第二次检查时请求已被取代
+    checks = []
+
+    def should_stop():
+        checks.append(1)
+        return len(checks) > 1
+
+    assert worker._scan(make_store(20000).snapshot(), "img", None, should_stop) is None
+    assert len(checks) == 2
+
+
+@pytest.mark.parametrize("text", ["img_1", "-name:*5.jpg state:训练集", "~^cam[12]_ -img_1"])
+def test_process_mode_matches_thread_mode(worker, text):
+    store = make_store()
+    snapshot, index = store.snapshot(), build_index(store)
+    worker.parallel_engine.max_workers = 2
+    plan = compile_query(text)
+    worker.cancel_before(1)
+    worker.run_filter(snapshot, index, plan, 1, 0, FILTER_MODE_PROCESS)
+    worker.cancel_before(2)
+    worker.run_filter(snapshot, index, plan, 2, 0, FILTER_MODE_THREAD)
+    assert worker.results[0][0] == worker.results[1][0] == plan.filter(snapshot).tolist()
+
+
+def unready_index() -> TrigramIndex:
+    index = TrigramIndex()
+    index.clear(ready=False)
+    return index
+
+
+def brute_force_plan(store: FileColumnStore, text: str) -> list[int]:
+    return compile_query(text).filter(store.snapshot()).tolist()
+
+
+def test_refinement_without_index_scans_previous_result_only(worker, monkeypatch):
+    store = make_store()
+    snapshot, index = store.snapshot(), unready_index()
+    scanned = []
+    scan = worker._scan
+    monkeypatch.setattr(worker, "_scan", lambda snapshot, text, candidates, should_stop:
+                        scanned.append(None if candidates is None else len(candidates))
+                        or scan(snapshot, text, candidates, should_stop))
+    for generation, text in enumerate(["cam1", "cam1_img_1", "img_2"], 1):
+        worker.cancel_before(generation)
+        worker.run_filter(snapshot, index, compile_query(text), generation, 0, FILTER_MODE_THREAD)
+        assert worker.results[-1] == (brute_force(store, text), generation)
+    # 第二次只复查第一次的命中行；第三次不是细化，扫描全部行
+    assert scanned == [None, len(brute_force(store, "cam1")), None]
+
+
+def test_refinement_in_process_mode_skips_the_pool(worker, monkeypatch):
+    store = make_store()
+    snapshot, index = store.snapshot(), unready_index()
+    worker.parallel_engine.max_workers = 2
+    worker.cancel_before(1)
+    worker.run_filter(snapshot, index, compile_query("cam1"), 1, 0, FILTER_MODE_PROCESS)
+    monkeypatch.setattr(worker.parallel_engine, "filter", lambda *args: pytest.fail("pool used for a refinement"))
+    worker.cancel_before(2)
+    worker.run_filter(snapshot, index, compile_query("cam1_img_1 -*5.jpg"), 2, 0, FILTER_MODE_PROCESS)
+    assert worker.results[-1] == (brute_force_plan(store, "cam1_img_1 -*5.jpg"), 2)
+
+
+def test_refinement_reevaluates_state_conditions(worker):
+    store = make_store()
+    index = unready_index()
+    worker.cancel_before(1)
+    worker.run_filter(store.snapshot(), index, compile_query("cam1 state:训练集"), 1, 0, FILTER_MODE_THREAD)
+    # 修改状态不改变数据版本：含状态条件的结果不能作为细化的基础，只有文件名条件的结果可以
+    rows = np.array(brute_force(store, "cam1"), dtype=np.int64)
+    store.set_rows_state(rows, "训练集", train_color)
+    for generation, text in enumerate(["cam1_img state:训练集", "cam1", "cam1_img state:训练集"], 2):
+        worker.cancel_before(generation)
+        worker.run_filter(store.snapshot(), index, compile_query(text), generation, 0, FILTER_MODE_THREAD)
+        assert worker.results[-1] == (brute_force_plan(store, text), generation)
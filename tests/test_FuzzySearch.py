@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_FuzzySearch.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 16:10
+'''
+
+# tests/test_FuzzySearch.py
+
+import pytest
+
+import data.FuzzySearch as FuzzySearch
+from data.FuzzySearch import FuzzyQuery, _LOWER
+from conftest import make_file_store
+
+
+def test_ranking_prefers_tight_boundary_matches():
+    names = ["xximg_zz_0042.jpg", "image_0042.jpg", "img_0042.jpg", "cam0_img_0042.jpg", "photo.png"]
+    rows = FuzzyQuery("img0042").top_k(make_file_store(names).snapshot()).tolist()
+    # 紧凑且位于单词边界的命中排在前面，字符被拆散的 image_0042 排在最后
+    assert rows == [2, 3, 0, 1]
+
+
+def test_scalar_scorer_agrees_with_vectorised_scorer():
+    names = [f"cam{i % 3}_img_{i:04d}_{'x' * (i % 9)}.jpg" for i in range(300)] + ["IMG-Final.JPG", "a.b"]
+    snapshot = make_file_store(names).snapshot()
+    for text in ("img", "c1_0", "ig.jpg", "final", "zz"):
+        query = FuzzyQuery(text)
+        scores = query._score_block(snapshot, 0, len(names))
+        scalar = [query._score_name(_LOWER[bytearray(name.encode())].tobytes()) for name in names]
+        assert scores.tolist() == pytest.approx(scalar)
+
+
+def test_long_paths_are_matched():
+    prefix = "/data/projects/autonomous_driving/front_camera/2025-08-01/session_0007/raw_frames/images/"
+    names = [prefix + f"image_{i:04d}.png" for i in range(100)] + ["x" * 70 + "image_0042"]
+    assert len(prefix) > 64
+    rows = FuzzyQuery("image_0042").top_k(make_file_store(names).snapshot()).tolist()
+    # 目录前缀超过 64 字节，名称部分仍能命中
+    assert sorted(rows) == [42, 100]
+
+
+@pytest.mark.parametrize("block", [7, 65536])
+def test_ties_are_ordered_by_row(monkeypatch, block):
+    monkeypatch.setattr(FuzzySearch, "_SCORE_BLOCK", block)
+    names = ["sample.jpg"] * 40 + ["best_sample.jpg", "sample.jpg"]
+    snapshot = make_file_store(names).snapshot()
+    query = FuzzyQuery("sample", k=5)
+    assert query.top_k(snapshot).tolist() == [0, 1, 2, 3, 4]
+    assert FuzzyQuery("sample", k=50).top_k(snapshot).tolist() == list(range(40)) + [41, 40]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_ImportWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 17:20
+'''
+
+# tests/test_ImportWorker.py
+
+import os
+
+import numpy as np
+
+from conftest import FILE_HEADERS
+from data.FileQuery import compile_query
+from data.ProjectFile import load_project
+from models.FileTableModel import FileTableModel, COL_NAME
+from workers.ImportWorker import ImportWorker, path_file_id
+
+
+def make_tree(root) -> list[str]:
+    """建立两层目录的图片树，返回全部图片的绝对路径（按导入顺序）。"""
+    paths = []
+    for directory in ("a_very_long_directory_name_for_session_one", os.path.join("b", "nested")):
+        os.makedirs(root / directory)
+        for name in ("img_2.jpg", "img_10.PNG", "notes.txt"):
+            (root / directory / name).write_bytes(b"")
+            if not name.endswith(".txt"):
+                paths.append(str(root / directory / name))
+    return sorted(paths, key=lambda path: (os.path.dirname(path), os.path.basename(path)))
+
+
+def run_import(root) -> list:
+    worker = ImportWorker()
+    batches = []
+    worker.batch_ready.connect(lambda job, items: (batches.extend(items), worker.batch_done()))
+    worker.run_import(1, str(root))
+    return batches
+
+
+def test_import_keeps_name_and_directory_apart(tmp_path):
+    paths = make_tree(tmp_path)
+    items = run_import(tmp_path)
+    assert [item.file_image_path for item in items] == paths
+    assert [item.file_image_name for item in items] == [os.path.basename(path) for path in paths]
+    assert [item.id for item in items] == [path_file_id(path) for path in paths]
+
+    model = FileTableModel(headers=FILE_HEADERS)
+    model.add_items(items)
+    rows = np.arange(model.rowCount())
+    assert model.names_at(rows) == [os.path.basename(path) for path in paths]
+    assert model.paths_at(rows) == paths
+    assert model.data(model.index(0, COL_NAME)) == os.path.basename(paths[0])
+    # 搜索只看文件名，目录中的文本不会命中
+    assert compile_query("session").filter(model.snapshot()).tolist() == []
+    assert len(model.snapshot().dir_names) == 3
+
+    model.remove_rows([0])
+    assert model.paths_at(np.arange(model.rowCount())) == paths[1:]
+    assert model.get_item_by_row(0).to_struct().file_image_path == paths[1]
+
+
+def test_directories_survive_project_round_trip(tmp_path):
+    paths = make_tree(tmp_path / "images")
+    model = FileTableModel(headers=FILE_HEADERS)
+    model.add_items(run_import(tmp_path / "images"))
+    project = str(tmp_path / "data.tvproj")
+    model.save_project(project)
+
+    store = load_project(project)
+    assert store.paths_at(np.arange(len(store))) == paths
+    assert store.names() == [os.path.basename(path) for path in paths]
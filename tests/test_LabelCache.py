@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_LabelCache.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 11:30
+'''
+
+# tests/test_LabelCache.py
+
+import pytest
+
+from data.LabelCache import LabelCache, _INVALIDATION_HISTORY
+from data.LabelFile import read_labels, write_labels
+from data.TableDataStruct import LabelInfoDataStruct
+import workers.LabelLoader as label_loader
+from workers.LabelLoader import LabelLoader
+
+
+def labels(name: str) -> list[LabelInfoDataStruct]:
+    return [LabelInfoDataStruct(name, "car", points=[(0, 0), (4, 4)])]
+
+
+def test_evicts_least_recently_used():
+    cache = LabelCache(capacity=3)
+    for file_id in "abc":
+        cache.put(file_id, labels(file_id))
+    # 读取 a 之后，最久未使用的是 b
+    assert cache.get("a")[0].label_name == "a"
+    cache.put("d", labels("d"))
+    assert "b" not in cache and [file_id in cache for file_id in "acd"] == [True] * 3
+    assert len(cache) == 3
+    assert cache.get("b") is None
+
+
+def test_put_with_stale_token_is_rejected():
+    cache = LabelCache()
+    token = cache.token()
+    # 加载期间 a 被置为失效：带旧 token 的写入被拒绝，其他文件不受影响
+    cache.invalidate(["a"])
+    assert not cache.put("a", labels("old"), token)
+    assert cache.put("b", labels("b"), token)
+    assert "a" not in cache
+
+    # 失效之后才开始的加载可以写入
+    assert cache.put("a", labels("new"), cache.token())
+    assert cache.get("a")[0].label_name == "new"
+
+
+def test_invalidate_drops_cached_entries():
+    cache = LabelCache()
+    cache.put("a", labels("a"))
+    cache.put("b", labels("b"))
+    cache.invalidate(["a", "missing"])
+    assert "a" not in cache and "b" in cache
+
+
+def test_tokens_older_than_cleared_history_are_rejected():
+    cache = LabelCache(capacity=2)
+    token = cache.token()
+    # 失效记录超过上限后整体清理：清理之前取得的 token 一律视为过期，包括从未失效过的文件
+    for start in range(0, 2 * _INVALIDATION_HISTORY + 2, 2):
+        cache.invalidate([f"x{start}", f"x{start + 1}"])
+    assert not cache.put("never_invalidated", labels("stale"), token)
+    assert cache.put("never_invalidated", labels("fresh"), cache.token())
+
+
+def test_prefetch_skips_cached_and_does_not_resurrect_invalidated(tmp_path, monkeypatch):
+    paths = {}
+    for file_id in "abc":
+        paths[file_id] = str(tmp_path / f"{file_id}.jpg")
+        write_labels(paths[file_id], labels(file_id), (8, 8))
+    cache = LabelCache()
+    cache.put("a", labels("cached"))
+
+    # 读取 b 的标注文件期间，b 被重新标注（置为失效）
+    read_labels = label_loader.read_labels
+    reads = []
+
+    def read_and_invalidate(path):
+        reads.append(path)
+        if path == paths["b"]:
+            cache.invalidate(["b"])
+        return read_labels(path)
+
+    monkeypatch.setattr(label_loader, "read_labels", read_and_invalidate)
+    loader = LabelLoader(cache)
+    loader.cancel_before(1)
+    loader.prefetch(1, [(file_id, paths[file_id]) for file_id in "abc"])
+
+    assert reads == [paths["b"], paths["c"]]
+    assert cache.get("a")[0].label_name == "cached"
+    assert "b" not in cache
+    assert cache.get("c")[0].label_name == "c"
+
+
+def test_prefetch_stops_after_newer_request(tmp_path):
+    cache = LabelCache()
+    loader = LabelLoader(cache)
+    loader.cancel_before(2)
+    path = str(tmp_path / "a.jpg")
+    write_labels(path, labels("a"), (8, 8))
+    loader.prefetch(1, [("a", path)])
+    assert "a" not in cache
+
+
+MALFORMED_LABEL_FILES = [
+    "[1, 2]",
+    '{"shapes": {"label": "car"}}',
+    '{"shapes": [null]}',
+    '{"shapes": [{"label": "car", "points": [[1, 2, 3]]}]}',
+    '{"shapes": [{"label": "car", "points": [["a", "b"]]}]}',
+    '{"shapes": [{"label": "car", "points": [[1, NaN]]}]}',
+    '{"shapes": [{"label": "car", "points": 5}]}',
+    '{"shapes": [], "imageWidth": [1], "imageHeight": 2}',
+]
+
+
+@pytest.mark.parametrize("content", MALFORMED_LABEL_FILES)
+def test_read_labels_rejects_malformed_files(tmp_path, content):
+    path = str(tmp_path / "a.jpg")
+    (tmp_path / "a.json").write_text(content)
+    with pytest.raises(ValueError, match="标注文件格式错误"):
+        read_labels(path)
+
+
+def test_prefetch_continues_after_malformed_file(tmp_path):
+    paths = {file_id: str(tmp_path / f"{file_id}.jpg") for file_id in "abc"}
+    write_labels(paths["a"], labels("a"), (8, 8))
+    (tmp_path / "b.json").write_text('{"shapes": [null]}')
+    write_labels(paths["c"], labels("c"), (8, 8))
+    cache = LabelCache()
+    loader = LabelLoader(cache)
+    loader.cancel_before(1)
+    loader.prefetch(1, [(file_id, paths[file_id]) for file_id in "abc"])
+    assert "a" in cache and "b" not in cache and "c" in cache
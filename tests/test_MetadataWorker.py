@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_MetadataWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/29 10:15
+'''
+
+# tests/test_MetadataWorker.py
+
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import make_file_model
+from data.ImageMetadata import MetadataCache, read_image_metadata
+from models.FileTableModel import FileTableModel, COL_RESOLUTION
+from workers.MetadataWorker import MetadataWorker
+
+def save_image(path, size, orientation: int = 1):
+    exif = Image.Exif()
+    if orientation != 1:
+        exif[0x0112] = orientation
+    Image.new("RGB", size).save(path, "JPEG", exif=exif)
+
+
+def make_model(root, write_files: bool = True) -> FileTableModel:
+    """三张图片（第 1 张 EXIF 方向为 6）加一个不是图片的文件。"""
+    if write_files:
+        save_image(root / "a.jpg", (40, 30))
+        save_image(root / "b.jpg", (40, 30), orientation=6)
+        save_image(root / "c.jpg", (8, 6))
+        (root / "d.jpg").write_bytes(b"not an image")
+    return make_file_model(["a.jpg", "b.jpg", "c.jpg", "d.jpg"], directory=str(root))
+
+
+def run_scan(model: FileTableModel, cache_path: str) -> tuple:
+    worker = MetadataWorker()
+    finished = []
+    worker.chunk_ready.connect(lambda job, snapshot, rows, widths, heights:
+                               model.set_image_sizes(snapshot, rows, widths, heights))
+    worker.finished.connect(lambda *args: finished.append(args))
+    worker.run_scan(1, model.snapshot(), cache_path)
+    assert len(finished) == 1
+    return finished[0]
+
+
+def resolutions(model: FileTableModel) -> list[str]:
+    return [model.data(model.index(row, COL_RESOLUTION)) for row in range(model.rowCount())]
+
+
+def test_orientation_transposes_resolution(tmp_path):
+    save_image(tmp_path / "rotated.jpg", (40, 30), orientation=6)
+    meta = read_image_metadata(str(tmp_path / "rotated.jpg"))
+    assert (meta.width, meta.height, meta.orientation) == (40, 30, 6)
+    assert meta.display_size == (30, 40)
+
+
+def test_cache_is_invalidated_by_mtime(tmp_path):
+    path = str(tmp_path / "a.jpg")
+    save_image(path, (40, 30))
+    cache = MetadataCache(str(tmp_path / "cache" / "metadata.sqlite"))
+    try:
+        assert cache.get(path).display_size == (40, 30)
+        save_image(path, (10, 20))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert cache.lookup([path], [stat.st_mtime_ns + 1_000_000_000]) == {}
+        assert cache.get(path).display_size == (10, 20)
+    finally:
+        cache.close()
+
+
+def test_scan_fills_resolution_column_and_uses_cache(tmp_path, recorder):
+    model = make_model(tmp_path)
+    events = recorder(model)
+    cache_path = str(tmp_path / "cache" / "metadata.sqlite")
+
+    job, total, hits, reads, missing, _, cancelled, cache_error = run_scan(model, cache_path)
+    assert (job, total, hits, reads, missing, cancelled, cache_error) == (1, 4, 0, 3, 1, False, "")
+    assert resolutions(model) == ["40x30", "30x40", "8x6", ""]
+    # 只有分辨率列发射了变化：第 0-2 行为一个连续区间
+    assert events.events == [("dataChanged", (0, COL_RESOLUTION), (2, COL_RESOLUTION))]
+
+    # 文件不变，新的模型再扫描一次：全部来自缓存
+    model = make_model(tmp_path, write_files=False)
+    assert run_scan(model, cache_path)[1:5] == (4, 3, 0, 1)
+    assert resolutions(model) == ["40x30", "30x40", "8x6", ""]
+
+
+@pytest.mark.parametrize("unusable", ["directory", "corrupt"])
+def test_scan_without_usable_cache_still_completes(tmp_path, unusable):
+    model = make_model(tmp_path)
+    cache_path = tmp_path / "cache.sqlite"
+    if unusable == "directory":
+        # 缓存路径是一个目录：无法打开数据库
+        cache_path.mkdir()
+    else:
+        cache_path.write_bytes(b"this is not a sqlite database" * 100)
+
+    _, total, hits, reads, missing, _, cancelled, cache_error = run_scan(model, str(cache_path))
+    assert (total, hits, reads, missing, cancelled) == (4, 0, 3, 1, False)
+    assert cache_error
+    assert resolutions(model) == ["40x30", "30x40", "8x6", ""]
+
+
+def test_set_image_sizes_skips_rows_removed_after_snapshot(tmp_path):
+    model = make_model(tmp_path)
+    snapshot = model.snapshot()
+    model.remove_rows([1])
+    model.set_image_sizes(snapshot, np.array([0, 1, 2]), np.array([4, 5, 6], dtype=np.uint32),
+                          np.array([7, 8, 9], dtype=np.uint32))
+    assert resolutions(model) == ["4x7", "6x9", ""]
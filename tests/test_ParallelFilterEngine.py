@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_ParallelFilterEngine.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 11:30
+'''
+
+# tests/test_ParallelFilterEngine.py
+
+import pytest
+
+from conftest import make_file_store
+from data.FileColumnStore import FileColumnStore
+from workers.ParallelFilterEngine import ParallelFilterEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = ParallelFilterEngine(max_workers=2)
+    yield engine
+    engine.shutdown()
+
+
+def publish(engine: ParallelFilterEngine, store: FileColumnStore):
+    engine.publish((store.token, store.version), store.name_bytes, store.name_offsets)
+
+
+def test_contains_matches_brute_force(engine):
+    names = [f"{'图片' if i % 5 == 0 else 'Image'}_{i}.JPG" for i in range(5000)]
+    store = make_file_store(names)
+    publish(engine, store)
+    for text in ("image_12", "图片_1", ".jpg", "nothing"):
+        expected = [row for row, name in enumerate(names) if text.lower() in name.lower()]
+        assert engine.filter((("name_contains", text, False),)).tolist() == expected
+
+
+def test_republish_after_change(engine):
+    store = make_file_store(["a.jpg", "b.jpg", "ab.png"])
+    publish(engine, store)
+    assert engine.filter((("name_contains", "a", False),)).tolist() == [0, 2]
+    store.delete_range(0, 0)
+    publish(engine, store)
+    assert engine.filter((("name_contains", "a", False),)).tolist() == [1]
+
+
+def test_cancelled_filter_returns_none(engine):
+    publish(engine, make_file_store([f"img_{i}.jpg" for i in range(1000)]))
+    assert engine.filter((("name_contains", "img", False),), should_stop=lambda: True) is None
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_ProjectFile.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 17:45
+'''
+
+# tests/test_ProjectFile.py
+
+import numpy as np
+import pytest
+
+from conftest import make_file_store
+from data.FileColumnStore import FileColumnStore
+from data.ProjectFile import load_project, save_project, ProjectFormatError, _PAGE
+from data.TableDataStruct import FileDataStruct, default_color, train_color, val_color
+
+STATES = ["未标注", "训练集", "验证集"]
+
+
+def make_store(count: int = 500) -> FileColumnStore:
+    return make_file_store((f"图片_{i}.jpg" for i in range(count)), state=lambda i: STATES[i % 3],
+                           directory=lambda i: f"/data/set_{i % 4}")
+
+
+def contents(store: FileColumnStore) -> list[tuple]:
+    return [(store.id_at(row), store.path_at(row), store.state_at(row), store.color_at(row).name(), store.label_type_at(row),
+             int(store.widths[row]), int(store.heights[row])) for row in range(len(store))]
+
+
+@pytest.fixture
+def saved(tmp_path):
+    store = make_store()
+    store.set_rows_label_type(np.arange(0, 500, 5), ["person"] * 100)
+    store.set_rows_image_size(np.arange(10), np.full(10, 640), np.full(10, 480))
+    path = str(tmp_path / "data.tvproj")
+    stats = save_project(store, path)
+    assert stats.rewritten
+    return store, path
+
+
+def test_round_trip(saved):
+    store, path = saved
+    loaded = load_project(path)
+    assert contents(loaded) == contents(store)
+    assert loaded.state_counts() == store.state_counts()
+    assert loaded.find_row_by_id(store.id_at(123)) == 123
+
+
+def test_incremental_save_writes_only_changed_sections(saved):
+    store, path = saved
+    assert save_project(store, path).written == []
+
+    loaded = load_project(path)
+    loaded.set_rows_state(np.array([1, 2, 3]), "训练集", train_color)
+    stats = save_project(loaded, path)
+    assert not stats.rewritten and sorted(stats.written) == ["colors", "states"]
+    # 映射中的旧版本不受影响，重新打开得到新版本
+    assert loaded.state_at(1) == "训练集" and load_project(path).state_at(1) == "训练集"
+
+    loaded.append(FileDataStruct("新图片.jpg", "未标注", default_color, file_image_dir="/data/new"))
+    save_project(loaded, path)
+    reopened = load_project(path)
+    assert contents(reopened) == contents(loaded)
+
+
+def test_corrupted_header_falls_back_to_previous_version(saved):
+    store, path = saved
+    loaded = load_project(path)
+    loaded.set_rows_state(np.array([0]), "验证集", val_color)
+    save_project(loaded, path)
+
+    # 第二次保存的文件头写在第 1 个槽位；破坏它之后应读到第 0 个槽位中的上一版本
+    with open(path, "r+b") as f:
+        f.seek(_PAGE + 40)
+        byte = f.read(1)
+        f.seek(_PAGE + 40)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert contents(load_project(path)) == contents(store)
+
+    with open(path, "r+b") as f:
+        f.write(b"\0" * 64)
+    with pytest.raises(ProjectFormatError):
+        load_project(path)
+
+
+def test_garbage_triggers_full_rewrite(saved):
+    store, path = saved
+    rewrites = []
+    for i in range(20):
+        store.set_rows_state(np.array([i]), "训练集" if i % 2 else "验证集", train_color if i % 2 else val_color)
+        rewrites.append(save_project(store, path).rewritten)
+    # 每次只追加状态 / 颜色两段，废弃区域累积到与有效数据相当时整体重写一次
+    assert 1 <= sum(rewrites) < 10 and not rewrites[0]
+    assert contents(load_project(path)) == contents(store)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_SortIndex.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 16:50
+'''
+
+# tests/test_SortIndex.py
+
+import random
+import re
+
+import numpy as np
+
+from conftest import make_file_store, make_file_model, make_file_items
+from data.SortIndex import natural_keys, argsort_keys, SortedColumn
+from data.TableDataStruct import train_color, val_color
+from models.FileTableModel import COL_NAME, COL_STATE
+
+
+def reference_key(name: str) -> bytes:
+    """逐个名称计算的自然排序键：小写，数字段写为 (位数标记, 去掉前导零的数字)。"""
+    def digits(match):
+        value = match.group(0).lstrip("0") or "0"
+        return chr(0x30 + len(value)) + value
+    return re.sub(r"\d+", digits, name.lower()).encode()
+
+
+def random_names(count: int, seed: int = 3) -> list[str]:
+    rng = random.Random(seed)
+    parts = ["img", "IMG", "cam", "a", "b_", "-", ".", "_"]
+    return ["".join(rng.choice(parts) if rng.random() < 0.6 else str(rng.randrange(0, 10 ** rng.randrange(1, 6))).zfill(rng.randrange(1, 4))
+                    for _ in range(rng.randrange(1, 6))) + ".jpg" for _ in range(count)]
+
+
+def name_order(names) -> list[int]:
+    store = make_file_store(names)
+    return argsort_keys(natural_keys(store.name_bytes, store.name_offsets)).tolist()
+
+
+def test_natural_order_examples():
+    names = ["img_10.jpg", "IMG_2.jpg", "img_1.jpg", "img_02.jpg", "img.jpg", "img_1a.jpg", "cam_100.jpg"]
+    assert [names[row] for row in name_order(names)] == [
+        "cam_100.jpg", "img.jpg", "img_1.jpg", "img_1a.jpg", "IMG_2.jpg", "img_02.jpg", "img_10.jpg"]
+
+
+def test_natural_keys_match_reference():
+    names = random_names(3000)
+    expected = sorted(range(len(names)), key=lambda row: (reference_key(names[row]), row))
+    assert name_order(names) == expected
+
+
+def test_sorted_column_is_maintained_incrementally():
+    rng = np.random.default_rng(5)
+    keys = rng.integers(0, 50, 200)
+    column = SortedColumn.from_row_keys(keys)
+    appended = rng.integers(0, 50, 30)
+    column.append(200, appended)
+    keys = np.concatenate((keys, appended))
+    removed = np.zeros(len(keys), dtype=bool)
+    removed[rng.choice(len(keys), 40, replace=False)] = True
+    column.remove(removed)
+    keys = keys[~removed]
+    assert column.order.tolist() == np.argsort(keys, kind="stable").tolist()
+    assert column.keys.tolist() == np.sort(keys).tolist()
+
+
+def test_model_sort_order_follows_edits():
+    model = make_file_model(random_names(500, seed=11))
+    model.sort_order(COL_NAME), model.sort_order(COL_STATE)
+
+    model.add_items(make_file_items(random_names(50, seed=12)))
+    model.remove_rows(range(0, 550, 7))
+    model.update_rows_state(range(3, 400, 5), "训练集", train_color)
+    model.update_rows_state(range(10, 300, 11), "验证集", val_color)
+
+    current = [model.get_item_by_row(row).file_image_name for row in range(model.rowCount())]
+    assert model.sort_order(COL_NAME).tolist() == sorted(range(len(current)), key=lambda row: (reference_key(current[row]), row))
+    states = [model.get_item_by_row(row).file_image_state for row in range(model.rowCount())]
+    store = model.snapshot()
+    codes = [store.state_names.index(state) for state in states]
+    assert model.sort_order(COL_STATE).tolist() == sorted(range(len(states)), key=lambda row: (codes[row], row))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：test_TrigramIndex.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/28 10:40
+'''
+
+# tests/test_TrigramIndex.py
+
+import random
+
+import numpy as np
+import pytest
+
+from data.TrigramIndex import TrigramIndex
+
+ALPHABET = "abcAB_.1图片"
+
+
+def random_names(rng: random.Random, count: int) -> list[str]:
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+def brute_force(names: list[str], serials, text: str) -> list[int]:
+    return [serial for serial, name in zip(serials, names) if text.lower() in name.lower()]
+
+
+@pytest.fixture
+def index_and_names():
+    rng = random.Random(5)
+    names = random_names(rng, 3000)
+    index = TrigramIndex()
+    # 分三段追加，覆盖多段查询
+    for start, stop in [(0, 1000), (1000, 2500), (2500, 3000)]:
+        index.add(np.arange(start, stop, dtype=np.int64), names[start:stop])
+    return index, names
+
+
+@pytest.mark.parametrize("text", ["a", "ab", "abc", "AB_", "b.1", "图片", "片a", "1图片", "", "zzz", "a_b.1"])
+def test_search_matches_brute_force(index_and_names, text):
+    index, names = index_and_names
+    assert index.search(text).tolist() == brute_force(names, range(len(names)), text)
+
+
+def test_search_within_and_merge(index_and_names):
+    index, names = index_and_names
+    within = index.search("a")
+    refined = index.search("ab_", within=within)
+    assert refined.tolist() == brute_force(names, range(len(names)), "ab_")
+    index.merge()
+    assert index.search("ab_").tolist() == refined.tolist()
+
+
+def test_rebuild_drops_removed_rows():
+    names = ["cat_01.jpg", "dog_02.jpg", "cat_03.jpg", "bird.png"]
+    index = TrigramIndex()
+    index.add(np.arange(4, dtype=np.int64), names)
+    kept = np.array([0, 3], dtype=np.int64)
+    encoded = [names[serial].encode("utf-8") for serial in kept]
+    offsets = np.concatenate(([0], np.cumsum([len(name) for name in encoded]))).astype(np.int64)
+    index.discard(2)
+    index.rebuild(kept, np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets, index.generation)
+    assert index.search("cat").tolist() == [0]
+    assert not index.needs_rebuild
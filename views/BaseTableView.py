@@ -10,17 +10,20 @@
 
 # views/BaseTableView.py (修正后)
 
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QTableView, QHeaderView
 
 class BaseTableView(QTableView):
     """
     表格视图的通用基类。
     - 修正了基于比例设置列宽的逻辑。
+    - sortable 为 True 时点击表头排序，排序由模型的 sort() 完成（初始为不排序）。
     """
 
-    def __init__(self, column_width_ratios=None, parent=None):
+    def __init__(self, column_width_ratios=None, parent=None, sortable=False):
         super().__init__(parent)
         self.column_width_ratios = column_width_ratios
+        self.sortable = sortable
         self._init_ui()
 
     def _init_ui(self):
@@ -33,6 +36,11 @@ class BaseTableView(QTableView):
         # 默认情况下，如果无比例，则应该拉伸最后一个 section
         self.horizontalHeader().setStretchLastSection(True)
 
+        if self.sortable:
+            # 先清除排序指示，否则开启排序时会立即按第 0 列降序排序一次
+            self.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            self.setSortingEnabled(True)
+
     def setModel(self, model):
         """
         在设置模型后，应用列宽策略。
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：AutoLabelWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/22 14:30
+'''
+
+# workers/AutoLabelWorker.py
+
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+import numpy as np
+from PySide6.QtCore import QObject, Signal, Slot
+
+from data.TableDataStruct import LabelInfoDataStruct
+from data.LabelFile import write_labels
+
+# 每个进程任务包含的文件数：一次往返处理多个文件，摊薄进程间通信的开销
+AUTO_LABEL_TASK_SIZE = 8
+
+# 每个进程最多排队的任务数，超过时不再提交（背压），待处理文件列表再长也只占用固定的内存
+_TASKS_PER_WORKER = 2
+
+# 发往主线程的每批结果的文件数上限，以及攒批的最长时间（秒）
+AUTO_LABEL_BATCH_SIZE = 256
+_BATCH_INTERVAL = 0.2
+
+# 已发送但主线程尚未处理完的批次上限，同 ImportWorker
+MAX_PENDING_BATCHES = 4
+
+# 默认预标注器的参数：处理前把长边缩小到该尺寸；面积小于图片该比例的轮廓忽略；每张图最多保留的轮廓数
+_DETECT_MAX_SIDE = 1024
+_MIN_AREA_RATIO = 0.005
+_MAX_SHAPES = 20
+
+
+def contour_annotator(path: str) -> tuple[list[tuple[str, list]], tuple[int, int]]:
+    """
+    默认预标注器（离线可用的示例实现）：Otsu 阈值分割后取外轮廓，多边形近似后作为 "object" 类别的标注。
+    预标注器在子进程中调用，必须是可以 pickle 的模块级函数：
+    输入图片路径，返回 ([(类别, [(x, y), ...]), ...], (宽, 高))，坐标为原图像素坐标；无法处理时抛出异常。
+    """
+    # 用 imdecode 读取，路径中含中文时也能正常打开
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("无法解码图片")
+    height, width = image.shape
+    scale = min(1.0, _DETECT_MAX_SIDE / max(width, height))
+    if scale < 1.0:
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    _, mask = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # 前景取占比较小的一侧
+    if cv2.countNonZero(mask) * 2 > mask.size:
+        mask = cv2.bitwise_not(mask)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = mask.size * _MIN_AREA_RATIO
+    contours = sorted((c for c in contours if cv2.contourArea(c) >= min_area), key=cv2.contourArea, reverse=True)
+
+    shapes = []
+    for contour in contours[:_MAX_SHAPES]:
+        polygon = cv2.approxPolyDP(contour, 0.01 * cv2.arcLength(contour, True), True).reshape(-1, 2)
+        if len(polygon) >= 3:
+            shapes.append(("object", [(float(x) / scale, float(y) / scale) for x, y in polygon.tolist()]))
+    return shapes, (width, height)
+
+
+def _annotate_task(annotator, paths: list[str]) -> list[tuple]:
+    """在子进程中依次处理一组文件，返回每个文件的 (标注, 尺寸, 用时, 错误信息)。"""
+    # 并行度由进程数提供，避免每个进程再开 OpenCV 线程池导致超额订阅
+    cv2.setNumThreads(1)
+    results = []
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            shapes, size = annotator(path)
+            results.append((shapes, size, time.perf_counter() - started, None))
+        except Exception as e:
+            results.append((None, None, time.perf_counter() - started, str(e) or type(e).__name__))
+    return results
+
+
+class AutoLabelStats:
+    """一次预标注任务的统计。"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.annotated = 0
+        self.failed = 0
+        self.shapes = 0
+        # 子进程中预标注器的累计用时（秒）与单个文件的最长用时
+        self.annotate_seconds = 0.0
+        self.slowest = 0.0
+        self.elapsed = 0.0
+        self.cancelled = False
+
+    @property
+    def files_per_second(self) -> float:
+        return (self.annotated + self.failed) / max(self.elapsed, 1e-6)
+
+
+class AutoLabelWorker(QObject):
+    """
+    预标注任务调度器，运行在独立线程中，预标注器在进程池中执行。
+    - 待处理文件按 AUTO_LABEL_TASK_SIZE 分组提交，同时在途的任务数不超过 进程数 × _TASKS_PER_WORKER，
+      完成一个再补一个（背压）；
+    - 结果在本线程写入标注文件，再攒成批（AUTO_LABEL_BATCH_SIZE 个文件或 _BATCH_INTERVAL 秒）发给主线程，
+      主线程处理完一批后调用 batch_done 归还额度，积压的批次达到上限时暂停收取结果；
+    - 每个任务带有任务号，cancel 之后尚未开始的进程任务被取消，已在运行的结果被丢弃；
+    - 进程池在首次使用时创建（spawn），之后的任务复用。
+    """
+    # 任务号, 文件 id 列表, 对应的 list[LabelInfoDataStruct] 列表
+    batch_ready = Signal(int, object, object)
+    # 任务号, 已处理文件数, 总文件数, 每秒处理的文件数
+    progress = Signal(int, int, int, float)
+    # 任务号, AutoLabelStats
+    finished = Signal(int, object)
+
+    def __init__(self, max_workers: int = None, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._cancelled_job = 0
+        self._credits = threading.Semaphore(MAX_PENDING_BATCHES)
+
+    def cancel(self, job: int):
+        """由主线程直接调用（不经过事件队列）：取消给定任务号及更早的任务。"""
+        self._cancelled_job = max(self._cancelled_job, job)
+
+    def batch_done(self):
+        """由主线程在处理完一批后直接调用，归还一个批次额度。"""
+        self._credits.release()
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # 使用 spawn，避免 fork 带有 Qt 线程的进程
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    @Slot(int, object, object, object)
+    def run_job(self, job: int, file_ids: list[str], paths: list[str], annotator):
+        started = time.perf_counter()
+        stats = AutoLabelStats(len(paths))
+        pool = self._ensure_pool()
+        max_in_flight = self.max_workers * _TASKS_PER_WORKER
+        in_flight = {}
+        next_start = 0
+        batch_ids, batch_labels = [], []
+        last_emit = last_report = started
+
+        def cancelled():
+            return job <= self._cancelled_job
+
+        def send() -> bool:
+            nonlocal batch_ids, batch_labels, last_emit
+            # 等待主线程归还额度，期间仍响应取消
+            while not self._credits.acquire(timeout=0.1):
+                if cancelled():
+                    return False
+            self.batch_ready.emit(job, batch_ids, batch_labels)
+            batch_ids, batch_labels = [], []
+            last_emit = time.perf_counter()
+            return True
+
+        while (next_start < len(paths) or in_flight) and not cancelled():
+            while next_start < len(paths) and len(in_flight) < max_in_flight:
+                stop = min(next_start + AUTO_LABEL_TASK_SIZE, len(paths))
+                future = pool.submit(_annotate_task, annotator, paths[next_start:stop])
+                in_flight[future] = (next_start, stop)
+                next_start = stop
+
+            done, _ = wait(in_flight, timeout=_BATCH_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, stop = in_flight.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # 子进程异常退出等：整组文件计为失败
+                    results = [(None, None, 0.0, str(e))] * (stop - start)
+                for row, (shapes, size, seconds, error) in zip(range(start, stop), results):
+                    stats.annotate_seconds += seconds
+                    stats.slowest = max(stats.slowest, seconds)
+                    if error is not None:
+                        stats.failed += 1
+                        continue
+                    labels = [LabelInfoDataStruct(f"{label_type}_{i + 1}", label_type, points=points)
+                              for i, (label_type, points) in enumerate(shapes)]
+                    try:
+                        write_labels(paths[row], labels, size)
+                    except OSError:
+                        stats.failed += 1
+                        continue
+                    stats.annotated += 1
+                    stats.shapes += len(labels)
+                    batch_ids.append(file_ids[row])
+                    batch_labels.append(labels)
+
+            now = time.perf_counter()
+            if batch_ids and (len(batch_ids) >= AUTO_LABEL_BATCH_SIZE or now - last_emit >= _BATCH_INTERVAL):
+                if not send():
+                    break
+            if now - last_report >= _BATCH_INTERVAL:
+                last_report = now
+                self.progress.emit(job, stats.annotated + stats.failed, stats.total,
+                                   (stats.annotated + stats.failed) / max(now - started, 1e-6))
+
+        if cancelled():
+            for future in in_flight:
+                future.cancel()
+        elif batch_ids:
+            send()
+        stats.cancelled = cancelled()
+        stats.elapsed = time.perf_counter() - started
+        self.finished.emit(job, stats)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：DetailLoader.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/27 10:20
+'''
+
+# workers/DetailLoader.py
+
+import sqlite3
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from data.LabelCache import LabelCache
+from data.LabelFile import read_labels
+from data.ImageMetadata import MetadataCache, read_image_metadata
+
+
+class DetailLoader(QObject):
+    """
+    在后台线程中加载选中文件的详情：标签列表（经共享的 LabelCache）与图片信息（经本线程的 MetadataCache）。
+    每次请求带有递增的请求号，主线程发起新请求前调用 cancel_before：排队中的旧请求直接跳过，
+    正在进行的旧请求在读取标签与读取图片信息之间检查并提前结束。
+    磁盘缓存无法打开或读写时，本线程此后不再使用缓存，直接读取文件头。
+    """
+    # 请求号, 文件 id, 标签列表, ImageMetadata（无法读取时为 None）
+    loaded = Signal(int, str, object, object)
+
+    def __init__(self, cache: LabelCache, metadata_cache_path: str = None, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.metadata_cache_path = metadata_cache_path
+        self._metadata_cache = None
+        self._metadata_cache_failed = False
+        self._latest_generation = 0
+
+    def cancel_before(self, generation: int):
+        """由主线程直接调用（不经过事件队列）：登记最新的请求号，更早的请求不再加载。"""
+        self._latest_generation = generation
+
+    @Slot(int, str, str)
+    def load(self, generation: int, file_id: str, path: str):
+        if generation != self._latest_generation:
+            return
+        labels = self.cache.get(file_id)
+        if labels is None:
+            token = self.cache.token()
+            try:
+                labels, _ = read_labels(path)
+                self.cache.put(file_id, labels, token)
+            except (OSError, ValueError):
+                labels = []
+        if generation != self._latest_generation:
+            return
+        self.loaded.emit(generation, file_id, labels, self._read_metadata(path))
+
+    def _read_metadata(self, path: str):
+        # SQLite 连接只能在创建它的线程中使用，因此在本线程中首次加载时创建
+        if self._metadata_cache is None and not self._metadata_cache_failed:
+            try:
+                self._metadata_cache = MetadataCache(self.metadata_cache_path)
+            except (sqlite3.Error, OSError):
+                self._metadata_cache_failed = True
+        if self._metadata_cache is not None:
+            try:
+                return self._metadata_cache.get(path)
+            except sqlite3.Error:
+                self.close()
+                self._metadata_cache_failed = True
+        try:
+            return read_image_metadata(path)
+        except Exception:
+            return None
+
+    @Slot()
+    def close(self):
+        """线程结束时（在本线程中）关闭磁盘缓存连接。"""
+        if self._metadata_cache is not None:
+            try:
+                self._metadata_cache.close()
+            except sqlite3.Error:
+                pass
+            self._metadata_cache = None
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：ExportWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/21 10:15
+'''
+
+# workers/ExportWorker.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from PySide6.QtCore import QObject, Signal, Slot
+
+from data.LabelFile import read_labels
+
+# 生成的数据集目录（YOLO 目录约定，另附 COCO 标注）：
+#   images/{train,val}/<文件 id>_<文件名>          图片，硬链接或复制
+#   labels/{train,val}/<文件 id>_<主文件名>.txt    YOLO 标注，每行：类别号 cx cy w h（相对图片尺寸归一化）
+#   train.txt / val.txt                            图片清单，每行一个相对路径
+#   annotations/instances_{train,val}.json         COCO 标注
+#   classes.txt                                    类别表，行号即 YOLO 类别号
+# 导出过程中另有 .export_checkpoint.json 记录断点，导出完成后删除。
+
+# 参与导出的状态及对应的子集名
+EXPORT_SPLITS = {"训练集": "train", "验证集": "val"}
+
+# 图片放置方式：硬链接（跨设备等失败时退回复制）或复制
+LINK_MODE_LINK = "link"
+LINK_MODE_COPY = "copy"
+
+# 每批处理的文件数：一批的结果全部落盘后才写入断点，内存占用只与批大小有关
+EXPORT_CHUNK_SIZE = 2000
+
+# 复制 / 链接图片、读取标注所用的线程数（以 I/O 为主，可多于 CPU 核数）
+EXPORT_IO_THREADS = 8
+
+_CHECKPOINT_NAME = ".export_checkpoint.json"
+_CHECKPOINT_VERSION = 1
+
+# 进度信号的最短间隔（秒）
+_PROGRESS_INTERVAL = 0.2
+
+
+def _place_image(source: str, destination: str, link_mode: str):
+    """把图片放到导出目录。目标已存在且大小相同时视为已完成（断点续传时跳过）。"""
+    try:
+        if os.stat(destination).st_size == os.stat(source).st_size:
+            return
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+    if link_mode == LINK_MODE_LINK:
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+    # 先写临时文件再改名：中途崩溃不会留下不完整的目标文件
+    partial = destination + ".part"
+    shutil.copyfile(source, partial)
+    os.replace(partial, destination)
+
+
+def _export_file(source: str, destination: str, link_mode: str, known_size: tuple[int, int] | None):
+    """
+    在线程池中处理一个文件：读取标注和图片尺寸、放置图片。已预读过宽高（known_size）时不再打开图片。
+    返回 (标签列表, (宽, 高) 或 None)；源图片不存在或无法放置时返回 None。
+    其他异常（如标注文件内容不合法、图片过大被 PIL 拒绝）原样抛出，由调用方记为处理失败的文件。
+    """
+    if not os.path.isfile(source):
+        return None
+    try:
+        labels, size = read_labels(source)
+    except OSError:
+        labels, size = [], None
+    if size is None:
+        size = known_size
+    if size is None:
+        try:
+            # 只解析文件头，不解码像素
+            with Image.open(source) as image:
+                size = image.size
+        except OSError:
+            # 包括 UnidentifiedImageError：不是图片时只导出文件本身，尺寸未知
+            size = None
+    try:
+        _place_image(source, destination, link_mode)
+    except OSError:
+        return None
+    return labels, size
+
+
+def _file_entries(ordinal: int, split: str, target: str, labels: list, size, class_ids: dict,
+                  next_annotation_id: int) -> tuple:
+    """
+    生成一个文件的全部输出条目，不修改任何共享状态：
+    返回 (清单行, COCO 图片条目, COCO 标注条目列表, YOLO 标注文本, 新出现的类别列表)。
+    任何一步出错（如坐标不是数字）都在写入输出之前抛出，这个文件整体记为失败。
+    """
+    image_path = f"images/{split}/{target}"
+    width, height = size if size is not None else (0, 0)
+    image_entry = json.dumps({"id": ordinal + 1, "file_name": image_path, "width": width, "height": height},
+                             ensure_ascii=False).encode("utf-8")
+    new_classes = []
+    annotations = []
+    yolo_lines = []
+    for label in labels:
+        if not label.points:
+            continue
+        class_id = class_ids.get(label.label_type)
+        if class_id is None:
+            if label.label_type not in new_classes:
+                new_classes.append(label.label_type)
+            class_id = len(class_ids) + new_classes.index(label.label_type)
+        xs = [x for x, _ in label.points]
+        ys = [y for _, y in label.points]
+        x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+        annotation = {"id": next_annotation_id + len(annotations), "image_id": ordinal + 1,
+                      "category_id": class_id + 1, "bbox": [x0, y0, x1 - x0, y1 - y0],
+                      "area": (x1 - x0) * (y1 - y0), "iscrowd": 0}
+        if len(label.points) >= 3:
+            annotation["segmentation"] = [[value for point in label.points for value in point]]
+            annotation["area"] = _polygon_area(xs, ys)
+        annotations.append(json.dumps(annotation, allow_nan=False).encode("utf-8"))
+        if width and height:
+            yolo_lines.append(f"{class_id} {(x0 + x1) / 2 / width:.6f} {(y0 + y1) / 2 / height:.6f} "
+                              f"{(x1 - x0) / width:.6f} {(y1 - y0) / height:.6f}\n")
+    return image_path.encode("utf-8") + b"\n", image_entry, annotations, "".join(yolo_lines), new_classes
+
+
+def _write_text(path: str, text: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class _StreamFile:
+    """
+    追加写入的输出文件，每批的内容拼接后一次写入。
+    断点中记录已落盘的字节数和条目数，续传时截断到该位置，丢弃崩溃前未记入断点的部分。
+    """
+
+    def __init__(self, path: str, offset: int = 0, count: int = 0):
+        self.path = path
+        self.count = count
+        self._pending = []
+        self._file = open(path, "r+b" if offset and os.path.exists(path) else "w+b")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    def add(self, entry: bytes, separator: bytes = b""):
+        self._pending.append(separator + entry if self.count else entry)
+        self.count += 1
+
+    def flush(self) -> int:
+        """写出缓存的条目并落盘，返回当前文件长度。"""
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._pending = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def copy_to(self, target):
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, target)
+
+    def close(self):
+        self._file.close()
+
+
+class ExportWorker(QObject):
+    """
+    在后台线程中把训练集 / 验证集文件导出为数据集目录，数据来自主线程传入的 FileSnapshot。
+    - 流水线：待导出的行按 EXPORT_CHUNK_SIZE 分批，每批在线程池中读取标注、放置图片，
+      结果按行序汇总后拼接写入清单、YOLO 标注与 COCO 片段，内存占用与总文件数无关；
+    - COCO 的 images / annotations 数组先分别流式写入片段文件，结束时再拼接为完整 JSON；
+    - 每批落盘（fsync）后原子地更新断点文件。对同一快照内容再次导出到同一目录时从断点继续：
+      输出文件截断到断点记录的位置，已放置的图片按大小判断后跳过；
+    - 每个任务带有任务号，cancel 之后在当前文件处理完后停止，断点保留以便继续；
+    - 单个文件处理出错（标注内容不合法、图片无法解析等）时记为失败并继续；
+      任务级的意外错误总会发射 failed，主线程据此结束任务。
+    """
+    # 任务号, 断点处已完成的文件数, 待导出文件总数
+    started = Signal(int, int, int)
+    # 任务号, 已完成文件数, 待导出文件总数, 每秒处理的文件数
+    progress = Signal(int, int, int, float)
+    # 任务号, 导出的图片数, 缺失（不存在或无法放置）的文件数, 处理失败的文件数, 用时（秒）, 是否被取消
+    finished = Signal(int, int, int, int, float, bool)
+    # 任务号, 错误信息
+    failed = Signal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled_job = 0
+
+    def cancel(self, job: int):
+        """由主线程直接调用（不经过事件队列）：取消给定任务号及更早的任务。"""
+        self._cancelled_job = max(self._cancelled_job, job)
+
+    @Slot(int, object, str, str)
+    def run_export(self, job: int, snapshot, output_dir: str, link_mode: str):
+        try:
+            self._run_export(job, snapshot, output_dir, link_mode)
+        except Exception as e:
+            # 任何未预料的错误都要通知主线程，否则导出按钮会一直停留在“取消生成”
+            self.failed.emit(job, f"{type(e).__name__}: {e}" if not isinstance(e, OSError) else str(e))
+
+    def _run_export(self, job: int, snapshot, output_dir: str, link_mode: str):
+        started = time.perf_counter()
+        split_of_code = {code: EXPORT_SPLITS[name] for code, name in enumerate(snapshot.state_names)
+                         if name in EXPORT_SPLITS}
+        codes = np.array(sorted(split_of_code), dtype=snapshot.states.dtype)
+        rows = np.flatnonzero(np.isin(snapshot.states, codes))
+        total = len(rows)
+
+        # 断点只对内容相同（同样的文件、同样的划分、同样的放置方式）的导出有效
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(snapshot.ids[rows]).tobytes())
+        digest.update(np.ascontiguousarray(snapshot.states[rows]).tobytes())
+        digest.update(link_mode.encode("ascii"))
+        fingerprint = digest.hexdigest()
+        checkpoint = self._load_checkpoint(output_dir, fingerprint)
+
+        splits = sorted(set(split_of_code.values()))
+        for split in splits:
+            os.makedirs(os.path.join(output_dir, "images", split), exist_ok=True)
+            os.makedirs(os.path.join(output_dir, "labels", split), exist_ok=True)
+        os.makedirs(os.path.join(output_dir, "annotations"), exist_ok=True)
+
+        offsets, counts = checkpoint.get("offsets", {}), checkpoint.get("counts", {})
+        streams = {}
+        for split in splits:
+            for relative in (f"{split}.txt",
+                             f"annotations/instances_{split}.images.part",
+                             f"annotations/instances_{split}.annotations.part"):
+                streams[relative] = _StreamFile(os.path.join(output_dir, relative),
+                                                offsets.get(relative, 0), counts.get(relative, 0))
+        classes = checkpoint.get("classes", [])
+        class_ids = {name: i for i, name in enumerate(classes)}
+        next_annotation_id = checkpoint.get("next_annotation_id", 1)
+        exported = checkpoint.get("exported", 0)
+        missing = checkpoint.get("missing", 0)
+        errors = checkpoint.get("errors", 0)
+        done = checkpoint.get("done", 0)
+        self.started.emit(job, done, total)
+
+        def cancelled():
+            return job <= self._cancelled_job
+
+        last_report = started
+        resumed_from = done
+        try:
+            with ThreadPoolExecutor(EXPORT_IO_THREADS) as pool:
+                while done < total and not cancelled():
+                    chunk = rows[done:done + EXPORT_CHUNK_SIZE]
+                    paths = snapshot.paths_at(chunk)
+                    ids = [format(value, "016x") for value in snapshot.ids[chunk].tolist()]
+                    chunk_splits = [split_of_code[code] for code in snapshot.states[chunk].tolist()]
+                    known_sizes = [(width, height) if width else None
+                                   for width, height in zip(snapshot.widths[chunk].tolist(),
+                                                            snapshot.heights[chunk].tolist())]
+                    targets = [f"{file_id}_{os.path.basename(path)}" for file_id, path in zip(ids, paths)]
+                    futures = [pool.submit(_export_file, path, os.path.join(output_dir, "images", split, target),
+                                           link_mode, known_size)
+                               for path, split, target, known_size in zip(paths, chunk_splits, targets, known_sizes)]
+
+                    label_writes = []
+                    for ordinal, split, target, future in zip(range(done, done + len(chunk)), chunk_splits, targets,
+                                                              futures):
+                        if cancelled():
+                            break
+                        try:
+                            result = future.result()
+                            if result is None:
+                                missing += 1
+                                continue
+                            image_line, image_entry, annotations, yolo_text, new_classes = _file_entries(
+                                ordinal, split, target, *result, class_ids, next_annotation_id)
+                        except Exception:
+                            # 单个文件出错不影响其余文件；条目尚未写入任何输出
+                            errors += 1
+                            continue
+                        for name in new_classes:
+                            class_ids[name] = len(classes)
+                            classes.append(name)
+                        next_annotation_id += len(annotations)
+                        streams[f"{split}.txt"].add(image_line)
+                        streams[f"annotations/instances_{split}.images.part"].add(image_entry, b",\n")
+                        annotation_stream = streams[f"annotations/instances_{split}.annotations.part"]
+                        for annotation in annotations:
+                            annotation_stream.add(annotation, b",\n")
+                        label_path = os.path.join(output_dir, "labels", split, os.path.splitext(target)[0] + ".txt")
+                        label_writes.append(pool.submit(_write_text, label_path, yolo_text))
+                        exported += 1
+                    else:
+                        # 整批完成：等待标注文件写完，输出落盘后再推进断点
+                        for future in label_writes:
+                            future.result()
+                        done += len(chunk)
+                        offsets = {relative: stream.flush() for relative, stream in streams.items()}
+                        counts = {relative: stream.count for relative, stream in streams.items()}
+                        self._save_checkpoint(output_dir, {
+                            "version": _CHECKPOINT_VERSION, "fingerprint": fingerprint, "done": done,
+                            "offsets": offsets, "counts": counts, "classes": classes,
+                            "next_annotation_id": next_annotation_id, "exported": exported, "missing": missing,
+                            "errors": errors})
+
+                    now = time.perf_counter()
+                    if now - last_report >= _PROGRESS_INTERVAL or done == total:
+                        last_report = now
+                        self.progress.emit(job, done, total, (done - resumed_from) / max(now - started, 1e-6))
+                    if cancelled():
+                        pool.shutdown(wait=True, cancel_futures=True)
+
+            if done == total:
+                self._finalize(output_dir, splits, streams, classes)
+        finally:
+            for stream in streams.values():
+                stream.close()
+        self.finished.emit(job, exported, missing, errors, time.perf_counter() - started, done < total)
+
+    def _finalize(self, output_dir: str, splits: list[str], streams: dict, classes: list[str]):
+        """拼接 COCO 标注、写出类别表，最后删除片段文件和断点。"""
+        categories = json.dumps([{"id": i + 1, "name": name} for i, name in enumerate(classes)], ensure_ascii=False)
+        for split in splits:
+            path = os.path.join(output_dir, "annotations", f"instances_{split}.json")
+            with open(path + ".part", "wb") as f:
+                f.write(b'{"images": [\n')
+                streams[f"annotations/instances_{split}.images.part"].copy_to(f)
+                f.write(b'\n],\n"annotations": [\n')
+                streams[f"annotations/instances_{split}.annotations.part"].copy_to(f)
+                f.write(f'\n],\n"categories": {categories}}}\n'.encode("utf-8"))
+            os.replace(path + ".part", path)
+        _write_text(os.path.join(output_dir, "classes.txt"), "".join(f"{name}\n" for name in classes))
+        for relative, stream in streams.items():
+            if relative.endswith(".part"):
+                stream.close()
+                os.remove(stream.path)
+        try:
+            os.remove(os.path.join(output_dir, _CHECKPOINT_NAME))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _load_checkpoint(output_dir: str, fingerprint: str) -> dict:
+        try:
+            with open(os.path.join(output_dir, _CHECKPOINT_NAME), "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if checkpoint.get("version") != _CHECKPOINT_VERSION or checkpoint.get("fingerprint") != fingerprint:
+            return {}
+        # 已落盘的输出文件缺失或比断点记录的短（被删除、被截断）时，续传会在其中补入空字节，只能从头导出
+        for relative, offset in checkpoint.get("offsets", {}).items():
+            path = os.path.join(output_dir, relative)
+            if offset and (not os.path.isfile(path) or os.path.getsize(path) < offset):
+                return {}
+        return checkpoint
+
+    @staticmethod
+    def _save_checkpoint(output_dir: str, checkpoint: dict):
+        path = os.path.join(output_dir, _CHECKPOINT_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+
+def _polygon_area(xs: list[float], ys: list[float]) -> float:
+    """多边形面积（鞋带公式）。"""
+    count = len(xs)
+    return abs(sum(xs[i] * ys[(i + 1) % count] - xs[(i + 1) % count] * ys[i] for i in range(count))) / 2
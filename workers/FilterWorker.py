@@ -10,29 +10,164 @@
 
 # workers/FilterWorker.py (新文件)
 
+import numpy as np
 from PySide6.QtCore import QObject, Signal, Slot
-from data.TableDataStruct import FileDataStruct
+from data.FileColumnStore import FileSnapshot
+from data.FileQuery import QueryPlan
+from data.FuzzySearch import FuzzyQuery
+from data.TrigramIndex import TrigramIndex
+from data.SortIndex import natural_keys, argsort_keys
+from workers.ParallelFilterEngine import ParallelFilterEngine, PARALLEL_MIN_ROWS
+
+
+# 线性扫描时每处理多少行检查一次是否需要中止
+_CANCEL_CHECK_INTERVAL = 4096
+
+# 过滤执行方式
+FILTER_MODE_AUTO = "auto"          # 自动：索引可用时走索引；否则数据量超过阈值时走多进程
+FILTER_MODE_THREAD = "thread"      # 始终在本线程内执行
+FILTER_MODE_PROCESS = "process"    # 始终使用多进程分片
 
 
 class FilterWorker(QObject):
     """
     在后台线程中运行的过滤器工作者。
+    单个子串查询在索引可用时通过三元组倒排索引查询，否则退回线性扫描；
+    多条件查询先用索引取候选行，再按查询计划逐条件向量化求值；模糊查询对全部行打分取前 k 个。
+    使用多进程时，查询中的文件名条件（子串 / 通配符 / 正则，含取反）由进程池分片求值，其余条件在本线程内对命中行求值。
+    索引的合并与重建、文件名排序键的预先建立也在本线程完成。
+    每个请求带有递增的请求号(generation)，被更新请求取代的扫描会协作式地提前中止。
+    增量细化：新查询的结果必然包含于上一次结果时（如 "img" -> "img_1"，见 QueryPlan.refines），
+    无论走哪条路径都只复查上一次的命中行。
     """
-    # 信号：当过滤完成时发射，参数是匹配项的源模型行号集合
-    results_ready = Signal(set)
+    # 信号：当过滤完成时发射，参数是匹配项的源模型行号（NumPy 数组，模糊查询按得分排序，其余升序）、
+    # 对应的请求号，以及计算所依据的数据快照
+    results_ready = Signal(object, int, object)
+    # 信号：文件名排序建立完成，参数为快照、升序的排序键和对应的快照行号
+    name_sort_ready = Signal(object, object, object)
 
-    @Slot(list, str)
-    def run_filter(self, source_data: list[FileDataStruct], search_text: str):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parallel_engine = ParallelFilterEngine()
+        self._latest_generation = 0
+        # 上一次完成的查询：(查询计划, 数据版本, 命中行的插入序号)，用于增量细化
+        self._previous = None
+
+    def cancel_before(self, generation: int):
         """
-        接收数据和搜索文本，在后台执行过滤。
+        由主线程直接调用（不经过事件队列）：登记最新的请求号，
+        正在执行或排队中的更早请求会尽快中止。
         """
-        search_text_lower = search_text.lower()
-        accepted_rows = set()
+        self._latest_generation = generation
 
-        # 这是在后台线程中执行的耗时循环
-        for i, item_data in enumerate(source_data):
-            if search_text_lower in item_data.file_image_name.lower():
-                accepted_rows.add(i)
+    @Slot(object, object, object, int, int, str)
+    def run_filter(self, snapshot: FileSnapshot, name_index: TrigramIndex, plan: QueryPlan | FuzzyQuery,
+                   generation: int, data_generation: int, mode: str = FILTER_MODE_AUTO):
+        """
+        接收数据快照和编译好的查询计划（或模糊查询），在后台执行过滤。
+        快照在创建后不会再变化，主线程同时增删数据不会影响本次计算；结果中的行号是快照中的行号。
+        - generation: 请求号，过期的请求直接丢弃。
+        - data_generation: 数据版本，只有版本未变时才能复用上一次的结果做细化。
+        - mode: 执行方式，见 FILTER_MODE_*。
+        """
+        if generation != self._latest_generation:
+            return
+
+        def should_stop():
+            return generation != self._latest_generation
+
+        if isinstance(plan, FuzzyQuery):
+            accepted_rows = plan.top_k(snapshot, should_stop)
+            if accepted_rows is not None:
+                self.results_ready.emit(accepted_rows, generation, snapshot)
+            return
+
+        # 上一次结果的插入序号；新查询不是其细化、或数据版本已变时为 None
+        within = None
+        if self._previous is not None:
+            previous_plan, previous_data_generation, previous_serials = self._previous
+            if previous_data_generation == data_generation and plan.refines(previous_plan):
+                within = previous_serials
+        candidates = snapshot.rows_for_serials(within) if within is not None else None
+
+        search_text = plan.simple_text
+        use_processes = mode == FILTER_MODE_PROCESS or (
+            mode == FILTER_MODE_AUTO and not name_index.ready and len(snapshot) >= PARALLEL_MIN_ROWS)
+        if use_processes:
+            accepted_rows = self._filter_parallel(snapshot, plan, candidates, should_stop)
+        elif search_text is None:
+            accepted_rows = self._run_plan(snapshot, name_index, plan, candidates, should_stop)
+        elif name_index.ready:
+            if name_index.needs_merge:
+                name_index.merge()
+            serials = name_index.search(search_text, within=within, should_stop=should_stop)
+            # 由插入序号映射回快照中的行号，已删除的行在这里被过滤掉
+            accepted_rows = snapshot.rows_for_serials(serials) if serials is not None else None
+        else:
+            accepted_rows = self._scan(snapshot, search_text, candidates, should_stop)
+        if accepted_rows is None:
+            return
+        self._previous = (plan, data_generation, snapshot.serials[accepted_rows])
 
         # 发射信号，将结果传回主线程
-        self.results_ready.emit(accepted_rows)
\ No newline at end of file
+        self.results_ready.emit(accepted_rows, generation, snapshot)
+
+    @Slot(object, tuple)
+    def rebuild_index(self, name_index: TrigramIndex, source: tuple):
+        """用主线程取出的列数据重建索引。"""
+        name_index.rebuild(*source)
+
+    @Slot(object)
+    def build_name_sort(self, snapshot: FileSnapshot):
+        """在快照上生成文件名的自然排序键并排序，结果交回主线程安装。"""
+        keys = natural_keys(snapshot.name_bytes, snapshot.name_offsets)
+        order = argsort_keys(keys)
+        self.name_sort_ready.emit(snapshot, keys[order], order)
+
+    @Slot(object)
+    def merge_index(self, name_index: TrigramIndex):
+        if name_index.needs_merge:
+            name_index.merge()
+
+    @staticmethod
+    def _run_plan(snapshot: FileSnapshot, name_index: TrigramIndex, plan: QueryPlan, candidates: np.ndarray | None,
+                  should_stop) -> np.ndarray | None:
+        if candidates is None and plan.index_text is not None and name_index.ready:
+            # 先用最长的子串条件在索引中取候选行，其余条件只对候选行求值
+            if name_index.needs_merge:
+                name_index.merge()
+            serials = name_index.search(plan.index_text, should_stop=should_stop)
+            if serials is None:
+                return None
+            candidates = snapshot.rows_for_serials(serials)
+        return plan.filter(snapshot, candidates, should_stop)
+
+    def _filter_parallel(self, snapshot: FileSnapshot, plan: QueryPlan, candidates: np.ndarray | None,
+                         should_stop) -> np.ndarray | None:
+        if not plan.engine_clauses or (candidates is not None and len(candidates) < PARALLEL_MIN_ROWS):
+            # 只有状态等列条件（本身已是向量化求值），或只需复查不多的上一次结果：无需进程池
+            return plan.filter(snapshot, candidates, should_stop)
+        # 数据版本不变时共享内存中的文件名直接复用，不再重复拷贝
+        self.parallel_engine.publish((snapshot.store_token, snapshot.version),
+                                     snapshot.name_bytes, snapshot.name_offsets)
+        accepted_rows = self.parallel_engine.filter(plan.engine_clauses, should_stop)
+        if accepted_rows is None:
+            return None
+        return plan.column_plan.filter(snapshot, accepted_rows, should_stop)
+
+    @staticmethod
+    def _scan(snapshot: FileSnapshot, search_text: str, candidates: np.ndarray | None,
+              should_stop) -> np.ndarray | None:
+        """线性扫描给定行（默认全部行），每 _CANCEL_CHECK_INTERVAL 行检查一次是否需要中止。"""
+        search_text_lower = search_text.lower()
+        rows = np.arange(len(snapshot), dtype=np.int64) if candidates is None else candidates
+        accepted_rows = [np.empty(0, dtype=np.int64)]
+
+        # 这是在后台线程中执行的耗时循环
+        for start in range(0, len(rows), _CANCEL_CHECK_INTERVAL):
+            if should_stop():
+                return None
+            block = rows[start:start + _CANCEL_CHECK_INTERVAL]
+            hits = [search_text_lower in name.lower() for name in snapshot.names_at(block)]
+            accepted_rows.append(block[np.array(hits, dtype=bool)])
+        return np.concatenate(accepted_rows)
\ No newline at end of file
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：ImportWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/18 14:20
+'''
+
+# workers/ImportWorker.py
+
+import os
+import time
+import hashlib
+import threading
+
+from PySide6.QtCore import QObject, Signal, Slot
+from data.TableDataStruct import FileDataStruct, default_color
+
+# 导入的图片扩展名（小写）
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"})
+
+# 每批发送给主线程的文件数，主线程每批只做一次批量插入
+IMPORT_CHUNK_SIZE = 5000
+
+# 已发送但主线程尚未处理完的批次上限：扫描快于插入时后台线程在此等待，避免事件队列堆积
+MAX_PENDING_BATCHES = 4
+
+# 进度信号的最短间隔（秒）
+_PROGRESS_INTERVAL = 0.2
+
+
+def path_file_id(path: str) -> str:
+    """由文件的绝对路径得到稳定的 16 位十六进制 id，同一文件重复导入时 id 相同，可据此去重。"""
+    return hashlib.blake2b(path.encode("utf-8", "surrogateescape"), digest_size=8).hexdigest()
+
+
+class ImportWorker(QObject):
+    """
+    在后台线程中扫描目录并分批产出待导入的文件。
+    - 用 os.scandir 迭代遍历目录树（不跟随符号链接），按扩展名筛选，每个目录内按文件名排序；
+    - 每凑满 IMPORT_CHUNK_SIZE 个文件发送一批 FileDataStruct：文件名为名称本身，所在目录（绝对路径）单独保存，
+      id 由完整路径生成；
+    - 主线程处理完一批后调用 batch_done 归还额度，未归还的批次达到上限时扫描暂停（背压）；
+    - 每个任务带有任务号，cancel 之后正在进行的扫描尽快结束。
+    与模型中已有 id 的去重在主线程插入前完成（那时的模型内容才是最新的）。
+    """
+    # 任务号, list[FileDataStruct]
+    batch_ready = Signal(int, object)
+    # 任务号, 已扫描目录数, 已找到文件数, 每秒找到的文件数
+    progress = Signal(int, int, int, float)
+    # 任务号, 已找到文件数, 无法读取的目录数, 用时（秒）, 是否被取消
+    finished = Signal(int, int, int, float, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled_job = 0
+        self._credits = threading.Semaphore(MAX_PENDING_BATCHES)
+
+    def cancel(self, job: int):
+        """由主线程直接调用（不经过事件队列）：取消给定任务号及更早的任务。"""
+        self._cancelled_job = max(self._cancelled_job, job)
+
+    def batch_done(self):
+        """由主线程在处理完一批后直接调用，归还一个批次额度。"""
+        self._credits.release()
+
+    @Slot(int, str)
+    def run_import(self, job: int, root: str):
+        started = time.perf_counter()
+        last_report = started
+        dir_count = error_count = found = 0
+        batch = []
+        stack = [os.path.abspath(root)]
+
+        def cancelled():
+            return job <= self._cancelled_job
+
+        def send(items) -> bool:
+            # 等待主线程归还额度，期间仍响应取消
+            while not self._credits.acquire(timeout=0.1):
+                if cancelled():
+                    return False
+            self.batch_ready.emit(job, items)
+            return True
+
+        while stack and not cancelled():
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    files = []
+                    subdirs = []
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS and entry.is_file():
+                                files.append(entry.name)
+                        except OSError:
+                            error_count += 1
+            except OSError:
+                error_count += 1
+                continue
+            dir_count += 1
+            # 倒序入栈，出栈时按名称顺序访问子目录
+            stack.extend(sorted(subdirs, reverse=True))
+            files.sort()
+            for name in files:
+                batch.append(FileDataStruct(name, "未标注", default_color,
+                                            path_file_id(os.path.join(directory, name)), directory))
+                if len(batch) >= IMPORT_CHUNK_SIZE:
+                    if not send(batch):
+                        break
+                    found += len(batch)
+                    batch = []
+
+            now = time.perf_counter()
+            if now - last_report >= _PROGRESS_INTERVAL:
+                last_report = now
+                total = found + len(batch)
+                self.progress.emit(job, dir_count, total, total / max(now - started, 1e-6))
+
+        if batch and not cancelled() and send(batch):
+            found += len(batch)
+        self.finished.emit(job, found, error_count, time.perf_counter() - started, cancelled())
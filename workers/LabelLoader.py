@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：LabelLoader.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/26 09:40
+'''
+
+# workers/LabelLoader.py
+
+from PySide6.QtCore import QObject, Slot
+
+from data.LabelCache import LabelCache
+from data.LabelFile import read_labels
+
+
+class LabelLoader(QObject):
+    """
+    在后台线程中预取标签：按给定顺序读取尚未缓存的文件的标注文件，解析结果放入共享的 LabelCache。
+    每次预取带有递增的请求号，选中行变化后旧的预取协作式地提前结束。
+    """
+
+    def __init__(self, cache: LabelCache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self._latest_generation = 0
+
+    def cancel_before(self, generation: int):
+        """由主线程直接调用（不经过事件队列）：登记最新的请求号，更早的预取尽快结束。"""
+        self._latest_generation = generation
+
+    @Slot(int, object)
+    def prefetch(self, generation: int, files: list[tuple[str, str]]):
+        """files 为 (文件 id, 图片路径) 列表，按离当前行由近到远排列。"""
+        for file_id, path in files:
+            if generation != self._latest_generation:
+                return
+            if file_id in self.cache:
+                continue
+            token = self.cache.token()
+            try:
+                labels, _ = read_labels(path)
+            except (OSError, ValueError):
+                continue
+            self.cache.put(file_id, labels, token)
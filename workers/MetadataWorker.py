@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：MetadataWorker.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/25 10:05
+'''
+
+# workers/MetadataWorker.py
+
+import os
+import time
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal, Slot
+
+from data.ImageMetadata import MetadataCache, read_image_metadata
+
+# 每批处理的文件数：一批只查询一次缓存、写入一次缓存、向主线程发送一次结果
+METADATA_CHUNK_SIZE = 2000
+
+# 读取文件头所用的线程数（以 I/O 为主）
+METADATA_IO_THREADS = 8
+
+# 进度信号的最短间隔（秒）
+_PROGRESS_INTERVAL = 0.2
+
+
+def _stat(path: str) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _read(path: str, stat: os.stat_result):
+    try:
+        return read_image_metadata(path, stat)
+    except Exception:
+        # 不是图片、文件头损坏、尺寸过大被 PIL 拒绝等：都记为无法读取
+        return None
+
+
+def _close_cache(cache: MetadataCache) -> None:
+    """关闭缓存；缓存出错后关闭本身也可能失败，此时忽略。"""
+    try:
+        cache.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def open_cache(path: str) -> tuple[MetadataCache | None, str]:
+    """打开磁盘缓存，返回 (缓存, 错误信息)；打开失败时缓存为 None。"""
+    try:
+        return MetadataCache(path), ""
+    except (sqlite3.Error, OSError) as e:
+        return None, str(e)
+
+
+class MetadataWorker(QObject):
+    """
+    在后台线程中为整个文件列表预先读取图片信息（宽高等），数据来自主线程传入的 FileSnapshot。
+    - 只处理宽高尚未填充的行，按 METADATA_CHUNK_SIZE 分批；
+    - 每批先 stat 得到修改时间，再按 (路径, 修改时间) 批量查询磁盘缓存，未命中的文件在线程池中只读取文件头，
+      结果写回缓存（一个事务）；
+    - 每批的宽高以 (快照, 行号, 宽, 高) 发给主线程，由主线程按插入序号映射回当前行；
+    - 每个任务带有任务号，cancel 之后在当前批处理完后停止；
+    - 磁盘缓存无法打开或读写（被锁定、已损坏、目录只读）时不再使用缓存，继续读取文件头，任务照常完成。
+    """
+    # 任务号, 快照, 行号数组, 宽数组, 高数组
+    chunk_ready = Signal(int, object, object, object, object)
+    # 任务号, 已处理文件数, 总文件数, 每秒处理的文件数
+    progress = Signal(int, int, int, float)
+    # 任务号, 总文件数, 缓存命中数, 读取文件头数, 无法读取数, 用时（秒）, 是否被取消, 缓存错误信息（没有错误时为空）
+    finished = Signal(int, int, int, int, int, float, bool, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled_job = 0
+
+    def cancel(self, job: int):
+        """由主线程直接调用（不经过事件队列）：取消给定任务号及更早的任务。"""
+        self._cancelled_job = max(self._cancelled_job, job)
+
+    @Slot(int, object, str)
+    def run_scan(self, job: int, snapshot, cache_path: str):
+        started = last_report = time.perf_counter()
+        rows = np.flatnonzero(snapshot.widths == 0)
+        hits = reads = missing = done = 0
+        cache, cache_error = open_cache(cache_path)
+        try:
+            with ThreadPoolExecutor(METADATA_IO_THREADS) as pool:
+                for start in range(0, len(rows), METADATA_CHUNK_SIZE):
+                    if job <= self._cancelled_job:
+                        break
+                    chunk = rows[start:start + METADATA_CHUNK_SIZE]
+                    paths = snapshot.paths_at(chunk)
+                    # stat 很快，逐个调用比经线程池分发更省
+                    stats = [_stat(path) for path in paths]
+                    present = [i for i, stat in enumerate(stats) if stat is not None]
+                    cached = {}
+                    if cache is not None:
+                        try:
+                            cached = cache.lookup([paths[i] for i in present],
+                                                  [stats[i].st_mtime_ns for i in present])
+                        except (sqlite3.Error, OSError) as e:
+                            cache, cache_error = _close_cache(cache), str(e)
+                    misses = [i for i in present if paths[i] not in cached]
+                    read = list(pool.map(_read, [paths[i] for i in misses], [stats[i] for i in misses]))
+                    if cache is not None:
+                        try:
+                            cache.store([(paths[i], stats[i].st_mtime_ns, meta) for i, meta in zip(misses, read)
+                                         if meta is not None])
+                        except (sqlite3.Error, OSError) as e:
+                            cache, cache_error = _close_cache(cache), str(e)
+
+                    found = dict(cached)
+                    found.update((paths[i], meta) for i, meta in zip(misses, read) if meta is not None)
+                    hits += len(cached)
+                    reads += len(found) - len(cached)
+                    missing += len(chunk) - len(found)
+                    sizes = [(i, found[path].display_size) for i, path in enumerate(paths) if path in found]
+                    if sizes:
+                        indices = np.fromiter((i for i, _ in sizes), dtype=np.int64, count=len(sizes))
+                        widths = np.fromiter((size[0] for _, size in sizes), dtype=np.uint32, count=len(sizes))
+                        heights = np.fromiter((size[1] for _, size in sizes), dtype=np.uint32, count=len(sizes))
+                        self.chunk_ready.emit(job, snapshot, chunk[indices], widths, heights)
+
+                    done += len(chunk)
+                    now = time.perf_counter()
+                    if now - last_report >= _PROGRESS_INTERVAL:
+                        last_report = now
+                        self.progress.emit(job, done, len(rows), done / max(now - started, 1e-6))
+        finally:
+            if cache is not None:
+                _close_cache(cache)
+            self.finished.emit(job, len(rows), hits, reads, missing, time.perf_counter() - started,
+                               job <= self._cancelled_job, cache_error)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''
+@Project ：tableview_py_demo
+@File    ：ParallelFilterEngine.py
+@Author  ：fengzhengxiong
+@Date    ：2025/8/7 09:41
+'''
+
+# workers/ParallelFilterEngine.py
+
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 行数达到该值时，“自动”模式才考虑使用多进程
+PARALLEL_MIN_ROWS = 200_000
+
+# 每个进程分到的分片数，分片多一些便于负载均衡
+_SHARDS_PER_WORKER = 2
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """挂载已有的共享内存块；子进程不登记到资源跟踪器，避免其退出时误删主进程的共享内存。"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 没有 track 参数
+        return shared_memory.SharedMemory(name=name)
+
+
+# --- 子进程侧 ---
+# 每个子进程缓存当前挂载的共享内存和已解码的分片名称，同一数据版本的后续查询不再重复解码
+_attached = {}
+_shard_names = {}
+
+
+def _load_shard(shm_name: str, row_count: int, start: int, stop: int, lowered: bool) -> list[str]:
+    key = (shm_name, start, stop, lowered)
+    names = _shard_names.get(key)
+    if names is not None:
+        return names
+
+    if shm_name not in _attached:
+        # 数据版本变化：释放旧的共享内存和缓存
+        for shm in _attached.values():
+            shm.close()
+        _attached.clear()
+        _shard_names.clear()
+        _attached[shm_name] = _attach(shm_name)
+    buffer = _attached[shm_name].buf
+    offsets = np.frombuffer(buffer, dtype=np.int64, count=row_count + 1)
+    base = (row_count + 1) * 8
+    first, last = int(offsets[start]), int(offsets[stop])
+    text = bytes(buffer[base + first:base + last]).decode("utf-8") if last > first else ""
+    bounds = (offsets[start:stop + 1] - first).tolist()
+    names = [text[a:b] for a, b in zip(bounds, bounds[1:])] if text.isascii() else None
+    if names is None:
+        # 含非 ASCII 字符时字节偏移与字符偏移不一致，逐个解码
+        raw = bytes(buffer[base + first:base + last])
+        names = [raw[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+    if lowered:
+        names = [name.lower() for name in names]
+    _shard_names[key] = names
+    return names
+
+
+def _filter_shard(shm_name: str, row_count: int, start: int, stop: int, clauses: tuple) -> np.ndarray:
+    """
+    在子进程中对 [start, stop) 行求值，返回命中的全局行号。
+    clauses 为 (类型, 参数, 是否取反) 元组，全部满足才算命中：
+    - ("name_contains", text, negated)：文件名包含 text（大小写不敏感）
+    - ("name_regex", pattern, negated)：文件名匹配正则 pattern（re.search，大小写不敏感）
+    """
+    candidates = range(stop - start)
+    for kind, argument, negated in clauses:
+        if kind == "name_contains":
+            names = _load_shard(shm_name, row_count, start, stop, lowered=True)
+            needle = argument.lower()
+            candidates = [i for i in candidates if (needle in names[i]) != negated]
+        elif kind == "name_regex":
+            names = _load_shard(shm_name, row_count, start, stop, lowered=False)
+            search = re.compile(argument, re.IGNORECASE).search
+            candidates = [i for i in candidates if bool(search(names[i])) != negated]
+        else:
+            raise ValueError(f"Unknown filter clause: {kind}")
+    return np.asarray(candidates, dtype=np.int64) + start
+
+
+# --- 主进程侧 ---
+class ParallelFilterEngine:
+    """
+    多进程分片过滤引擎。
+    文件名列（偏移 + 字节）放入一块共享内存，只在数据版本变化时重新发布；
+    每次查询只向进程池发送分片范围和查询条件，各分片并行求值后合并命中行。
+    本对象只应在同一个线程（FilterWorker 所在线程）中使用。
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._shm = None
+        self._published_key = None
+        self._row_count = 0
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # 使用 spawn，避免 fork 带有 Qt 线程的进程
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def publish(self, key, name_bytes: np.ndarray, name_offsets: np.ndarray):
+        """把文件名列写入新的共享内存块；key 与上次相同时直接复用。"""
+        if key == self._published_key and self._shm is not None:
+            return
+        row_count = len(name_offsets) - 1
+        offsets_size = len(name_offsets) * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(offsets_size + len(name_bytes), 1))
+        np.frombuffer(shm.buf, dtype=np.int64, count=len(name_offsets))[:] = name_offsets
+        np.frombuffer(shm.buf, dtype=np.uint8, count=len(name_bytes), offset=offsets_size)[:] = name_bytes
+        self._release_shm()
+        self._shm = shm
+        self._published_key = key
+        self._row_count = row_count
+
+    def filter(self, clauses: tuple, should_stop=None) -> np.ndarray | None:
+        """并行求值，返回升序的命中行号；被中止时返回 None。"""
+        row_count = self._row_count
+        if row_count == 0:
+            return np.empty(0, dtype=np.int64)
+        pool = self._ensure_pool()
+        shard_count = min(row_count, self.max_workers * _SHARDS_PER_WORKER)
+        bounds = np.linspace(0, row_count, shard_count + 1, dtype=np.int64).tolist()
+        pending = {pool.submit(_filter_shard, self._shm.name, row_count, start, stop, clauses)
+                   for start, stop in zip(bounds, bounds[1:]) if stop > start}
+        results = []
+        while pending:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            results.extend(future.result() for future in done)
+            if should_stop is not None and should_stop():
+                for future in pending:
+                    future.cancel()
+                return None
+        return np.sort(np.concatenate(results)) if results else np.empty(0, dtype=np.int64)
+
+    def _release_shm(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._published_key = None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._release_shm()